@@ -0,0 +1,98 @@
+"""
+Compara el reemplazo de abreviaciones con la regex de alternancia
+(cargar_y_compilar_abreviaciones) contra el trie de ReemplazadorFrases
+para diccionarios de 50, 500 y 5000 frases.
+
+Uso:
+    python benchmarks/benchmark_abreviaciones.py [--notas 20000] [--semilla 0]
+"""
+import argparse
+import json
+import os
+import random
+import re
+import sys
+import time
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_BASE_DIR, 'funciones'))
+
+from procesamiento_notas import RUTA_ABREVIACIONES
+from reemplazo_frases import ReemplazadorFrases
+
+TAMANOS = (50, 500, 5000)
+
+VOCABULARIO = (
+    "unidad reporta lugar apoyo patrulla calle avenida esquina domicilio vehiculo "
+    "persona masculino femenino lesionado arribo monitoreo enterado conforme "
+    "despachado liberado llegada seguridad publica policia municipal mando "
+    "operaciones efectos anterior recorrido continuar retiramos acude solicita "
+    "ambulancia paramedicos bomberos incendio choque colonia centro barrio norte sur"
+).split()
+
+
+def _compilar_regex(mapa):
+    # Misma construcción que cargar_y_compilar_abreviaciones
+    frases = sorted(mapa, key=len, reverse=True)
+    patron = re.compile(r'\b(' + '|'.join(re.escape(f) for f in frases) + r')\b', re.IGNORECASE)
+    return lambda texto: patron.sub(lambda m: mapa.get(m.group(0).lower(), m.group(0)), texto)
+
+
+def generar_mapa(n_frases, rng):
+    """
+    Toma las frases reales de abreviaciones.json y completa con frases sintéticas
+    de 2 a 4 palabras hasta llegar a n_frases.
+    """
+    with open(RUTA_ABREVIACIONES, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    mapa = {}
+    for categoria, frases in data.items():
+        for frase in frases:
+            mapa[frase.lower()] = categoria
+    mapa = dict(list(mapa.items())[:n_frases])
+    while len(mapa) < n_frases:
+        frase = ' '.join(rng.choice(VOCABULARIO) for _ in range(rng.randint(2, 4)))
+        mapa.setdefault(frase, f"categoria_{len(mapa) % 10}")
+    return mapa
+
+
+def generar_notas(n_notas, mapa, rng):
+    frases = list(mapa)
+    notas = []
+    for _ in range(n_notas):
+        partes = [rng.choice(VOCABULARIO) for _ in range(rng.randint(5, 25))]
+        for _ in range(rng.randint(0, 3)):
+            partes.insert(rng.randint(0, len(partes)), rng.choice(frases).upper())
+        notas.append(' '.join(partes))
+    return notas
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--notas', type=int, default=20000, help="Número de notas sintéticas.")
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    print(f"{'frases':>7} {'regex (s)':>10} {'trie (s)':>10} {'aceleración':>12}")
+    for n_frases in TAMANOS:
+        rng = random.Random(args.semilla)
+        mapa = generar_mapa(n_frases, rng)
+        notas = generar_notas(args.notas, mapa, rng)
+
+        t0 = time.perf_counter()
+        regex = _compilar_regex(mapa)
+        res_regex = [regex(n) for n in notas]
+        t_regex = time.perf_counter() - t0
+
+        t0 = time.perf_counter()
+        trie = ReemplazadorFrases(mapa)
+        res_trie = trie.reemplazar_lista(notas)
+        t_trie = time.perf_counter() - t0
+
+        if res_regex != res_trie:
+            raise SystemExit(f"Resultados distintos con {n_frases} frases")
+        print(f"{n_frases:>7} {t_regex:>10.3f} {t_trie:>10.3f} {t_regex / t_trie:>11.1f}x")
+
+
+if __name__ == '__main__':
+    main()
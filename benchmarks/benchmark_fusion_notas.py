@@ -0,0 +1,112 @@
+"""
+Compara, por etapa, el procesamiento de notas en dos pasadas
+(procesar_notas_masivo + normalizar_serie_es) contra la pasada única
+procesar_notas_masivo(normalizar=True) que usa procesar_reporte.
+
+Uso:
+    python benchmarks/benchmark_fusion_notas.py [--notas 100000] [--input reporte.csv]
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+import pandas as pd
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_BASE_DIR, 'funciones'))
+
+from procesamiento_notas import procesar_notas_masivo, MAPA_ABREVIACIONES
+from notas_extraccion import normalizar_serie_es
+
+# Mezcla aproximada de un reporte real: la mayoría de las notas son texto de
+# despacho y solo una fracción menciona relaciones entre folios.
+PLANTILLAS_RELACION = [
+    "Folio {a} se dividio al folio {b} por TRANSITO (PC)",
+    "El incidente {a} ha sido ligado con el folio {b}",
+    "{a} fue cancelado por DUPLICADO",
+    "EN REFERENCIA AL FOLIO {a}",
+]
+PLANTILLAS_TEXTO = [
+    "EST DESPACHADO UNIDAD {n} A LAS {h}",
+    "ENTERADO MONITOREO CONFORME.",
+    "Reporta persona lesionada en la calle {n}, solicita apoyo de ambulancia",
+    "Se retiramos del lugar, continuar recorrido el {d}",
+    "Mando policia municipal informa: sin novedad",
+]
+
+
+def generar_notas(n_notas, rng, prop_relacion=0.1):
+    frases = list(MAPA_ABREVIACIONES) or ["sin abreviaciones"]
+    notas = []
+    for _ in range(n_notas):
+        partes = [
+            rng.choice(PLANTILLAS_TEXTO).format(
+                n=rng.randint(1, 300),
+                h=f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+                d=f"{rng.randint(1, 28):02d}/01/2024",
+            )
+            for _ in range(rng.randint(1, 3))
+        ]
+        if rng.random() < prop_relacion:
+            partes.append(rng.choice(PLANTILLAS_RELACION).format(
+                a=rng.randint(10**9, 10**10 - 1), b=rng.randint(10**9, 10**10 - 1)
+            ))
+        if rng.random() < 0.5:
+            partes.append(rng.choice(frases).upper())
+        rng.shuffle(partes)
+        notas.append(' '.join(partes))
+    return pd.Series(notas)
+
+
+def _medir(etapas):
+    tiempos = {}
+    resultado = None
+    for nombre, funcion in etapas:
+        t0 = time.perf_counter()
+        resultado = funcion(resultado)
+        tiempos[nombre] = time.perf_counter() - t0
+    return resultado, tiempos
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--notas', type=int, default=100000, help="Número de notas sintéticas.")
+    parser.add_argument('--input', default=None, help="CSV real con columna 'Notas' (opcional).")
+    parser.add_argument('--semilla', type=int, default=0)
+    args = parser.parse_args()
+
+    if args.input:
+        notas = pd.read_csv(args.input, usecols=['Notas'])['Notas'].fillna('')
+    else:
+        notas = generar_notas(args.notas, random.Random(args.semilla))
+    print(f"Notas: {len(notas)}")
+
+    def normalizar_columna(df):
+        df['nota_limpia'] = normalizar_serie_es(df['nota_limpia'].astype(str))
+        return df
+
+    df_dos, t_dos = _medir([
+        ("extraccion", lambda _: procesar_notas_masivo(notas)),
+        ("normalizacion", normalizar_columna),
+    ])
+    df_una, t_una = _medir([
+        ("extraccion+normalizacion", lambda _: procesar_notas_masivo(notas, normalizar=True)),
+    ])
+
+    if not df_dos.equals(df_una):
+        raise SystemExit("Los resultados de ambos modos no coinciden")
+
+    print("Dos pasadas:")
+    for nombre, t in t_dos.items():
+        print(f"  {nombre:<26} {t:8.3f} s")
+    print(f"  {'total':<26} {sum(t_dos.values()):8.3f} s")
+    print("Pasada única:")
+    for nombre, t in t_una.items():
+        print(f"  {nombre:<26} {t:8.3f} s")
+    print(f"Ganancia: {sum(t_dos.values()) / sum(t_una.values()):.2f}x")
+
+
+if __name__ == '__main__':
+    main()
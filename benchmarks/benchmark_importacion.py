@@ -0,0 +1,85 @@
+"""
+Mide cuánto tarda en importarse pipeline_preprocesamiento (el costo fijo de
+cada invocación del CLI) y verifica que no cargue módulos pesados que solo
+usan funciones opcionales (scikit-learn para top_ngramas, networkx para
+construir_grafo).
+
+Cada medición corre en un intérprete nuevo; se guarda el menor tiempo de
+--repeticiones. Termina con código 1 si el tiempo supera --presupuesto o si
+se importó algún módulo de MODULOS_PROHIBIDOS.
+
+Uso:
+    python benchmarks/benchmark_importacion.py [--presupuesto 0.5] [--modulo pipeline_preprocesamiento]
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Deben cargarse solo cuando se llama a la función que los usa
+MODULOS_PROHIBIDOS = ('sklearn', 'scipy', 'networkx')
+
+# Segundos máximos de importación (menor tiempo de las repeticiones)
+PRESUPUESTO_SEGUNDOS = 0.5
+
+_MEDICION = """
+import json, sys, time
+t0 = time.perf_counter()
+import {modulo}
+segundos = time.perf_counter() - t0
+print(json.dumps({{'segundos': segundos, 'modulos': sorted(sys.modules)}}))
+"""
+
+
+def medir_importacion(modulo: str) -> tuple[float, list[str]]:
+    """
+    Importa `modulo` en un intérprete nuevo. Retorna (segundos, módulos cargados).
+    """
+    salida = subprocess.run(
+        [sys.executable, '-c', _MEDICION.format(modulo=modulo)],
+        cwd=_BASE_DIR, capture_output=True, text=True, check=True,
+    )
+    resultado = json.loads(salida.stdout.strip().splitlines()[-1])
+    return resultado['segundos'], resultado['modulos']
+
+
+def modulos_prohibidos(modulos: list[str]) -> list[str]:
+    """Los paquetes de MODULOS_PROHIBIDOS (o sus submódulos) que aparecen en `modulos`."""
+    return sorted(
+        m for m in MODULOS_PROHIBIDOS if any(c == m or c.startswith(m + '.') for c in modulos)
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modulo', default='pipeline_preprocesamiento')
+    parser.add_argument('--repeticiones', type=int, default=5)
+    parser.add_argument('--presupuesto', type=float, default=PRESUPUESTO_SEGUNDOS,
+                        help="Segundos máximos de importación (menor tiempo de las repeticiones).")
+    args = parser.parse_args()
+
+    mejor = float('inf')
+    modulos = []
+    for _ in range(args.repeticiones):
+        segundos, modulos = medir_importacion(args.modulo)
+        mejor = min(mejor, segundos)
+    print(f"import {args.modulo}: {mejor:.3f} s (presupuesto {args.presupuesto:.3f} s)")
+
+    fallas = []
+    cargados = modulos_prohibidos(modulos)
+    if cargados:
+        fallas.append(f"se importaron módulos pesados: {', '.join(cargados)}")
+    if mejor > args.presupuesto:
+        fallas.append(f"la importación supera el presupuesto en {mejor - args.presupuesto:.3f} s")
+    for falla in fallas:
+        print(f"FALLA: {falla}")
+    if fallas:
+        raise SystemExit(1)
+    print("Dentro del presupuesto.")
+
+
+if __name__ == '__main__':
+    main()
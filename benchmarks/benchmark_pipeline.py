@@ -0,0 +1,182 @@
+"""
+Mide por separado las etapas del pipeline sobre un reporte sintético (o uno real
+con --input), guarda los tiempos y los compara contra una línea base.
+
+Etapas: procesar_notas_masivo, normalizar_texto_es, asignar_comisaria,
+calcular_componentes, construir_grafo, analizar_componentes y
+separar_folios_cancelados. construir_grafo y analizar_componentes se omiten
+si networkx no está instalado o con --sin-networkx.
+
+Cada etapa se ejecuta --repeticiones veces y se guarda el menor tiempo. Una
+etapa es regresión si tarda más que la línea base por encima de --tolerancia.
+
+Uso:
+    python benchmarks/benchmark_pipeline.py --filas 10000 100000 --guardar-base
+    python benchmarks/benchmark_pipeline.py --filas 10000 100000
+"""
+import argparse
+import contextlib
+import json
+import os
+import platform
+import sys
+import time
+
+import pandas as pd
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_BASE_DIR, 'funciones'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from procesamiento_notas import procesar_notas_masivo
+from notas_extraccion import normalizar_texto_es
+from asignar_comisaria import asignar_comisaria
+from procesamiento_grafos import (
+    calcular_componentes, construir_grafo, analizar_componentes, separar_folios_cancelados,
+)
+from generar_reporte_sintetico import generar_reporte
+
+RUTA_BASE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'linea_base.json')
+RUTA_RESULTADOS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'resultados.json')
+
+
+def _cronometrar(funcion, repeticiones):
+    mejor = float('inf')
+    resultado = None
+    for _ in range(repeticiones):
+        t0 = time.perf_counter()
+        resultado = funcion()
+        mejor = min(mejor, time.perf_counter() - t0)
+    return resultado, mejor
+
+
+def medir_etapas(df, repeticiones=1, con_networkx=True):
+    """
+    Ejecuta cada etapa sobre el reporte `df` y retorna { etapa: segundos }.
+    Las etapas de grafo usan la salida de procesar_notas_masivo.
+    """
+    tiempos = {}
+    notas = df['Notas'].fillna('')
+
+    df_notas, tiempos['procesar_notas_masivo'] = _cronometrar(
+        lambda: procesar_notas_masivo(notas), repeticiones
+    )
+    _, tiempos['normalizar_texto_es'] = _cronometrar(
+        lambda: [normalizar_texto_es(n) for n in df_notas['nota_limpia'].tolist()], repeticiones
+    )
+    _, tiempos['asignar_comisaria'] = _cronometrar(
+        lambda: asignar_comisaria(df[['Municipio']].copy(), verbose=False), repeticiones
+    )
+
+    # Mismas columnas que usa la etapa de grafo del pipeline
+    df_procesado = pd.concat(
+        [df[['Folio', 'Divididos']].reset_index(drop=True), df_notas], axis=1
+    ).rename(columns={'cancelado': 'cancelados'})
+
+    df_grupos, tiempos['calcular_componentes'] = _cronometrar(
+        lambda: calcular_componentes(df_procesado), repeticiones
+    )
+    if con_networkx:
+        grafo, tiempos['construir_grafo'] = _cronometrar(
+            lambda: construir_grafo(df_procesado), repeticiones
+        )
+        _, tiempos['analizar_componentes'] = _cronometrar(
+            lambda: analizar_componentes(grafo), repeticiones
+        )
+
+    # separar_folios_cancelados imprime un resumen que no interesa aquí
+    with open(os.devnull, 'w') as salida, contextlib.redirect_stdout(salida):
+        _, tiempos['separar_folios_cancelados'] = _cronometrar(
+            lambda: separar_folios_cancelados(df_procesado, df_grupos), repeticiones
+        )
+    return tiempos
+
+
+def comparar(resultados, base, tolerancia):
+    """
+    Retorna las regresiones como lista de (filas, etapa, segundos, segundos_base).
+    """
+    regresiones = []
+    for filas, tiempos in resultados.items():
+        for etapa, segundos in tiempos.items():
+            referencia = base.get(filas, {}).get(etapa)
+            if referencia is not None and segundos > referencia * (1 + tolerancia):
+                regresiones.append((filas, etapa, segundos, referencia))
+    return regresiones
+
+
+def _hay_networkx():
+    try:
+        import networkx  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, nargs='+', default=[10000, 100000],
+                        help="Tamaños de reporte sintético (p. ej. 10000 100000 1000000).")
+    parser.add_argument('--input', default=None, help="CSV real en lugar del sintético (ignora --filas).")
+    parser.add_argument('--semilla', type=int, default=0)
+    parser.add_argument('--repeticiones', type=int, default=3)
+    parser.add_argument('--sin-networkx', action='store_true',
+                        help="Omite construir_grafo y analizar_componentes (lentos en reportes grandes).")
+    parser.add_argument('--tolerancia', type=float, default=0.2,
+                        help="Aumento relativo permitido respecto a la línea base (0.2 = 20 %%).")
+    parser.add_argument('--base', default=RUTA_BASE, help="Archivo JSON de línea base.")
+    parser.add_argument('--resultados', default=RUTA_RESULTADOS, help="Archivo JSON donde se guardan los tiempos.")
+    parser.add_argument('--guardar-base', action='store_true',
+                        help="Guarda los tiempos de esta corrida como nueva línea base.")
+    args = parser.parse_args()
+
+    con_networkx = not args.sin_networkx and _hay_networkx()
+    if args.input:
+        reportes = {os.path.basename(args.input): lambda: pd.read_csv(args.input)}
+    else:
+        reportes = {str(n): (lambda n=n: generar_reporte(n, args.semilla)) for n in args.filas}
+
+    resultados = {}
+    for nombre, cargar in reportes.items():
+        df = cargar()
+        print(f"Reporte {nombre}: {len(df)} filas")
+        resultados[nombre] = medir_etapas(df, args.repeticiones, con_networkx)
+        for etapa, segundos in resultados[nombre].items():
+            print(f"  {etapa:<28} {segundos:9.3f} s")
+
+    with open(args.resultados, 'w', encoding='utf-8') as f:
+        json.dump({
+            'python': platform.python_version(),
+            'pandas': pd.__version__,
+            'maquina': platform.node(),
+            'tiempos': resultados,
+        }, f, indent=2)
+    print(f"Resultados guardados en: {args.resultados}")
+
+    if args.guardar_base:
+        base = {}
+        if os.path.exists(args.base):
+            with open(args.base, 'r', encoding='utf-8') as f:
+                base = json.load(f)
+        base.update(resultados)
+        with open(args.base, 'w', encoding='utf-8') as f:
+            json.dump(base, f, indent=2)
+        print(f"Línea base actualizada: {args.base}")
+        return
+
+    if not os.path.exists(args.base):
+        print(f"Sin línea base en {args.base}; usar --guardar-base para crearla.")
+        return
+    with open(args.base, 'r', encoding='utf-8') as f:
+        base = json.load(f)
+    regresiones = comparar(resultados, base, args.tolerancia)
+    for filas, etapa, segundos, referencia in regresiones:
+        print(f"REGRESIÓN {filas} {etapa}: {segundos:.3f} s (base {referencia:.3f} s, "
+              f"+{(segundos / referencia - 1) * 100:.0f} %)")
+    if regresiones:
+        raise SystemExit(1)
+    print("Sin regresiones respecto a la línea base.")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,175 @@
+"""
+Genera un reporte de incidentes sintético con la misma estructura que
+Limpieza_notas/Reporte_enero.csv, para medir el pipeline sin datos reales.
+
+- Folio: 10 dígitos, únicos y consecutivos.
+- Municipio: tomados de funciones/comisarias.json, con una fracción de variantes
+  de escritura (minúsculas, espacios de más) y de municipios desconocidos.
+- Notas: texto de despacho con frases de funciones/abreviaciones.json y, según
+  las proporciones indicadas, frases de división, ligado, cancelación y
+  referencia hacia otros folios del mismo reporte.
+
+Uso:
+    python benchmarks/generar_reporte_sintetico.py --filas 100000 --output reporte_100k.csv
+"""
+import argparse
+import json
+import os
+import random
+import sys
+
+import numpy as np
+import pandas as pd
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.join(_BASE_DIR, 'funciones'))
+
+from asignar_comisaria import RUTA_COMISARIAS
+from procesamiento_notas import RUTA_ABREVIACIONES
+
+FOLIO_INICIAL = 1_000_000_000
+TIPOS_INCIDENTE = ['10101', '20202', '30303', '40404', '70104']
+
+# Frases que reconocen los patrones de procesamiento_notas
+PLANTILLAS_RELACION = {
+    'dividio': [
+        "Folio {a} se dividio al folio {b} por TRANSITO (PC)",
+        "El incidente {a} se dividio a {b} por SEGURIDAD PUBLICA",
+    ],
+    'ligado': [
+        "El incidente {a} ha sido ligado con el folio {b}",
+        "Folio {a} se ha ligado al incidente {b}",
+    ],
+    'cancelado': [
+        "{a} fue cancelado por DUPLICADO",
+        "El incidente {a} cancelado por FALSA ALARMA",
+    ],
+    'referencia': [
+        "EN REFERENCIA AL FOLIO {a}",
+        "referencia a folio {a}",
+    ],
+}
+PROPORCIONES_RELACION = {'dividio': 0.03, 'ligado': 0.03, 'cancelado': 0.04, 'referencia': 0.03}
+
+PLANTILLAS_TEXTO = [
+    "EST DESPACHADO UNIDAD {n} A LAS {h}",
+    "ENTERADO MONITOREO CONFORME.",
+    "Reporta persona lesionada en la calle {n}, solicita apoyo de ambulancia",
+    "Se retiramos del lugar, continuar recorrido el {d}",
+    "Mando policia municipal informa: sin novedad",
+    "reporta vehiculo mal estacionado frente al domicilio {n}",
+    "Unidad {n} arribo al lugar, sin lesionados",
+]
+
+
+def _municipios():
+    with open(RUTA_COMISARIAS, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [m for municipios in data.values() for m in municipios]
+
+
+def _frases_abreviaciones():
+    with open(RUTA_ABREVIACIONES, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    return [frase for frases in data.values() for frase in frases] or ["sin abreviaciones"]
+
+
+def generar_notas(n_notas, rng, folios=None, proporciones=None, prop_abreviaciones=0.5):
+    """
+    Genera n_notas notas de texto. `proporciones` indica, por tipo de relación
+    ('dividio', 'ligado', 'cancelado', 'referencia'), la fracción de notas que
+    incluyen esa frase. Los folios mencionados se toman de `folios` (90 %) o
+    son folios ajenos al reporte.
+    """
+    proporciones = PROPORCIONES_RELACION if proporciones is None else proporciones
+    frases = _frases_abreviaciones()
+    if folios is None:
+        folios = [str(FOLIO_INICIAL + i) for i in range(max(n_notas, 1))]
+
+    def folio():
+        if rng.random() < 0.9:
+            return rng.choice(folios)
+        return str(rng.randint(FOLIO_INICIAL, 10 * FOLIO_INICIAL - 1))
+
+    notas = []
+    for _ in range(n_notas):
+        if rng.random() < 0.05:
+            notas.append('')
+            continue
+        partes = [
+            rng.choice(PLANTILLAS_TEXTO).format(
+                n=rng.randint(1, 300),
+                h=f"{rng.randint(0, 23):02d}:{rng.randint(0, 59):02d}",
+                d=f"{rng.randint(1, 28):02d}/01/2024",
+            )
+            for _ in range(rng.randint(1, 3))
+        ]
+        for tipo, proporcion in proporciones.items():
+            if rng.random() < proporcion:
+                partes.append(rng.choice(PLANTILLAS_RELACION[tipo]).format(a=folio(), b=folio()))
+        if rng.random() < prop_abreviaciones:
+            partes.append(rng.choice(frases).upper())
+        rng.shuffle(partes)
+        notas.append(' '.join(partes))
+    return notas
+
+
+def generar_reporte(n_filas, semilla=0, proporciones=None, prop_abreviaciones=0.5):
+    """
+    Retorna un DataFrame con las columnas del reporte de entrada.
+    """
+    rng = random.Random(semilla)
+    np_rng = np.random.default_rng(semilla)
+
+    folios = FOLIO_INICIAL + np.arange(n_filas, dtype=np.int64)
+    folios_texto = folios.astype(str).tolist()
+
+    municipios = _municipios()
+    variantes = [m.lower() for m in municipios[:5]] + [m + ' ' for m in municipios[:5]] + ['Desconocido']
+    catalogo = np.array(municipios + variantes, dtype=object)
+    pesos = np.r_[np.full(len(municipios), 0.97 / len(municipios)), np.full(len(variantes), 0.03 / len(variantes))]
+
+    divididos = np.full(n_filas, '', dtype=object)
+    con_divididos = np.flatnonzero(np_rng.random(n_filas) < 0.05)
+    divididos[con_divididos] = [str([rng.choice(folios_texto)]) for _ in con_divididos]
+
+    return pd.DataFrame({
+        'Folio': folios,
+        'Fecha': [f"{d:02d}/01/2024" for d in np_rng.integers(1, 29, n_filas)],
+        'Tipo de Incidente': np_rng.choice(TIPOS_INCIDENTE, n_filas),
+        'Notas': generar_notas(n_filas, rng, folios_texto, proporciones, prop_abreviaciones),
+        'Municipio': np_rng.choice(catalogo, n_filas, p=pesos),
+        'Hora de Recibido': [
+            f"{h:02d}:{m:02d}:00"
+            for h, m in zip(np_rng.integers(0, 24, n_filas), np_rng.integers(0, 60, n_filas))
+        ],
+        'HORA_CIERRE': '',
+        'Latitud': 19.1 + np_rng.random(n_filas) * 0.7,
+        'Longitud': -98.7 + np_rng.random(n_filas) * 0.9,
+        'Coordenadas_': '',
+        'Divididos': divididos,
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--filas', type=int, default=100000, help="Número de filas (p. ej. 10000, 100000, 1000000).")
+    parser.add_argument('--output', required=True, help="Ruta del CSV a generar.")
+    parser.add_argument('--semilla', type=int, default=0)
+    for tipo, proporcion in PROPORCIONES_RELACION.items():
+        parser.add_argument(
+            f'--prop-{tipo}', type=float, default=proporcion,
+            help=f"Fracción de notas con una frase de '{tipo}' (por defecto {proporcion}).",
+        )
+    parser.add_argument('--prop-abreviaciones', type=float, default=0.5,
+                        help="Fracción de notas con una frase de abreviaciones.json.")
+    args = parser.parse_args()
+
+    proporciones = {tipo: getattr(args, f'prop_{tipo}') for tipo in PROPORCIONES_RELACION}
+    df = generar_reporte(args.filas, args.semilla, proporciones, args.prop_abreviaciones)
+    df.to_csv(args.output, index=False, encoding='utf-8')
+    print(f"Reporte sintético con {len(df)} filas guardado en: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,342 @@
+"""
+Modo en flujo: procesa incidentes de uno en uno a medida que llegan, sin
+volver a arrancar el pipeline por cada registro.
+
+Lee registros JSONL (un objeto JSON por línea, con las mismas columnas que el
+reporte: 'Folio', 'Notas', 'Municipio', 'Tipo de Incidente', ...) desde stdin
+o desde un socket local y escribe en stdout un JSON por registro procesado,
+con las columnas de COLS_MAP más el grupo de folios al que pertenece hasta
+ese momento. Las regex y abreviaciones, el índice de comisarías y el
+union-find de folios quedan cargados en memoria durante toda la ejecución.
+
+Los registros se agrupan en lotes chicos: un lote se procesa cuando junta
+--max-lote registros o cuando su primer registro lleva --latencia-max-ms
+esperando, lo que ocurra primero.
+
+Uso:
+    python flujo_incidentes.py < incidentes.jsonl
+    python flujo_incidentes.py --socket /tmp/incidentes.sock --latencia-max-ms 5
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import queue
+import signal
+import socket
+import sys
+import threading
+import time
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+if _BASE_DIR not in sys.path:
+    sys.path.insert(0, _BASE_DIR)
+
+from generar_csv_incidentes_procesado import COLS_MAP, TIPO_INCIDENTE_EXCLUIDOS
+
+sys.path.append(os.path.join(_BASE_DIR, 'funciones'))
+from procesamiento_notas import _procesar_lista_notas, obtener_abreviaciones
+from asignar_comisaria import cargar_indice_municipios, normalizar_municipio, RUTA_COMISARIAS
+from procesamiento_grafos import COLUMNAS_RELACION, UnionFindFolios
+
+_FIN = object()  # marca de fin de la entrada
+
+# Valores JSON simples (bool es int)
+_ESCALARES = (str, int, float, type(None))
+
+# Columnas que agrega el procesamiento de notas (nombres de COLS_MAP)
+COLUMNAS_NOTAS = ('cancelado', 'referencia_folio', 'folios_ligados', 'nota_limpia')
+
+
+class ProcesadorFlujo:
+    """
+    Procesa lotes de registros (dict) con las mismas reglas que
+    _procesar_bloque: se descartan los tipos de TIPO_INCIDENTE_EXCLUIDOS, se
+    extraen los folios y se normaliza la nota, se asigna la comisaría y se
+    exportan las columnas de COLS_MAP ya renombradas.
+
+    Además cada registro alimenta un UnionFindFolios y sale con:
+    - 'Grupo':             primer folio visto de su grupo de folios relacionados.
+    - 'Tamano_Grupo':      tamaño del grupo con lo recibido hasta ese lote.
+    - 'Cancelado_Aislado': tiene folios cancelados y su grupo es de un solo
+                           folio (las filas que el pipeline por lotes separa).
+    El grupo puede crecer con registros posteriores.
+
+    Las abreviaciones y comisarias.json se vuelven a cargar solas si se
+    editan los archivos (ver obtener_abreviaciones y cargar_indice_municipios).
+    """
+
+    def __init__(self):
+        self.union_find = UnionFindFolios()
+        self._indice = None
+        self._comisarias = {}
+        self._sin_comisarias = False
+        # Se construye todo lo que se carga al primer uso antes de recibir registros
+        obtener_abreviaciones()
+        _procesar_lista_notas([''], normalizar=True)
+        self._indice_comisarias()
+
+    def _indice_comisarias(self) -> dict[str, str]:
+        try:
+            indice = cargar_indice_municipios()
+        except FileNotFoundError:
+            if not self._sin_comisarias:
+                print(f"Advertencia: No se encontró el archivo {RUTA_COMISARIAS}. No se asignarán comisarías.")
+            self._indice, self._comisarias, self._sin_comisarias = None, {}, True
+            return {}
+        self._sin_comisarias = False
+        if indice is not self._indice:
+            # comisarias.json cambió: se descartan las búsquedas ya resueltas
+            self._indice, self._comisarias = indice, {}
+        return indice
+
+    def _comisaria(self, indice: dict, municipio) -> str | None:
+        if not isinstance(municipio, str):
+            return None
+        if municipio not in self._comisarias:
+            self._comisarias[municipio] = indice.get(normalizar_municipio(municipio))
+        return self._comisarias[municipio]
+
+    def _exportar(self, registro: dict, extraidos: tuple, indice: dict) -> dict:
+        # Un registro: columnas de COLS_MAP renombradas y sus aristas en el union-find
+        folio = registro.get('Folio')
+        if not isinstance(folio, _ESCALARES):
+            raise TypeError(f"'Folio' debe ser un valor simple, no {type(folio).__name__}")
+        fila = {**registro, **dict(zip(COLUMNAS_NOTAS, extraidos))}
+        fila['comisaria'] = self._comisaria(indice, registro.get('Municipio'))
+        exportado = {nuevo: fila[original] for original, nuevo in COLS_MAP.items() if original in fila}
+        for col in COLUMNAS_RELACION:
+            valor = exportado.get(col)
+            for elemento in valor if isinstance(valor, list) else [valor]:
+                if not isinstance(elemento, _ESCALARES):
+                    raise TypeError(
+                        f"'{col}' debe ser un folio o una lista de folios, no contener {type(elemento).__name__}"
+                    )
+        self.union_find.agregar_registro(
+            exportado.get('Folio'), [exportado.get(col) for col in COLUMNAS_RELACION]
+        )
+        return exportado
+
+    def procesar(self, registros: list[dict]) -> list[dict]:
+        """
+        Procesa un lote; retorna los registros exportados, en el mismo orden.
+        Un registro con valores que no se pueden procesar (p. ej. un 'Folio'
+        que es una lista o un objeto dentro de 'Divididos') sale en su lugar como {"error": ..., "registro": ...} sin
+        afectar al resto del lote ni al union-find.
+        """
+        registros = [
+            r for r in registros if str(r.get('Tipo de Incidente')) not in TIPO_INCIDENTE_EXCLUIDOS
+        ]
+        if not registros:
+            return []
+
+        notas = ['' if r.get('Notas') is None else str(r['Notas']) for r in registros]
+        _, _, cancelado, referencia, ligados, nota_limpia = _procesar_lista_notas(notas, normalizar=True)
+        indice = self._indice_comisarias()
+
+        salida, validos = [], []
+        for registro, extraidos in zip(registros, zip(
+            cancelado.a_listas(), referencia.a_listas(), ligados.a_listas(), nota_limpia
+        )):
+            try:
+                exportado = self._exportar(registro, extraidos, indice)
+            except (TypeError, ValueError) as e:
+                salida.append({'error': f"Registro inválido: {e}", 'registro': registro})
+                continue
+            salida.append(exportado)
+            validos.append(exportado)
+
+        # Los grupos se leen después de agregar todo el lote
+        for exportado in validos:
+            grupo, tamano = self.union_find.grupo(exportado.get('Folio'))
+            exportado['Grupo'] = grupo
+            exportado['Tamano_Grupo'] = tamano
+            exportado['Cancelado_Aislado'] = bool(exportado['cancelados']) and tamano <= 1
+        return salida
+
+
+def lotes_por_latencia(cola: queue.Queue, max_lote: int, latencia_max: float):
+    """
+    Agrupa los elementos de `cola` (hasta la marca _FIN) en listas de a lo
+    sumo max_lote. Un lote se entrega cuando está lleno o cuando pasaron
+    latencia_max segundos desde que llegó su primer elemento; con
+    latencia_max=0 se toma solo lo que ya está en la cola.
+    """
+    while True:
+        primero = cola.get()
+        if primero is _FIN:
+            return
+        lote = [primero]
+        limite = time.monotonic() + latencia_max
+        while len(lote) < max_lote:
+            restante = limite - time.monotonic()
+            try:
+                elemento = cola.get(timeout=restante) if restante > 0 else cola.get_nowait()
+            except queue.Empty:
+                break
+            if elemento is _FIN:
+                yield lote
+                return
+            lote.append(elemento)
+        yield lote
+
+
+def _leer_lineas(archivo, cola: queue.Queue, detener: threading.Event, fin: bool = True) -> None:
+    try:
+        for linea in archivo:
+            if detener.is_set():
+                return
+            if linea.strip():
+                cola.put(linea)
+    finally:
+        if fin:
+            cola.put(_FIN)
+
+
+def _abrir_socket(direccion: str) -> socket.socket:
+    # Un número es un puerto TCP en 127.0.0.1; cualquier otra cosa, la ruta de un socket Unix
+    if direccion.isdigit():
+        servidor = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        servidor.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        servidor.bind(('127.0.0.1', int(direccion)))
+    else:
+        if os.path.exists(direccion):
+            os.remove(direccion)
+        servidor = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        servidor.bind(direccion)
+    servidor.listen()
+    return servidor
+
+
+def _atender_socket(servidor: socket.socket, cola: queue.Queue, detener: threading.Event) -> None:
+    # Cada conexión se lee en su propio hilo; todas alimentan la misma cola
+    while not detener.is_set():
+        conexion, _ = servidor.accept()
+        archivo = conexion.makefile('r', encoding='utf-8', errors='replace')
+        threading.Thread(target=_leer_lineas, args=(archivo, cola, detener, False), daemon=True).start()
+
+
+def _linea_json(resultado: dict) -> str:
+    try:
+        return json.dumps(resultado, ensure_ascii=False, allow_nan=False) + '\n'
+    except (TypeError, ValueError) as e:
+        return json.dumps({'error': f"Resultado no serializable: {e}"}, ensure_ascii=False) + '\n'
+
+
+def _numero_finito(texto: str) -> float:
+    numero = float(texto)
+    if not math.isfinite(numero):
+        raise ValueError(f"número fuera de rango: {texto}")
+    return numero
+
+
+def _no_finito(texto: str):
+    raise ValueError(f"valor no admitido en JSON: {texto}")
+
+
+def _decodificar(linea: str) -> dict:
+    # NaN, Infinity y números como 1.5e400 no se podrían volver a escribir como JSON
+    registro = json.loads(linea, parse_float=_numero_finito, parse_constant=_no_finito)
+    if not isinstance(registro, dict):
+        raise ValueError("se esperaba un objeto JSON")
+    return registro
+
+
+def ejecutar_flujo(
+    entrada=None,
+    salida=None,
+    direccion_socket: str | None = None,
+    max_lote: int = 256,
+    latencia_max: float = 0.005,
+    procesador: ProcesadorFlujo | None = None,
+) -> ProcesadorFlujo:
+    """
+    Lee registros JSONL de `entrada` (por defecto stdin) o, si se pasa
+    direccion_socket, de las conexiones a ese socket local, y escribe un JSON
+    por registro exportado en `salida` (por defecto stdout), un lote a la vez.
+
+    Las líneas que no son un objeto JSON (o que traen NaN, Infinity o números
+    fuera de rango) producen {"error": ..., "linea": ...} en la salida y no
+    detienen el flujo. Los mensajes del procesamiento van a stderr para no
+    mezclarse con el JSONL. Con stdin termina al llegar al fin de la entrada;
+    con socket, hasta que se interrumpe.
+
+    Si se llama desde el hilo principal, SIGINT y SIGTERM no cortan el lote
+    en curso: se deja de leer y se procesa todo lo que ya estaba en la cola
+    antes de terminar.
+
+    Retorna el ProcesadorFlujo usado (con su union-find de folios).
+    """
+    entrada = sys.stdin if entrada is None else entrada
+    salida = sys.stdout if salida is None else salida
+
+    with contextlib.redirect_stdout(sys.stderr):
+        procesador = procesador or ProcesadorFlujo()
+        cola = queue.Queue()
+        detener = threading.Event()
+
+        def interrumpir(signum, frame):
+            # Desde otro hilo: el hilo principal puede tener tomada la cola
+            if not detener.is_set():
+                detener.set()
+                threading.Thread(target=cola.put, args=(_FIN,), daemon=True).start()
+
+        senales = {}
+        if threading.current_thread() is threading.main_thread():
+            senales = {s: signal.signal(s, interrumpir) for s in (signal.SIGINT, signal.SIGTERM)}
+
+        if direccion_socket:
+            servidor = _abrir_socket(direccion_socket)
+            threading.Thread(target=_atender_socket, args=(servidor, cola, detener), daemon=True).start()
+            print(f"Escuchando en {direccion_socket}")
+        else:
+            threading.Thread(target=_leer_lineas, args=(entrada, cola, detener), daemon=True).start()
+
+        registros_leidos = lotes = 0
+        try:
+            for lote in lotes_por_latencia(cola, max_lote, latencia_max):
+                # Los errores se escriben en su lugar, entre los registros que los rodean
+                resultados, registros = [], []
+                for linea in lote:
+                    try:
+                        registros.append(_decodificar(linea))
+                    except ValueError as e:
+                        resultados.extend(procesador.procesar(registros))
+                        resultados.append({'error': str(e), 'linea': linea.strip()})
+                        registros = []
+                resultados.extend(procesador.procesar(registros))
+                if resultados:
+                    salida.write(''.join(map(_linea_json, resultados)))
+                    salida.flush()
+                registros_leidos += len(lote)
+                lotes += 1
+        finally:
+            for s, anterior in senales.items():
+                signal.signal(s, anterior)
+            if direccion_socket and not direccion_socket.isdigit() and os.path.exists(direccion_socket):
+                os.remove(direccion_socket)
+        print(f"{registros_leidos} registros en {lotes} lotes; {len(procesador.union_find)} folios en memoria")
+    return procesador
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--socket', default=None,
+                        help="Ruta de un socket Unix (o puerto TCP en 127.0.0.1) de donde leer en lugar de stdin.")
+    parser.add_argument('--max-lote', type=int, default=256, help="Registros máximos por lote.")
+    parser.add_argument('--latencia-max-ms', type=float, default=5.0,
+                        help="Espera máxima del primer registro de un lote antes de procesarlo.")
+    args = parser.parse_args()
+    if args.max_lote < 1:
+        parser.error("--max-lote debe ser al menos 1")
+
+    ejecutar_flujo(
+        direccion_socket=args.socket,
+        max_lote=args.max_lote,
+        latencia_max=args.latencia_max_ms / 1000,
+    )
+
+
+if __name__ == '__main__':
+    main()
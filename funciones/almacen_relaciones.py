@@ -0,0 +1,167 @@
+import os
+import sqlite3
+
+import numpy as np
+import pandas as pd
+
+try:
+    from procesamiento_grafos import _aristas, _folios_como_texto, _union_find
+except ImportError:
+    from .procesamiento_grafos import _aristas, _folios_como_texto, _union_find
+
+
+class AlmacenRelaciones:
+    """
+    Almacén persistente en disco (SQLite) de los grupos de folios relacionados,
+    acumulado entre reportes (p. ej. mes a mes).
+
+    Guarda un union-find materializado: cada folio apunta a su grupo y cada
+    grupo tiene su tamaño. Al agregar un reporte solo se leen y escriben los
+    folios que aparecen en él y los de los grupos que se fusionan, así que el
+    costo es proporcional al reporte nuevo y no al historial completo. Al
+    fusionar se conserva el id del grupo más grande y se reasignan los menores.
+
+    Args:
+        ruta: Archivo SQLite. Se crea si no existe.
+    """
+
+    def __init__(self, ruta: str):
+        self.ruta = ruta
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+
+        self._conn = sqlite3.connect(ruta)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS grupos ("
+            " id INTEGER PRIMARY KEY,"
+            " tamano INTEGER NOT NULL)"
+        )
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS folios ("
+            " folio TEXT PRIMARY KEY,"
+            " grupo INTEGER NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_folios_grupo ON folios (grupo)")
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM folios").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def _consultar(self, consulta: str, valores: list, lote: int = 500) -> list[tuple]:
+        # Ejecuta `consulta` (con un marcador {} para la lista IN) por lotes
+        filas = []
+        for i in range(0, len(valores), lote):
+            parte = valores[i:i + lote]
+            marcadores = ",".join("?" * len(parte))
+            filas.extend(self._conn.execute(consulta.format(marcadores), parte).fetchall())
+        return filas
+
+    def agregar(self, df: pd.DataFrame) -> int:
+        """
+        Fusiona en el almacén los folios y aristas de un reporte procesado
+        (columnas 'Folio', 'Divididos', 'folios_ligados', 'referencia_folio').
+        Agregar dos veces el mismo reporte no cambia el resultado.
+
+        Retorna el número de folios nuevos.
+        """
+        if 'Folio' not in df.columns:
+            return 0
+        folios = _folios_como_texto(df['Folio']).dropna().to_numpy()
+        origenes, destinos = _aristas(df)
+        nodos = np.concatenate([folios, origenes, destinos])
+        if len(nodos) == 0:
+            return 0
+        codigos, etiquetas = pd.factorize(nodos)
+        etiquetas = np.asarray(etiquetas, dtype=object)
+        n = len(etiquetas)
+
+        # Estado actual de los folios del reporte
+        existentes = dict(self._consultar(
+            "SELECT folio, grupo FROM folios WHERE folio IN ({})", etiquetas.tolist()
+        ))
+        grupo_actual = np.array([existentes.get(f, 0) for f in etiquetas.tolist()], dtype=np.int64)
+        conocidos = np.flatnonzero(grupo_actual > 0)
+        ids_previos, nodo_grupo = np.unique(grupo_actual[conocidos], return_inverse=True)
+        tamanos_previos = dict(self._consultar(
+            "SELECT id, tamano FROM grupos WHERE id IN ({})", ids_previos.tolist()
+        ))
+
+        # Union-find local: nodos del reporte + un nodo por grupo previo,
+        # unidos a sus folios conocidos
+        n_aristas = len(origenes)
+        u = np.concatenate([codigos[len(folios):len(folios) + n_aristas], conocidos]).astype(np.int64)
+        v = np.concatenate([codigos[len(folios) + n_aristas:], n + nodo_grupo]).astype(np.int64)
+        raiz = _union_find(n + len(ids_previos), u, v)
+
+        # Por componente local: el grupo previo más grande conserva su id
+        previos = pd.DataFrame({
+            'raiz': raiz[n:],
+            'id': ids_previos,
+            'tamano': [tamanos_previos[g] for g in ids_previos.tolist()],
+        }).sort_values(['raiz', 'tamano', 'id'], ascending=[True, False, True], kind='stable')
+        destino = previos.drop_duplicates('raiz').set_index('raiz')['id']
+        absorbidos = previos[previos['id'] != previos['raiz'].map(destino)]
+
+        nuevos = np.flatnonzero(grupo_actual == 0)
+        raices_nuevas = pd.unique(raiz[nuevos][~np.isin(raiz[nuevos], destino.index)])
+        siguiente = self._conn.execute("SELECT COALESCE(MAX(id), 0) FROM grupos").fetchone()[0] + 1
+        destino = pd.concat([
+            destino,
+            pd.Series(np.arange(siguiente, siguiente + len(raices_nuevas)), index=raices_nuevas),
+        ])
+
+        # Tamaño final de cada grupo afectado
+        tamano_final = previos.groupby('raiz')['tamano'].sum().reindex(destino.index, fill_value=0)
+        tamano_final = tamano_final.add(
+            pd.Series(raiz[nuevos]).value_counts(), fill_value=0
+        ).reindex(destino.index).astype(np.int64)
+
+        grupo_nuevo = destino.reindex(raiz[nuevos]).to_numpy()
+        self._conn.executemany(
+            "UPDATE folios SET grupo = ? WHERE grupo = ?",
+            zip(absorbidos['raiz'].map(destino).tolist(), absorbidos['id'].tolist()),
+        )
+        self._conn.executemany(
+            "DELETE FROM grupos WHERE id = ?", ((g,) for g in absorbidos['id'].tolist())
+        )
+        self._conn.executemany(
+            "INSERT INTO folios (folio, grupo) VALUES (?, ?)",
+            zip(etiquetas[nuevos].tolist(), grupo_nuevo.tolist()),
+        )
+        self._conn.executemany(
+            "INSERT OR REPLACE INTO grupos (id, tamano) VALUES (?, ?)",
+            zip(destino.tolist(), tamano_final.tolist()),
+        )
+        self._conn.commit()
+        return len(nuevos)
+
+    def componentes(self, folios=None) -> pd.DataFrame:
+        """
+        Grupos del estado acumulado, con las mismas columnas que
+        analizar_componentes: [Folio, Grupo_ID, Tamano_Grupo].
+
+        Si se pasa `folios` (lista o Serie) solo se consultan esos folios;
+        los que no están en el almacén se omiten. Sin `folios` se devuelve
+        el almacén completo, ordenado por grupo.
+        """
+        consulta = (
+            "SELECT f.folio, f.grupo, g.tamano FROM folios f"
+            " JOIN grupos g ON g.id = f.grupo"
+        )
+        if folios is None:
+            filas = self._conn.execute(consulta + " ORDER BY f.grupo, f.folio").fetchall()
+        else:
+            claves = pd.unique(_folios_como_texto(pd.Series(folios)).dropna().to_numpy())
+            filas = self._consultar(consulta + " WHERE f.folio IN ({})", claves.tolist())
+        return pd.DataFrame(filas, columns=['Folio', 'Grupo_ID', 'Tamano_Grupo'])
+
+    def cerrar(self) -> None:
+        self._conn.close()
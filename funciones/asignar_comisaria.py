@@ -1,47 +1,121 @@
 import json
 import os
+import unicodedata
+from collections import Counter
+from functools import lru_cache
+
 import pandas as pd
 
-def asignar_comisaria(df: pd.DataFrame, columna_municipio: str = 'Municipio') -> pd.DataFrame:
+RUTA_COMISARIAS = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'comisarias.json')
+MAX_SIN_COMISARIA_REPORTADOS = 20
+
+
+def normalizar_municipio(nombre: str) -> str:
+    """
+    Forma canónica de un nombre de municipio para buscarlo en el índice:
+    sin acentos ni tildes, en mayúsculas y con los espacios colapsados.
+    Ej: "  Muñoz de  Domingo Arenas " -> "MUNOZ DE DOMINGO ARENAS"
+    """
+    descompuesto = unicodedata.normalize('NFKD', nombre)
+    sin_acentos = ''.join(c for c in descompuesto if not unicodedata.combining(c))
+    return ' '.join(sin_acentos.upper().split())
+
+
+def cargar_indice_municipios(json_path: str = RUTA_COMISARIAS) -> dict[str, str]:
+    """
+    Índice inverso { municipio normalizado: id_comisaria } de comisarias.json.
+    Se construye la primera vez que se pide y se reutiliza mientras no cambie
+    la fecha de modificación del archivo.
+    """
+    return _indice_municipios(json_path, os.stat(json_path).st_mtime_ns)
+
+
+@lru_cache(maxsize=8)
+def _indice_municipios(json_path: str, modificacion: int) -> dict[str, str]:
+    with open(json_path, 'r', encoding='utf-8') as f:
+        comisarias_data = json.load(f)
+
+    municipio_to_comisaria = {}
+    for comisaria_id, municipios in comisarias_data.items():
+        for municipio in municipios:
+            municipio_to_comisaria[normalizar_municipio(municipio)] = comisaria_id
+    return municipio_to_comisaria
+
+
+def asignar_comisaria(
+    df: pd.DataFrame,
+    columna_municipio: str = 'Municipio',
+    verbose: bool = True,
+    sin_comisaria: Counter | None = None,
+) -> pd.DataFrame:
     """
     Asigna una columna 'comisaria' al DataFrame basada en el municipio.
-    
+
+    Cada municipio distinto se normaliza y se busca una sola vez; las filas
+    toman el resultado a través de los códigos de la categoría.
+
     Args:
         df: DataFrame conteniendo la columna de municipios.
         columna_municipio: Nombre de la columna que contiene los municipios.
-        
+        verbose: Si True, informa los municipios sin comisaría y cuántas filas tienen.
+        sin_comisaria: Counter opcional donde se suman las filas de cada
+            municipio sin comisaría. Sirve para procesar un reporte por bloques
+            y avisar una sola vez al final con reportar_sin_comisaria.
+
     Returns:
         DataFrame con la nueva columna 'comisaria'.
     """
-    # Ruta al archivo json
-    json_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'comisarias.json')
-    
     try:
-        with open(json_path, 'r', encoding='utf-8') as f:
-            comisarias_data = json.load(f)
+        municipio_to_comisaria = cargar_indice_municipios()
     except FileNotFoundError:
-        print(f"Advertencia: No se encontró el archivo {json_path}. No se asignarán comisarías.")
+        print(f"Advertencia: No se encontró el archivo {RUTA_COMISARIAS}. No se asignarán comisarías.")
         df['comisaria'] = None
         return df
 
-    # Crear diccionario inverso: MUNICIPIO -> id_comisaria
-    municipio_to_comisaria = {}
-    for comisaria_id, municipios in comisarias_data.items():
-        for municipio in municipios:
-            # Normalizar a mayúsculas para coincidir con el DataFrame si es necesario
-            municipio_to_comisaria[municipio.upper()] = comisaria_id
-
-    # Función auxiliar para mapear
-    def get_comisaria(municipio):
-        if not isinstance(municipio, str):
-            return None
-        return municipio_to_comisaria.get(municipio.upper())
-
-    # Aplicar mapeo
-    if columna_municipio in df.columns:
-        df['comisaria'] = df[columna_municipio].apply(get_comisaria)
-    else:
+    if columna_municipio not in df.columns:
         print(f"Advertencia: Columna '{columna_municipio}' no encontrada en el DataFrame.")
         df['comisaria'] = None
-        
+        return df
+
+    # Búsqueda por municipio distinto; los valores que no son texto no tienen comisaría
+    municipios = pd.Categorical(df[columna_municipio])
+    por_categoria = [
+        municipio_to_comisaria.get(normalizar_municipio(m)) if isinstance(m, str) else None
+        for m in municipios.categories
+    ]
+    # El código -1 (nulo) toma el None agregado al final
+    comisarias = pd.Series(por_categoria + [None], dtype=object).to_numpy()[municipios.codes]
+    df['comisaria'] = comisarias
+
+    if verbose or sin_comisaria is not None:
+        conteo = _contar_sin_comisaria(municipios, por_categoria)
+        if sin_comisaria is not None:
+            sin_comisaria.update(conteo)
+        if verbose:
+            reportar_sin_comisaria(conteo)
     return df
+
+
+def _contar_sin_comisaria(municipios: pd.Categorical, por_categoria: list) -> Counter:
+    # Filas por municipio (categoría) que no tiene comisaría
+    conteos = pd.Series(municipios).value_counts(sort=False).reindex(municipios.categories, fill_value=0)
+    sin_match = conteos[[c is None for c in por_categoria]]
+    return Counter({municipio: int(filas) for municipio, filas in sin_match.items() if filas > 0})
+
+
+def reportar_sin_comisaria(sin_comisaria: Counter) -> None:
+    """
+    Informa los municipios sin comisaría de un Counter {municipio: filas},
+    de más a menos filas (a lo sumo MAX_SIN_COMISARIA_REPORTADOS).
+    """
+    if not sin_comisaria:
+        return
+    orden = sorted(sin_comisaria.items(), key=lambda par: (-par[1], str(par[0])))
+    print(
+        f"Advertencia: {len(orden)} municipios sin comisaría "
+        f"({sum(sin_comisaria.values())} filas):"
+    )
+    for municipio, filas in orden[:MAX_SIN_COMISARIA_REPORTADOS]:
+        print(f"  {municipio!r}: {filas}")
+    if len(orden) > MAX_SIN_COMISARIA_REPORTADOS:
+        print(f"  ... y {len(orden) - MAX_SIN_COMISARIA_REPORTADOS} más")
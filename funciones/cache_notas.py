@@ -0,0 +1,98 @@
+import os
+import sqlite3
+import threading
+import time
+
+
+class CacheNotas:
+    """
+    Caché persistente en disco (SQLite) para resultados de procesamiento de notas.
+
+    Guarda pares clave → valor, donde la clave es un hash (bytes) calculado por
+    quien usa la caché y el valor es un string serializado. Tiene un límite de
+    entradas: al superarlo se eliminan las menos usadas recientemente.
+    Se puede compartir entre hilos; las operaciones se serializan.
+
+    Args:
+        ruta:         Archivo SQLite. Se crea si no existe.
+        max_entradas: Número máximo de entradas que se conservan.
+    """
+
+    def __init__(self, ruta: str, max_entradas: int = 1_000_000):
+        self.ruta = ruta
+        self.max_entradas = max_entradas
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(ruta, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS notas ("
+            " clave BLOB PRIMARY KEY,"
+            " valor TEXT NOT NULL,"
+            " uso REAL NOT NULL)"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_notas_uso ON notas (uso)")
+        # Aplica el límite también si la caché existente se abrió con uno menor
+        self._desalojar()
+        self._conn.commit()
+
+    def __len__(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM notas").fetchone()[0]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+
+    def obtener_muchos(self, claves: list[bytes], lote: int = 500) -> dict[bytes, str]:
+        """
+        Busca varias claves y marca las encontradas como usadas.
+        Retorna un dict { clave: valor } solo con las claves presentes.
+        """
+        encontrados = {}
+        ahora = time.time()
+        with self._lock:
+            for i in range(0, len(claves), lote):
+                parte = claves[i:i + lote]
+                marcadores = ",".join("?" * len(parte))
+                filas = self._conn.execute(
+                    f"SELECT clave, valor FROM notas WHERE clave IN ({marcadores})", parte
+                ).fetchall()
+                if filas:
+                    encontrados.update(filas)
+                    self._conn.execute(
+                        f"UPDATE notas SET uso = ? WHERE clave IN ({marcadores})", [ahora, *parte]
+                    )
+            self._conn.commit()
+        return encontrados
+
+    def guardar_muchos(self, pares: dict[bytes, str]) -> None:
+        """
+        Inserta o reemplaza entradas y aplica el límite de tamaño.
+        """
+        if not pares:
+            return
+        ahora = time.time()
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO notas (clave, valor, uso) VALUES (?, ?, ?)",
+                ((clave, valor, ahora) for clave, valor in pares.items()),
+            )
+            self._desalojar()
+            self._conn.commit()
+
+    def _desalojar(self) -> None:
+        exceso = len(self) - self.max_entradas
+        if exceso > 0:
+            self._conn.execute(
+                "DELETE FROM notas WHERE clave IN "
+                "(SELECT clave FROM notas ORDER BY uso LIMIT ?)",
+                (exceso,),
+            )
+
+    def cerrar(self) -> None:
+        self._conn.close()
@@ -0,0 +1,124 @@
+import queue
+import threading
+
+_FIN = object()  # marca de fin de cola
+
+
+class _ErrorHilo:
+    # Envuelve una excepción de un hilo para relanzarla en el hilo principal
+    def __init__(self, error: BaseException):
+        self.error = error
+
+
+class EjecucionSecuencial:
+    """
+    Misma interfaz que EjecucionSolapada, sin hilos: lee y escribe en el hilo
+    que llama.
+    """
+
+    def __init__(self, fuente, escribir):
+        self._fuente = fuente
+        self._escribir = escribir
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def entradas(self):
+        return iter(self._fuente)
+
+    def enviar(self, elemento) -> None:
+        self._escribir(elemento)
+
+
+class EjecucionSolapada:
+    """
+    Lectura, procesamiento y escritura solapados con colas acotadas.
+
+    Un hilo lector recorre `fuente` y deja cada elemento en una cola; el hilo
+    que llama los consume con entradas(), los procesa y entrega el resultado con
+    enviar(); un hilo escritor llama a `escribir` con cada resultado en el mismo
+    orden en que se enviaron. Las colas tienen a lo sumo `max_cola` elementos,
+    así que si el procesamiento o la escritura se atrasan la lectura se detiene
+    (contrapresión) y la memoria queda acotada.
+
+    Un error en cualquiera de los hilos se relanza en el hilo que llama, a más
+    tardar al salir del bloque with, y detiene a los demás.
+
+    Uso:
+        with EjecucionSolapada(bloques, escribir, max_cola=2) as ejecucion:
+            for bloque in ejecucion.entradas():
+                ejecucion.enviar(procesar(bloque))
+    """
+
+    def __init__(self, fuente, escribir, max_cola: int = 2):
+        self._fuente = fuente
+        self._escribir = escribir
+        self._lecturas = queue.Queue(maxsize=max_cola)
+        self._escrituras = queue.Queue(maxsize=max_cola)
+        self._detener = threading.Event()
+        self._error_escritura = None
+        self._lector = threading.Thread(target=self._leer, name="lector", daemon=True)
+        self._escritor = threading.Thread(target=self._escribir_todo, name="escritor", daemon=True)
+
+    def __enter__(self):
+        self._lector.start()
+        self._escritor.start()
+        return self
+
+    def __exit__(self, tipo, error, traza):
+        self._detener.set()
+        self._escrituras.put(_FIN)
+        self._escritor.join()
+        self._lector.join()
+        if tipo is None and self._error_escritura is not None:
+            raise self._error_escritura
+        return False
+
+    def _poner(self, cola, elemento) -> bool:
+        # put() que se rinde si el hilo principal ya terminó
+        while not self._detener.is_set():
+            try:
+                cola.put(elemento, timeout=0.1)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _leer(self) -> None:
+        try:
+            for elemento in self._fuente:
+                if not self._poner(self._lecturas, elemento):
+                    return
+        except BaseException as error:
+            self._poner(self._lecturas, _ErrorHilo(error))
+            return
+        self._poner(self._lecturas, _FIN)
+
+    def _escribir_todo(self) -> None:
+        while True:
+            elemento = self._escrituras.get()
+            if elemento is _FIN:
+                return
+            if self._error_escritura is not None:
+                continue  # se vacía la cola sin escribir
+            try:
+                self._escribir(elemento)
+            except BaseException as error:
+                self._error_escritura = error
+
+    def entradas(self):
+        while True:
+            elemento = self._lecturas.get()
+            if elemento is _FIN:
+                return
+            if isinstance(elemento, _ErrorHilo):
+                raise elemento.error
+            yield elemento
+
+    def enviar(self, elemento) -> None:
+        if self._error_escritura is not None:
+            raise self._error_escritura
+        self._escrituras.put(elemento)
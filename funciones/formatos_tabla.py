@@ -0,0 +1,160 @@
+import os
+
+import pandas as pd
+
+try:
+    from lectura_reporte import FORMATO_FECHA, FORMATO_HORA
+    from relaciones_folios import TipoFolios
+except ImportError:
+    from .lectura_reporte import FORMATO_FECHA, FORMATO_HORA
+    from .relaciones_folios import TipoFolios
+
+# Extensión de archivo -> formato
+EXTENSIONES = {
+    '.csv': 'csv',
+    '.parquet': 'parquet',
+    '.pq': 'parquet',
+    '.feather': 'feather',
+}
+FORMATOS = ('csv', 'parquet', 'feather')
+
+# Columnas de texto con pocos valores distintos que se guardan como categóricas
+# en los formatos columnares
+COLUMNAS_CATEGORICAS = ['Tipo de Incidente', 'comisaria', 'Municipio']
+
+
+def detectar_formato(ruta: str, formato: str | None = None) -> str:
+    """
+    Determina el formato de un archivo: el indicado explícitamente o, si es None,
+    el que corresponde a su extensión (CSV si la extensión no se reconoce).
+    """
+    if formato:
+        formato = formato.lower()
+        if formato not in FORMATOS:
+            raise ValueError(f"Formato no soportado: {formato} (opciones: {', '.join(FORMATOS)})")
+        return formato
+    extension = os.path.splitext(ruta)[1].lower()
+    return EXTENSIONES.get(extension, 'csv')
+
+
+def fechas_a_texto(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Escribe las columnas datetime64 como FORMATO_FECHA y las timedelta64 como
+    FORMATO_HORA, el formato en que vienen en el reporte, para exportar a CSV.
+    Retorna el mismo DataFrame si no hay columnas de ese tipo.
+    """
+    convertidas = {}
+    for col in df.columns:
+        tipo = df[col].dtype
+        if pd.api.types.is_datetime64_any_dtype(tipo):
+            convertidas[col] = df[col].dt.strftime(FORMATO_FECHA)
+        elif pd.api.types.is_timedelta64_dtype(tipo):
+            convertidas[col] = (pd.Timestamp(0) + df[col]).dt.strftime(FORMATO_HORA)
+    return df.assign(**convertidas) if convertidas else df
+
+
+def _es_fecha_hora(tipo) -> bool:
+    return pd.api.types.is_datetime64_any_dtype(tipo) or pd.api.types.is_timedelta64_dtype(tipo)
+
+
+def concatenar_tablas(partes: list[pd.DataFrame], **kwargs) -> pd.DataFrame:
+    """
+    pd.concat de bloques o reportes leídos por separado. La lectura decide en
+    cada parte si 'Fecha' y 'Hora de Recibido' pasan a datetime64/timedelta64
+    (ver lectura_reporte._parsear_fechas); si una columna quedó convertida en
+    unas partes y como texto en otras, se une como texto en todas
+    (fechas_a_texto) en lugar de mezclar Timestamps y cadenas.
+    """
+    con_filas = [parte for parte in partes if len(parte)]
+    mezcladas = []
+    for col in dict.fromkeys(col for parte in con_filas for col in parte.columns):
+        tipos = {_es_fecha_hora(parte[col].dtype) for parte in con_filas if col in parte.columns}
+        if len(tipos) > 1:
+            mezcladas.append(col)
+    if mezcladas:
+        unificadas = []
+        for parte in partes:
+            texto = fechas_a_texto(parte[[col for col in mezcladas if col in parte.columns]])
+            unificadas.append(parte.assign(**{col: texto[col] for col in texto.columns}))
+        partes = unificadas
+    return pd.concat(partes, **kwargs)
+
+
+def guardar_tabla(
+    df: pd.DataFrame,
+    ruta: str,
+    formato: str | None = None,
+    encoding: str = 'utf-8',
+) -> None:
+    """
+    Guarda un DataFrame en CSV, Parquet o Feather (sin el índice).
+
+    En CSV las fechas y horas se escriben con el formato del reporte de origen.
+    En Parquet/Feather las columnas de listas (p. ej. 'folios_ligados') se guardan
+    como listas nativas y COLUMNAS_CATEGORICAS como categóricas, en lugar de su
+    representación en texto. Requiere pyarrow para los formatos columnares.
+    """
+    formato = detectar_formato(ruta, formato)
+    if formato == 'csv':
+        fechas_a_texto(df).to_csv(ruta, index=False, encoding=encoding)
+        return
+
+    df = df.reset_index(drop=True)
+    tipos = {
+        col: 'category' for col in COLUMNAS_CATEGORICAS
+        if col in df.columns and pd.api.types.is_string_dtype(df[col].dtype)
+    }
+    # Las columnas ArregloFolios se escriben como listas: así el archivo no
+    # depende del dtype 'folios' para leerse
+    tipos.update({col: object for col in df.columns if isinstance(df[col].dtype, TipoFolios)})
+    if tipos:
+        df = df.astype(tipos)
+    if formato == 'parquet':
+        df.to_parquet(ruta, index=False)
+    else:
+        df.to_feather(ruta)
+
+
+def _columnas_archivo(ruta: str, formato: str) -> list[str]:
+    # Nombres de columnas del esquema de un Parquet/Feather, sin leer los datos
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    if formato == 'parquet':
+        return pq.read_schema(ruta).names
+    with pa.memory_map(ruta) as fuente:
+        return pa.ipc.open_file(fuente).schema.names
+
+
+def leer_tabla(
+    ruta: str,
+    columnas: list[str] | None = None,
+    formato: str | None = None,
+    **kwargs_csv,
+) -> pd.DataFrame:
+    """
+    Lee un archivo CSV, Parquet o Feather cargando solo `columnas` (todas si es None).
+
+    Los CSV se leen en UTF-8 y, si falla, en latin1; `kwargs_csv` se pasa a
+    pd.read_csv. En Parquet/Feather las columnas de listas se devuelven como
+    arreglos por fila, que procesamiento_grafos acepta sin volver a parsear texto.
+    """
+    formato = detectar_formato(ruta, formato)
+    if formato in ('parquet', 'feather'):
+        if columnas is not None:
+            # Igual que en CSV, se ignoran las columnas solicitadas que no están en el archivo
+            disponibles = set(_columnas_archivo(ruta, formato))
+            columnas = [c for c in columnas if c in disponibles]
+        if formato == 'parquet':
+            return pd.read_parquet(ruta, columns=columnas)
+        return pd.read_feather(ruta, columns=columnas)
+
+    if columnas is not None:
+        # Se ignoran las columnas solicitadas que no están en el archivo
+        solicitadas = set(columnas)
+        kwargs_csv['usecols'] = lambda col: col in solicitadas
+    try:
+        return pd.read_csv(ruta, encoding='utf-8', **kwargs_csv)
+    except UnicodeDecodeError:
+        print("UTF-8 falló, intentando latin1...")
+        return pd.read_csv(ruta, encoding='latin1', **kwargs_csv)
@@ -0,0 +1,158 @@
+import codecs
+
+import numpy as np
+import pandas as pd
+
+# Formato de origen de las columnas de fecha y hora del reporte. Al exportar a
+# CSV se vuelven a escribir con el mismo formato (ver formatos_tabla).
+FORMATO_FECHA = '%d/%m/%Y'
+FORMATO_HORA = '%H:%M:%S'
+FORMATOS_FECHA_HORA = {
+    'Fecha': FORMATO_FECHA,
+    'Hora de Recibido': FORMATO_HORA,
+    'HORA_CIERRE': FORMATO_HORA,
+}
+
+# Tipos explícitos por columna. 'Folio' se lee con el tipo inferido y luego se
+# corrige (ver _tipar_folio); fechas y horas se leen como texto y se convierten
+# después para poder validar el formato.
+TIPOS_REPORTE = {
+    'Tipo de Incidente': 'category',
+    'Municipio': 'category',
+    'Notas': str,
+    'Divididos': str,
+    'Latitud': 'float64',
+    'Longitud': 'float64',
+    **{col: str for col in FORMATOS_FECHA_HORA},
+}
+
+TAMANO_MUESTRA = 1 << 20  # bytes leídos para detectar la codificación
+
+
+def detectar_codificacion(ruta: str, tamano_muestra: int = TAMANO_MUESTRA) -> str:
+    """
+    Detecta la codificación de un archivo a partir de sus primeros bytes:
+    'utf-8-sig' si tiene BOM, 'utf-8' si la muestra es UTF-8 válido y
+    'latin1' en otro caso.
+    """
+    with open(ruta, 'rb') as f:
+        muestra = f.read(tamano_muestra)
+    if muestra.startswith(codecs.BOM_UTF8):
+        return 'utf-8-sig'
+    try:
+        # final=False tolera un carácter multibyte cortado al final de la muestra
+        codecs.getincrementaldecoder('utf-8')().decode(muestra, final=False)
+    except UnicodeDecodeError:
+        return 'latin1'
+    return 'utf-8'
+
+
+def motor_disponible(motor: str | None) -> str:
+    """
+    Resuelve el motor de pd.read_csv: 'auto' usa pyarrow si está instalado y
+    si no el parser C; None equivale a 'c'.
+    """
+    if motor in (None, 'c', 'python'):
+        return motor or 'c'
+    if motor == 'auto':
+        try:
+            import pyarrow  # noqa: F401
+        except ImportError:
+            return 'c'
+        return 'pyarrow'
+    return motor
+
+
+def _tipar_folio(serie: pd.Series) -> pd.Series:
+    # Con folios vacíos pandas infiere float64 (1000000000.0): se pasa a entero
+    # con nulos si todos los valores son enteros
+    if pd.api.types.is_float_dtype(serie.dtype):
+        valores = serie.dropna()
+        if (valores == np.floor(valores)).all():
+            return serie.astype('Int64')
+    return serie
+
+
+def _parsear_fechas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Convierte las columnas de fecha a datetime64 y las de hora a timedelta64,
+    solo si todos los valores no vacíos tienen el formato esperado y al
+    volver a escribirlos (ver formatos_tabla.fechas_a_texto) queda el mismo
+    texto; si no, la columna se deja como texto para exportarla sin cambios.
+    """
+    for col, formato in FORMATOS_FECHA_HORA.items():
+        if col not in df.columns or not pd.api.types.is_string_dtype(df[col].dtype):
+            continue
+        texto = df[col]
+        fechas = pd.to_datetime(texto, format=formato, errors='coerce')
+        if (fechas.isna() != texto.isna()).any():
+            print(f"Advertencia: '{col}' tiene valores fuera del formato {formato}; se deja como texto.")
+            continue
+        if formato == FORMATO_HORA:
+            fechas = fechas - fechas.dt.normalize()
+            reescritura = pd.Timestamp(0) + fechas
+        else:
+            reescritura = fechas
+        # Valores sin ceros a la izquierda ('5/1/2024', '6:05:00') se exportarían
+        # distinto; se compara una fila por valor distinto
+        muestra = texto.notna() & ~texto.duplicated()
+        if (reescritura[muestra].dt.strftime(formato) != texto[muestra]).any():
+            continue
+        df[col] = fechas
+    return df
+
+
+def tipar_reporte(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Ajusta los tipos de un bloque ya leído: folio entero, fechas y horas.
+    """
+    if 'Folio' in df.columns:
+        df['Folio'] = _tipar_folio(df['Folio'])
+    return _parsear_fechas(df)
+
+
+def leer_reporte(
+    ruta: str,
+    columnas: list[str] | None = None,
+    encoding: str | None = None,
+    motor: str | None = None,
+    chunksize: int | None = None,
+):
+    """
+    Lee un reporte CSV con tipos explícitos y solo las columnas indicadas.
+
+    Args:
+        ruta:      Ruta del CSV.
+        columnas:  Columnas a cargar (las que no estén en el archivo se ignoran).
+                   None carga todas.
+        encoding:  Codificación; si es None se detecta con detectar_codificacion.
+                   Sin chunksize, si la lectura en UTF-8 falla se repite en latin1.
+        motor:     Motor de pd.read_csv ('c', 'pyarrow' o 'auto'). Con chunksize
+                   siempre se usa 'c', porque pyarrow no lee por bloques.
+        chunksize: Si se indica, retorna un iterador de bloques ya tipados.
+
+    Returns:
+        DataFrame (o iterador de DataFrames si hay chunksize).
+    """
+    encoding = encoding or detectar_codificacion(ruta)
+    encabezado = pd.read_csv(ruta, encoding=encoding, nrows=0).columns
+    usecols = [c for c in encabezado if columnas is None or c in columnas]
+    tipos = {c: t for c, t in TIPOS_REPORTE.items() if c in usecols}
+
+    if chunksize:
+        lector = pd.read_csv(
+            ruta, encoding=encoding, usecols=usecols, dtype=tipos, chunksize=chunksize
+        )
+        return (tipar_reporte(bloque) for bloque in lector)
+
+    try:
+        df = pd.read_csv(
+            ruta, encoding=encoding, usecols=usecols, dtype=tipos, engine=motor_disponible(motor)
+        )
+    except UnicodeDecodeError:
+        # La muestra era UTF-8 pero hay bytes inválidos más adelante
+        if encoding == 'latin1':
+            raise
+        print("UTF-8 falló, intentando latin1...")
+        return leer_reporte(ruta, columnas, 'latin1', motor)
+    return tipar_reporte(df)
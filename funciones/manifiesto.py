@@ -0,0 +1,68 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+try:
+    from formatos_tabla import guardar_tabla
+    from relaciones_folios import ArregloFolios
+except ImportError:
+    from .formatos_tabla import guardar_tabla
+    from .relaciones_folios import ArregloFolios
+
+SUFIJO_MANIFIESTO = '.manifiesto.parquet'
+COLUMNA_HUELLA = '_huella'
+
+# Columnas de listas de folios del reporte procesado (ver COLS_MAP)
+COLUMNAS_FOLIOS = ['folios_ligados', 'cancelados', 'referencia_folio']
+
+
+def ruta_manifiesto(output_file: str) -> str:
+    """
+    Manifiesto que corresponde a un archivo de salida: <salida>.manifiesto.parquet
+    (con la extensión, así out.csv y out.parquet no comparten manifiesto).
+    """
+    return output_file + SUFIJO_MANIFIESTO
+
+
+def huellas_filas(df: pd.DataFrame, columnas: list[str]) -> np.ndarray:
+    """
+    Huella uint64 de cada fila calculada con sus valores en `columnas` (las que
+    existan en df). Es determinista entre corridas: la misma fila con los
+    mismos tipos da la misma huella.
+    """
+    columnas = [c for c in columnas if c in df.columns]
+    return pd.util.hash_pandas_object(df[columnas], index=False).to_numpy()
+
+
+def leer_manifiesto(ruta: str, reglas: str) -> pd.DataFrame | None:
+    """
+    Lee el manifiesto de una corrida anterior: las filas ya procesadas con su
+    huella en COLUMNA_HUELLA. Retorna None si no existe o si se generó con
+    otras reglas (entonces no se puede reutilizar ninguna fila).
+    """
+    if not os.path.exists(ruta):
+        return None
+    previo = pd.read_parquet(ruta)
+    if previo.attrs.get('reglas') != reglas:
+        print(f"Las reglas cambiaron desde la última corrida; no se reutiliza {ruta}")
+        return None
+
+    # Parquet devuelve las listas como arreglos por fila
+    for col in COLUMNAS_FOLIOS:
+        if col in previo.columns:
+            previo[col] = ArregloFolios.desde_listas(previo[col].tolist())
+    return previo
+
+
+def guardar_manifiesto(df_out: pd.DataFrame, huellas: np.ndarray, ruta: str, reglas: str) -> None:
+    """
+    Guarda las filas procesadas con su huella (alineada con df_out) y la huella
+    de las reglas. Se escribe en un temporal y se reemplaza al final, así que
+    una corrida interrumpida no deja un manifiesto a medias.
+    """
+    manifiesto = df_out.assign(**{COLUMNA_HUELLA: huellas})
+    manifiesto.attrs = {'reglas': reglas}
+    temporal = ruta + '.tmp'
+    guardar_tabla(manifiesto, temporal, formato='parquet')
+    os.replace(temporal, ruta)
@@ -0,0 +1,129 @@
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+
+def _pico_rss_mb() -> float | None:
+    # Máximo de memoria residente del proceso hasta ahora (ru_maxrss: KB en Linux, bytes en macOS)
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return pico / (1024 * 1024) if sys.platform == 'darwin' else pico / 1024
+
+
+class Metricas:
+    """
+    Registro de métricas por etapa del pipeline: tiempo de reloj, filas por
+    segundo y memoria.
+
+    Cada etapa se mide con `with metricas.etapa('nombre') as registro:` y el
+    código medido indica cuántas filas procesó con `registro['filas'] = n`.
+    Si una etapa se repite (p. ej. una vez por bloque) sus tiempos y filas se
+    acumulan.
+
+    La memoria es el pico de RSS del proceso al terminar la etapa o, con
+    trazar_memoria=True, el pico de memoria asignada por Python durante la
+    etapa (tracemalloc; más preciso pero hace más lento el proceso).
+
+    Se pueden medir etapas desde varios hilos a la vez (modo lote, lectura y
+    escritura solapadas): los acumulados se actualizan con un lock. El pico de
+    tracemalloc es del proceso entero, así que solo es propio de la etapa si
+    no corrió otra al mismo tiempo; si hubo solapamiento la etapa se marca con
+    'pico_traza_compartido': True y su pico incluye lo de las otras.
+
+    Con activo=False todas las operaciones son no-op.
+    """
+
+    def __init__(self, activo: bool = True, trazar_memoria: bool = False):
+        self.activo = activo
+        self.trazar_memoria = activo and trazar_memoria
+        self.etapas = {}
+        self._lock = threading.Lock()
+        self._en_curso = []  # estado de cada etapa que se está midiendo
+        self._inicio = time.perf_counter()
+        self._fecha = datetime.now().isoformat(timespec='seconds')
+        if self.trazar_memoria and not tracemalloc.is_tracing():
+            tracemalloc.start()
+
+    @contextmanager
+    def etapa(self, nombre: str):
+        registro = {}
+        if not self.activo:
+            yield registro
+            return
+
+        estado = {'solapada': False}
+        with self._lock:
+            if self._en_curso:
+                # Las etapas en curso y esta comparten el pico de tracemalloc
+                estado['solapada'] = True
+                for otra in self._en_curso:
+                    otra['solapada'] = True
+            elif self.trazar_memoria:
+                # Solo se reinicia el pico si no hay otra etapa midiéndolo
+                tracemalloc.reset_peak()
+            self._en_curso.append(estado)
+        t0 = time.perf_counter()
+        try:
+            yield registro
+        finally:
+            segundos = time.perf_counter() - t0
+            pico = tracemalloc.get_traced_memory()[1] / (1024 * 1024) if self.trazar_memoria else None
+            with self._lock:
+                self._en_curso.remove(estado)
+                acumulado = self.etapas.setdefault(nombre, {'segundos': 0.0, 'filas': 0, 'llamadas': 0})
+                acumulado['segundos'] += segundos
+                acumulado['filas'] += registro.get('filas', 0)
+                acumulado['llamadas'] += 1
+                if self.trazar_memoria:
+                    acumulado['pico_traza_mb'] = max(acumulado.get('pico_traza_mb', 0.0), pico)
+                    if estado['solapada']:
+                        acumulado['pico_traza_compartido'] = True
+                else:
+                    acumulado['pico_rss_mb'] = _pico_rss_mb()
+
+    def resumen(self, **contexto) -> dict:
+        """
+        Métricas de la corrida como dict serializable a JSON. `contexto` agrega
+        campos libres (p. ej. archivo de entrada, número de workers).
+        """
+        etapas = []
+        for nombre, datos in self.etapas.items():
+            filas_por_segundo = datos['filas'] / datos['segundos'] if datos['segundos'] > 0 else None
+            etapas.append({
+                'etapa': nombre,
+                **{k: round(v, 4) if isinstance(v, float) else v for k, v in datos.items()},
+                'filas_por_segundo': round(filas_por_segundo, 1) if filas_por_segundo else None,
+            })
+        return {
+            'fecha': self._fecha,
+            **contexto,
+            'segundos_total': round(time.perf_counter() - self._inicio, 4),
+            'pico_rss_mb': _pico_rss_mb(),
+            'etapas': etapas,
+        }
+
+    def guardar(self, ruta: str, **contexto) -> None:
+        """
+        Agrega el resumen de la corrida como una línea JSON al final de `ruta`.
+        """
+        if not self.activo:
+            return
+        directorio = os.path.dirname(os.path.abspath(ruta))
+        os.makedirs(directorio, exist_ok=True)
+        with open(ruta, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(self.resumen(**contexto), ensure_ascii=False) + '\n')
+
+
+# Instancia compartida para cuando no se piden métricas
+SIN_METRICAS = Metricas(activo=False)
@@ -0,0 +1,307 @@
+import csv
+import heapq
+import json
+import os
+import re
+import shutil
+import tempfile
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+try:
+    from notas_extraccion import STOP_WORDS_ES, normalizar_serie_es
+except ImportError:
+    from .notas_extraccion import STOP_WORDS_ES, normalizar_serie_es
+
+RUTA_ABREVIACIONES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'abreviaciones.json')
+
+# Tope de particiones al duplicarlas (por si muchas frases comparten hash)
+MAX_PARTICIONES = 1 << 16
+
+# Mismo token_pattern que CountVectorizer: palabras de 2 o más caracteres
+PATRON_TOKEN = re.compile(r"(?u)\b\w\w+\b")
+
+
+def _ngramas(texto: str, min_n: int, max_n: int, stop_words: frozenset) -> list[str]:
+    # Igual que CountVectorizer: minúsculas, tokens, se quitan stopwords y luego se arman los n-gramas
+    tokens = PATRON_TOKEN.findall(texto.lower())
+    if stop_words:
+        tokens = [t for t in tokens if t not in stop_words]
+    ngramas = []
+    for n in range(min_n, min(max_n, len(tokens)) + 1):
+        ngramas.extend(map(" ".join, zip(*[tokens[k:] for k in range(n)])))
+    return ngramas
+
+
+def _contar_bloque(textos: list, ngram_range: tuple, usar_stopwords: bool, normalizar: bool) -> tuple:
+    """
+    Cuenta los n-gramas de un bloque de notas. Retorna (documentos, frecuencia
+    total, número de notas en que aparece) con las frecuencias como Counter.
+    Se ejecuta en el proceso principal o en un worker.
+    """
+    if normalizar:
+        textos = normalizar_serie_es(textos).tolist()
+    stop_words = frozenset(STOP_WORDS_ES) if usar_stopwords else frozenset()
+    min_n, max_n = ngram_range
+
+    frecuencia = Counter()
+    documentos = Counter()
+    for texto in textos:
+        if not isinstance(texto, str):
+            texto = "" if pd.isna(texto) else str(texto)
+        ngramas = _ngramas(texto, min_n, max_n, stop_words)
+        if ngramas:
+            frecuencia.update(ngramas)
+            documentos.update(set(ngramas))
+    return len(textos), frecuencia, documentos
+
+
+class MinadorNgramas:
+    """
+    Conteo de n-gramas por bloques con memoria acotada, para encontrar frases
+    frecuentes en las notas (candidatas a abreviaciones.json).
+
+    Da el mismo resultado que top_ngramas (CountVectorizer con min_df sobre
+    todas las notas) sin cargar todas las notas ni todo el vocabulario a la
+    vez: cada bloque se cuenta en memoria y sus conteos se reparten por hash
+    de la frase entre archivos temporales (particiones). Al final cada
+    partición se agrega por separado, se descartan las frases que aparecen en
+    menos de min_df notas y se conservan las top_k de cada una.
+
+    Ninguna partición pasa de `max_entradas` líneas (más las del bloque en
+    curso), sin importar cuántos bloques se agreguen: cuando una se llena se
+    compacta (una línea por frase, con los conteos sumados) y, si aun así le
+    quedan más de max_entradas / 2 frases distintas, se duplica el número de
+    particiones repartiendo de nuevo todas las frases. La memoria queda
+    acotada por un bloque y max_entradas líneas; el resultado no cambia.
+
+    Con workers > 1 los bloques se cuentan en paralelo en un pool de procesos;
+    a lo sumo 2 * workers bloques están en vuelo a la vez.
+
+    Uso:
+        with MinadorNgramas(min_df=10) as minador:
+            minador.agregar_bloques(bloques_de_notas)
+            pares = minador.top(200)
+    """
+
+    def __init__(
+        self,
+        ngram_range: tuple = (2, 4),
+        min_df: int | float = 10,
+        usar_stopwords: bool = True,
+        particiones: int = 16,
+        max_entradas: int = 1_000_000,
+        workers: int = 1,
+        normalizar: bool = False,
+        directorio: str | None = None,
+    ):
+        """
+        Args:
+            ngram_range:    (n mínimo, n máximo) de palabras por frase.
+            min_df:         Número mínimo de notas en que debe aparecer una frase
+                            (entero) o fracción del total de notas (float).
+            usar_stopwords: Si True, ignora las stopwords de STOP_WORDS_ES.
+            particiones:    Número inicial de archivos temporales entre los
+                            que se reparten los conteos.
+            max_entradas:   Líneas máximas de una partición antes de
+                            compactarla; es lo que se carga en memoria al
+                            leer una partición.
+            workers:        Procesos para contar bloques en paralelo.
+            normalizar:     Si True, aplica normalizar_serie_es a cada bloque
+                            antes de contar.
+            directorio:     Directorio para los archivos temporales (por
+                            defecto el del sistema).
+        """
+        self.ngram_range = tuple(ngram_range)
+        self.min_df = min_df
+        self.usar_stopwords = usar_stopwords
+        self.particiones = max(1, particiones)
+        self.max_entradas = max(2, max_entradas)
+        self.workers = max(1, workers)
+        self.normalizar = normalizar
+        self.documentos = 0
+        self._directorio = tempfile.mkdtemp(prefix='ngramas_', dir=directorio)
+        # Líneas de cada partición (frases repetidas incluidas); los archivos se
+        # abren solo para escribir, así que su número no depende de los descriptores
+        self._lineas = [0] * self.particiones
+        for i in range(self.particiones):
+            self._escribir(i, [], 'w')
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.cerrar()
+        return False
+
+    def cerrar(self) -> None:
+        """Borra los archivos temporales."""
+        shutil.rmtree(self._directorio, ignore_errors=True)
+
+    def _ruta(self, i: int) -> str:
+        return os.path.join(self._directorio, f'particion_{i}.tsv')
+
+    def _escribir(self, i: int, lineas, modo: str = 'a') -> None:
+        with open(self._ruta(i), modo, encoding='utf-8', newline='') as archivo:
+            archivo.writelines(lineas)
+
+    def _guardar_conteos(self, resultado: tuple) -> None:
+        documentos, frecuencia, en_documentos = resultado
+        self.documentos += documentos
+        if not frecuencia:
+            return
+        # Una línea "frase<TAB>frecuencia<TAB>documentos" por frase, en la partición
+        # que le toca según su hash (las frases no tienen tabuladores ni saltos de línea)
+        lineas = [[] for _ in range(self.particiones)]
+        for frase, n in frecuencia.items():
+            lineas[hash(frase) % self.particiones].append(f"{frase}\t{n}\t{en_documentos[frase]}\n")
+        llenas = []
+        for i, parte in enumerate(lineas):
+            if parte:
+                self._escribir(i, parte)
+                self._lineas[i] += len(parte)
+                if self._lineas[i] > self.max_entradas:
+                    llenas.append(i)
+
+        for i in llenas:
+            self._compactar(i)
+        # Tras compactar, _lineas es el número de frases distintas; si una
+        # partición sigue con más de la mitad del máximo se reparte todo
+        while (
+            any(self._lineas[i] > self.max_entradas // 2 for i in llenas)
+            and self.particiones < MAX_PARTICIONES
+        ):
+            self._duplicar_particiones()
+            llenas = range(self.particiones)
+
+    def _conteos_particion(self, i: int) -> pd.DataFrame:
+        # Frecuencia y documentos por frase (índice) de la partición i
+        return self._leer_particion(i).groupby('frase', sort=False).sum()
+
+    @staticmethod
+    def _lineas_conteos(conteos: pd.DataFrame):
+        return (
+            f"{frase}\t{n}\t{d}\n"
+            for frase, n, d in zip(conteos.index, conteos['frecuencia'].tolist(), conteos['documentos'].tolist())
+        )
+
+    def _compactar(self, i: int) -> None:
+        # Reescribe la partición con una línea por frase
+        conteos = self._conteos_particion(i)
+        self._escribir(i, self._lineas_conteos(conteos), 'w')
+        self._lineas[i] = len(conteos)
+
+    def _duplicar_particiones(self) -> None:
+        # Con 2 * particiones, las frases de la partición i van a la i o a la
+        # i + particiones; cada partición se lee y se reparte una a la vez
+        anteriores = self.particiones
+        self.particiones *= 2
+        self._lineas += [0] * anteriores
+        for i in range(anteriores):
+            conteos = self._conteos_particion(i)
+            mover = np.array([hash(frase) % self.particiones != i for frase in conteos.index], dtype=bool)
+            self._escribir(i, self._lineas_conteos(conteos[~mover]), 'w')
+            self._escribir(i + anteriores, self._lineas_conteos(conteos[mover]), 'w')
+            self._lineas[i] = int((~mover).sum())
+            self._lineas[i + anteriores] = int(mover.sum())
+
+    def agregar(self, textos) -> None:
+        """Cuenta un bloque de notas (lista o Serie de textos)."""
+        textos = textos.tolist() if isinstance(textos, pd.Series) else list(textos)
+        self._guardar_conteos(_contar_bloque(textos, self.ngram_range, self.usar_stopwords, self.normalizar))
+
+    def agregar_bloques(self, bloques) -> None:
+        """Cuenta un iterable de bloques de notas, en paralelo si workers > 1."""
+        if self.workers == 1:
+            for textos in bloques:
+                self.agregar(textos)
+            return
+
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            en_vuelo = []
+            for textos in bloques:
+                textos = textos.tolist() if isinstance(textos, pd.Series) else list(textos)
+                en_vuelo.append(pool.submit(
+                    _contar_bloque, textos, self.ngram_range, self.usar_stopwords, self.normalizar
+                ))
+                if len(en_vuelo) >= 2 * self.workers:
+                    self._guardar_conteos(en_vuelo.pop(0).result())
+            for futuro in en_vuelo:
+                self._guardar_conteos(futuro.result())
+
+    def _leer_particion(self, i: int) -> pd.DataFrame:
+        ruta = self._ruta(i)
+        if os.path.getsize(ruta) == 0:
+            return pd.DataFrame({'frase': [], 'frecuencia': [], 'documentos': []})
+        # keep_default_na=False: frases como "na" o "nan" no son nulos
+        return pd.read_csv(
+            ruta, sep='\t', header=None, names=['frase', 'frecuencia', 'documentos'],
+            dtype={'frase': str, 'frecuencia': 'int64', 'documentos': 'int64'},
+            quoting=csv.QUOTE_NONE, keep_default_na=False, encoding='utf-8',
+        )
+
+    def top(self, top_k: int = 30) -> list[tuple[str, int]]:
+        """
+        Retorna las top_k frases más frecuentes como lista de (frase, frecuencia),
+        en el mismo orden que top_ngramas (frecuencia descendente; empates en
+        orden alfabético). Se puede llamar varias veces y seguir agregando bloques.
+        """
+        minimo_documentos = self.min_df if isinstance(self.min_df, int) else self.min_df * self.documentos
+
+        candidatos = []
+        for i in range(self.particiones):
+            conteos = self._conteos_particion(i)
+            conteos = conteos[conteos['documentos'] >= minimo_documentos]
+            candidatos.extend(heapq.nsmallest(
+                top_k, zip(conteos.index, conteos['frecuencia'].tolist()),
+                key=lambda par: (-par[1], par[0]),
+            ))
+        return heapq.nsmallest(top_k, candidatos, key=lambda par: (-par[1], par[0]))
+
+
+def minar_ngramas(bloques, top_k: int = 30, **opciones) -> list[tuple[str, int]]:
+    """
+    Atajo: cuenta todos los bloques con un MinadorNgramas(**opciones) y retorna
+    las top_k frases como lista de (frase, frecuencia).
+    """
+    with MinadorNgramas(**opciones) as minador:
+        minador.agregar_bloques(bloques)
+        return minador.top(top_k)
+
+
+def exportar_abreviaciones(
+    pares,
+    ruta_salida: str,
+    categoria: str = 'candidatos',
+    ruta_base: str | None = RUTA_ABREVIACIONES,
+) -> int:
+    """
+    Escribe las frases de `pares` en el formato de abreviaciones.json
+    ({ categoria: [frases] }): se parte de las categorías de `ruta_base` (si
+    existe) y las frases que no están en ninguna categoría se agregan, en el
+    orden de `pares`, a la lista de `categoria`. Con ruta_salida == ruta_base
+    se actualiza el archivo en su lugar.
+
+    Retorna el número de frases agregadas.
+    """
+    categorias = {}
+    if ruta_base and os.path.exists(ruta_base):
+        with open(ruta_base, 'r', encoding='utf-8') as f:
+            categorias = json.load(f)
+
+    existentes = {frase for frases in categorias.values() for frase in frases}
+    nuevas = []
+    for par in pares:
+        frase = par[0] if isinstance(par, (tuple, list)) else par
+        if frase not in existentes:
+            existentes.add(frase)
+            nuevas.append(frase)
+
+    if nuevas:
+        categorias[categoria] = categorias.get(categoria, []) + nuevas
+    with open(ruta_salida, 'w', encoding='utf-8') as f:
+        json.dump(categorias, f, ensure_ascii=False, indent=4)
+    return len(nuevas)
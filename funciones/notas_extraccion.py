@@ -1,10 +1,21 @@
 #Se realiza la normalización de las notas obtenidas
 import re
 import pandas as pd
-from sklearn.feature_extraction.text import CountVectorizer
+
+try:
+    from reemplazo_frases import ReemplazadorFrases, PATRON_TOKENS, _FIN
+except ImportError:
+    from .reemplazo_frases import ReemplazadorFrases, PATRON_TOKENS, _FIN
 
 MOJIBAKE_RE = re.compile(r'[ÃÂ][\x80-\xBF]')  # típico: Ã± Ã¡ Ã© etc.
 
+# Patrones precompilados de normalizar_texto_es / normalizar_serie_es
+PATRON_FECHA = re.compile(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b')
+PATRON_HORA = re.compile(r'\b\d{1,2}:\d{2}(:\d{2})?\b')
+PATRON_PUNTUACION = re.compile(r'[^\w\s]+')
+PATRON_ESPACIOS = re.compile(r"\s+")
+PATRONES_NORMALIZACION = (MOJIBAKE_RE, PATRON_FECHA, PATRON_HORA, PATRON_PUNTUACION, PATRON_ESPACIOS)
+
 # Lista básica de stopwords en español
 STOP_WORDS_ES = [
     "de", "la", "que", "el", "en", "y", "a", "los", "del", "se", "las", "por", "un", "para", "con", "no", "una", 
@@ -13,53 +24,98 @@ STOP_WORDS_ES = [
     "todos", "uno", "les", "ni", "contra", "otros", "ese", "eso", "ante", "ellos", "e", "esto", "mi", "antes", "algunos", 
     "que", "unos", "yo", "otro", "otras", "otra", "el", "tú", "te", "ti"
 ]
+_STOP_WORDS_ES_SET = frozenset(STOP_WORDS_ES)
 
-def normalizar_texto_es(texto: object, keep_unk: bool = False, eliminar_stopwords: bool = False) -> str:
-    if pd.isna(texto):
-        return ""
 
-    s = str(texto)
+def _reparar_mojibake(s: str) -> str:
+    try:
+        return s.encode("latin1").decode("utf-8")
+    except (UnicodeEncodeError, UnicodeDecodeError):
+        return s
+
 
+def _normalizar_str(s: str, reemplazo_unk: str, eliminar_stopwords: bool) -> str:
+    """
+    Núcleo compartido por normalizar_texto_es y normalizar_serie_es.
+    Cada regex solo se ejecuta si el texto contiene el carácter que necesita.
+    """
     # 1) Repara mojibake solo si parece mojibake
     if MOJIBAKE_RE.search(s):
-        try:
-            s = s.encode("latin1").decode("utf-8")
-        except (UnicodeEncodeError, UnicodeDecodeError):
-            pass
+        s = _reparar_mojibake(s)
 
     # 2) Manejo del caracter de reemplazo
-    s = s.replace("\ufffd", " <unk> " if keep_unk else " ")
+    if "\ufffd" in s:
+        s = s.replace("\ufffd", reemplazo_unk)
 
     # 3) Normalización básica y minúsculas
     s = s.lower()
 
     # 4) Eliminar Fechas (formatos comunes: dd/mm/yyyy, dd-mm-yy)
     #    Busca patrones como 12/05/2023 o 12-05-23
-    s = re.sub(r'\b\d{1,2}[/-]\d{1,2}[/-]\d{2,4}\b', ' ', s)
+    if "/" in s or "-" in s:
+        s = PATRON_FECHA.sub(' ', s)
 
     # 5) Eliminar Horas (formatos: HH:MM, HH:MM:SS)
-    s = re.sub(r'\b\d{1,2}:\d{2}(:\d{2})?\b', ' ', s)
+    if ":" in s:
+        s = PATRON_HORA.sub(' ', s)
 
     # 6) Eliminar puntuación y símbolos, manteniendo números y letras
     #    Reemplazamos por espacio para evitar que "palabra.otra" se convierta en "palabraotra"
     #    o que "10.5" se convierta en "105" (ahora será "10 5")
-    s = re.sub(r'[^\w\s]', ' ', s)
+    s = PATRON_PUNTUACION.sub(' ', s)
 
-    # 7) Eliminar stopwords si se solicita
+    # 7) Eliminar stopwords si se solicita y limpieza final de espacios
+    #    (split/join equivale a sustituir \s+ por " " y aplicar strip)
+    tokens = s.split()
     if eliminar_stopwords:
-        tokens = s.split()
-        tokens = [t for t in tokens if t not in STOP_WORDS_ES]
-        s = " ".join(tokens)
+        tokens = [t for t in tokens if t not in _STOP_WORDS_ES_SET]
+    return " ".join(tokens)
 
-    # Limpieza final de espacios
-    s = re.sub(r"\s+", " ", s).strip()
-    return s
+
+def normalizar_texto_es(texto: object, keep_unk: bool = False, eliminar_stopwords: bool = False) -> str:
+    if pd.isna(texto):
+        return ""
+
+    return _normalizar_str(str(texto), " <unk> " if keep_unk else " ", eliminar_stopwords)
+
+
+def normalizar_serie_es(serie, keep_unk: bool = False, eliminar_stopwords: bool = False) -> pd.Series:
+    """
+    Versión por lotes de normalizar_texto_es sobre una Serie (o lista) completa.
+    Los nulos se detectan de forma vectorizada y cada texto distinto se normaliza
+    una sola vez con los patrones precompilados. El resultado es idéntico a
+    aplicar normalizar_texto_es elemento por elemento.
+    Retorna una Serie de strings con el mismo índice.
+    """
+    if not isinstance(serie, pd.Series):
+        serie = pd.Series(serie, dtype=object)
+
+    nulos = serie.isna().tolist()
+    reemplazo_unk = " <unk> " if keep_unk else " "
+    normalizar = _normalizar_str
+    vistos = {}
+
+    resultado = []
+    for valor, nulo in zip(serie.tolist(), nulos):
+        if nulo:
+            resultado.append("")
+            continue
+        texto = str(valor)
+        normalizado = vistos.get(texto)
+        if normalizado is None:
+            normalizado = vistos[texto] = normalizar(texto, reemplazo_unk, eliminar_stopwords)
+        resultado.append(normalizado)
+    return pd.Series(resultado, index=serie.index)
 
 def top_ngramas(textos, ngram_range=(2,4), min_df=10, top_k=30, usar_stopwords=True):
     """
     min_df: aparece al menos en min_df notas (no solo frecuencia total)
     usar_stopwords: si True, ignora las stopwords definidas en STOP_WORDS_ES al buscar frases
     """
+    # scikit-learn se importa solo aquí: el resto del módulo no lo necesita
+    # (para muchas notas, ver MinadorNgramas en minado_ngramas.py)
+    from sklearn.feature_extraction.text import CountVectorizer
+
     stop_words = STOP_WORDS_ES if usar_stopwords else None
     
     vec = CountVectorizer(
@@ -82,6 +138,7 @@ def top_ngramas(textos, ngram_range=(2,4), min_df=10, top_k=30, usar_stopwords=T
 
 
 def quitar_frases(texto: str, frases: list[str]) -> str:
+    # Para muchos textos: ColapsadorFrases.para_quitar(frases).aplicar(textos)
     s = texto
     # ordenar por longitud para quitar primero las frases largas
     for f in sorted(frases, key=len, reverse=True):
@@ -101,10 +158,117 @@ def generar_mapa_sustitucion(pares_ngramas, prefijo="TOKEN"):
     return mapa
 
 def colapsar_frases_a_tokens(texto: str, mapa: dict[str, str]) -> str:
+    # Para muchos textos: ColapsadorFrases(mapa).aplicar(textos)
     s = texto
     # Ordenar claves por longitud descendente es CRÍTICO para evitar reemplazos parciales incorrectos
     for frase, token in sorted(mapa.items(), key=lambda x: len(x[0]), reverse=True):
         # Usamos \b para límites de palabra, asumiendo que las frases son palabras completas
         s = re.sub(rf"\b{re.escape(frase)}\b", f" {token} ", s)
     s = re.sub(r"\s+", " ", s).strip()
-    return s
\ No newline at end of file
+    return s
+
+
+class ColapsadorFrases(ReemplazadorFrases):
+    """
+    Versión compilada de colapsar_frases_a_tokens / quitar_frases para
+    aplicarla sobre columnas completas de notas.
+
+    El trie de frases se construye una sola vez y cada texto se recorre una
+    sola vez: se buscan todas las coincidencias y se eligen como lo hacen las
+    funciones, que aplican las frases de la más larga a la más corta (empates
+    en el orden del mapa): una frase solo se reemplaza donde no se traslapa
+    con una de mayor prioridad ya reemplazada y, entre sus propias
+    coincidencias, de izquierda a derecha sin traslapes. Después se colapsan
+    los espacios. El resultado es el mismo que el de las funciones para
+    frases formadas por palabras separadas por espacios (como las de
+    top_ngramas).
+
+    Como las funciones, distingue mayúsculas y minúsculas.
+
+    Uso:
+        colapsador = ColapsadorFrases(generar_mapa_sustitucion(pares))
+        df['nota_tokens'] = colapsador.aplicar(df['nota_normalizada'])
+    """
+
+    def __init__(self, mapa: dict[str, str]):
+        # El reemplazo lleva espacios alrededor, igual que colapsar_frases_a_tokens
+        self._compilar({frase: f" {token} " for frase, token in mapa.items()})
+
+    @classmethod
+    def para_quitar(cls, frases: list[str]) -> "ColapsadorFrases":
+        """Colapsador que elimina las frases, como quitar_frases."""
+        colapsador = cls.__new__(cls)
+        colapsador._compilar(dict.fromkeys(frases, " "))
+        return colapsador
+
+    def _compilar(self, reemplazos: dict[str, str]) -> None:
+        super().__init__(reemplazos, ignorar_mayusculas=False)
+        # Mismo orden en que las funciones aplican las frases
+        orden = sorted(self.mapa, key=len, reverse=True)
+        self._prioridad = {frase: k for k, frase in enumerate(orden)}
+
+    def reemplazar(self, texto: str) -> str:
+        """
+        Equivale a colapsar_frases_a_tokens(texto, mapa) (o a quitar_frases).
+        """
+        claves = PATRON_TOKENS.findall(texto)
+        raiz = self._raiz
+        if raiz.keys().isdisjoint(claves):
+            return PATRON_ESPACIOS.sub(" ", texto).strip()
+
+        # Todas las coincidencias (no solo la más larga) en cada posición
+        n = len(claves)
+        coincidencias = []
+        for i in [k for k, clave in enumerate(claves) if clave in raiz]:
+            nodo = raiz[claves[i]]
+            j = i
+            while True:
+                fin = nodo.get(_FIN)
+                if fin is not None:
+                    rep, exige_previo, exige_siguiente = fin
+                    if (not exige_previo or i > 0) and (not exige_siguiente or j + 1 < n):
+                        frase = "".join(claves[i:j + 1])
+                        coincidencias.append((self._prioridad[frase], i, j, rep))
+                j += 1
+                if j >= n:
+                    break
+                nodo = nodo.get(claves[j])
+                if nodo is None:
+                    break
+
+        # Por prioridad de frase y de izquierda a derecha, sin traslapes
+        ocupado = bytearray(n)
+        elegidas = []
+        for _, i, j, rep in sorted(coincidencias):
+            if any(ocupado[i:j + 1]):
+                continue
+            ocupado[i:j + 1] = b"\x01" * (j + 1 - i)
+            elegidas.append((i, j, rep))
+
+        salida = []
+        ultimo = 0
+        for i, j, rep in sorted(elegidas):
+            salida.extend(claves[ultimo:i])
+            salida.append(rep)
+            ultimo = j + 1
+        salida.extend(claves[ultimo:])
+        return PATRON_ESPACIOS.sub(" ", "".join(salida)).strip()
+
+    def aplicar(self, textos):
+        """
+        Aplica el colapsador a una Serie o lista de textos; cada texto distinto
+        se procesa una sola vez. Retorna una Serie con el mismo índice (o una
+        lista si se pasó una lista).
+        """
+        valores = textos.tolist() if isinstance(textos, pd.Series) else list(textos)
+        reemplazar = self.reemplazar
+        vistos = {}
+        resultado = []
+        for texto in valores:
+            colapsado = vistos.get(texto)
+            if colapsado is None:
+                colapsado = vistos[texto] = reemplazar(texto)
+            resultado.append(colapsado)
+        if isinstance(textos, pd.Series):
+            return pd.Series(resultado, index=textos.index)
+        return resultado
@@ -1,6 +1,23 @@
 import pandas as pd
-import networkx as nx
+import numpy as np
 import ast
+import re
+from datetime import date
+
+try:
+    from formatos_tabla import fechas_a_texto, leer_tabla
+    from lectura_reporte import FORMATO_FECHA
+    from relaciones_folios import ArregloFolios
+except ImportError:
+    from .formatos_tabla import fechas_a_texto, leer_tabla
+    from .lectura_reporte import FORMATO_FECHA
+    from .relaciones_folios import ArregloFolios
+
+# Columnas de relación que generan aristas entre folios
+COLUMNAS_RELACION = ['Divididos', 'folios_ligados', 'referencia_folio']
+
+# Columnas del reporte procesado que usa resumir_grupos además de 'Folio' y 'cancelados'
+COLUMNAS_RESUMEN = ['Fecha', 'Hora de Recibido', 'comisaria']
 
 def limpiar_foliostr(val):
     """
@@ -19,7 +36,11 @@ def parsear_lista_string(val):
     Parsea una cadena que representa una lista de python o una cadena separada por comas.
     Ej: "['123', '456']" -> ['123', '456']
     Ej: "123, 456" -> ['123', '456']
+    Las listas ya construidas en memoria (o leídas de Parquet/Feather) se
+    normalizan sin pasar por texto.
     """
+    if isinstance(val, (list, tuple, np.ndarray)):
+        return [str(x).strip() for x in val if str(x).strip()]
     if pd.isna(val):
         return []
     
@@ -41,11 +62,112 @@ def parsear_lista_string(val):
     items = [x.strip() for x in val_str.replace('[', '').replace(']', '').replace("'", "").split(',')]
     return [x for x in items if x]
 
+# Celdas de texto que el parser vectorizado resuelve igual que parsear_lista_string:
+# listas con elementos entre comillas simples (sin comas, corchetes ni escapes
+# dentro) o dígitos sueltos, y listas separadas por comas sin comillas ni corchetes.
+_PATRON_ELEMENTO = r"\s*(?:'[^'\\,\[\]]*'|[\d\s]*)\s*"
+PATRON_LISTA_SIMPLE = re.compile(
+    r"\[" + _PATRON_ELEMENTO + r"(?:," + _PATRON_ELEMENTO + r")*\]"
+    r"|[^'\"\[\]\\]*"
+)
+
+
+def _parsear_texto_lista(val_str):
+    """
+    parsear_lista_string para una celda de texto ya recortada y no vacía,
+    sin ast.literal_eval cuando la celda tiene la forma simple habitual.
+    """
+    if PATRON_LISTA_SIMPLE.fullmatch(val_str):
+        if val_str[0] == '[':
+            val_str = val_str[1:-1]
+        items = (x.strip().strip("'").strip() for x in val_str.split(','))
+        return [x for x in items if x]
+    return parsear_lista_string(val_str)
+
+
+def explotar_listas(serie):
+    """
+    Versión por columna de parsear_lista_string: devuelve una Serie con un
+    elemento por fila, cuyo índice es la posición (0..n-1) de la celda de origen.
+
+    - Columnas ArregloFolios (salida de procesar_notas_masivo): se leen directo
+      de sus arreglos, sin armar listas.
+    - Celdas con listas/tuplas/arreglos en memoria: se expanden directamente, sin pasar por texto.
+    - Celdas de texto (p. ej. al leer un CSV): las vacías ('', 'nan', '[]') se
+      descartan en bloque y el resto se parsea sin ast.literal_eval salvo en
+      formas poco comunes.
+    """
+    if isinstance(serie.array, ArregloFolios):
+        return serie.array.explotar()
+
+    valores = pd.Series(serie.to_numpy(dtype=object), dtype=object)
+    tipos = valores.map(type)
+    partes = []
+
+    # --- Listas en memoria ---
+    es_lista = tipos.isin([list, tuple, np.ndarray])
+    if es_lista.any():
+        listas = valores[es_lista]
+        listas = listas[listas.map(len) > 0]
+        partes.append(listas.explode().map(str).str.strip())
+
+    # --- Texto y otros escalares no nulos ---
+    otros = ~es_lista & valores.notna()
+    if otros.any():
+        candidatas = valores[otros]
+        candidatas = candidatas[~candidatas.isin(['', 'nan', '[]'])]
+        posiciones, elementos = [], []
+        for posicion, val in zip(candidatas.index.tolist(), candidatas.tolist()):
+            if type(val) is str:
+                val_str = val.strip()
+                if not val_str or val_str == 'nan' or val_str == '[]':
+                    continue
+                items = _parsear_texto_lista(val_str)
+            else:
+                items = parsear_lista_string(val)
+            posiciones.extend([posicion] * len(items))
+            elementos.extend(items)
+        partes.append(pd.Series(elementos, index=posiciones, dtype=object))
+
+    if not partes:
+        return pd.Series([], dtype=object)
+
+    elementos = pd.concat(partes).astype(object)
+    elementos = elementos[elementos != '']
+    return elementos.sort_index(kind='stable')
+
+
+def parsear_columna_lista(serie):
+    """
+    Convierte una columna de listas serializadas (p. ej. leída de un CSV) en una
+    columna de listas de Python, con el mismo resultado que aplicar
+    parsear_lista_string celda por celda.
+    """
+    elementos = explotar_listas(serie)
+    resultado = [[] for _ in range(len(serie))]
+    for posicion, elemento in zip(elementos.index.tolist(), elementos.tolist()):
+        resultado[posicion].append(elemento)
+    return pd.Series(resultado, index=serie.index, dtype=object)
+
+
+def leer_relaciones(ruta, formato=None):
+    """
+    Lee de un reporte procesado (CSV, Parquet o Feather) solo las columnas que
+    usa la etapa de grafo: 'Folio', las de COLUMNAS_RELACION y 'cancelados'.
+    """
+    return leer_tabla(ruta, columnas=['Folio', *COLUMNAS_RELACION, 'cancelados'], formato=formato)
+
+
 def construir_grafo(df):
     """
     Construye un grafo de relaciones entre folios.
     Retorna el grafo NetworkX y un diccionario de {folio: grupo_id}.
+
+    Solo es necesario si se quiere el objeto grafo; para obtener los grupos
+    de folios usar calcular_componentes, que no depende de networkx.
     """
+    import networkx as nx
+
     G = nx.Graph()
     
     # Asegurar que todos los folios existan como nodos
@@ -57,7 +179,7 @@ def construir_grafo(df):
                 G.add_node(folio_limpio)
     
     # Columnas de relación
-    cols_relacion = ['Divididos', 'folios_ligados', 'referencia_folio']
+    cols_relacion = COLUMNAS_RELACION
     
     for idx, row in df.iterrows():
         folio_origen = limpiar_foliostr(row.get('Folio'))
@@ -82,7 +204,10 @@ def analizar_componentes(G):
     """
     Analiza las componentes conectadas del grafo.
     Retorna un DataFrame con columnas: [Folio, Grupo_ID, Tamano_Grupo]
+    (se indexa por grupo con IndiceComponentes.desde_grupos).
     """
+    import networkx as nx
+
     componentes = list(nx.connected_components(G))
     data = []
     
@@ -98,6 +223,373 @@ def analizar_componentes(G):
             
     return pd.DataFrame(data)
 
+def _folios_como_texto(serie):
+    """
+    Equivalente por columna de limpiar_foliostr: str(valor).strip(), con None
+    para nulos, vacíos y 'nan'. Retorna una Serie de dtype object.
+    """
+    if pd.api.types.is_integer_dtype(serie.dtype) and not serie.hasnans:
+        # Enteros sin nulos: str() ya es el folio limpio
+        return pd.Series(serie.astype(str).to_numpy(dtype=object), index=serie.index, dtype=object)
+
+    def limpiar(valor):
+        val_str = str(valor).strip()
+        if val_str == '' or val_str.lower() == 'nan':
+            return None
+        return val_str
+
+    nulos = serie.isna().tolist()
+    texto = [None if nulo else limpiar(v) for v, nulo in zip(serie.tolist(), nulos)]
+    return pd.Series(texto, index=serie.index, dtype=object)
+
+
+def _aristas(df):
+    """
+    Reúne las aristas (folio_origen, folio_destino) de las columnas de relación
+    como dos arreglos de strings alineados. Omite autoenlaces y destinos vacíos.
+    """
+    origen = _folios_como_texto(df['Folio']).to_numpy()
+    origenes, destinos = [], []
+
+    for col in COLUMNAS_RELACION:
+        if col not in df.columns:
+            continue
+        explotada = explotar_listas(df[col])
+        if explotada.empty:
+            continue
+        destino = _folios_como_texto(explotada).to_numpy()
+        orig = origen[explotada.index.to_numpy()]
+        validas = pd.notna(orig) & pd.notna(destino) & (orig != destino)
+        origenes.append(orig[validas])
+        destinos.append(destino[validas])
+
+    if not origenes:
+        vacio = np.array([], dtype=object)
+        return vacio, vacio
+    return np.concatenate(origenes), np.concatenate(destinos)
+
+
+def _union_find(n, u, v):
+    """
+    Componentes conectadas sobre nodos 0..n-1 con aristas (u[i], v[i]).
+
+    Union-find vectorizado: en cada ronda cada raíz se cuelga de la raíz menor
+    con la que comparte una arista y luego se comprimen los caminos (salto de
+    punteros) hasta que cada nodo apunta directo a su raíz. Las aristas que ya
+    quedaron dentro de una misma componente se descartan en cada ronda.
+
+    Retorna un arreglo donde cada nodo tiene el id mínimo de su componente.
+    """
+    padre = np.arange(n, dtype=np.int64)
+    while len(u):
+        pu = padre[u]
+        pv = padre[v]
+        activas = pu != pv
+        if not activas.any():
+            break
+        u, v, pu, pv = u[activas], v[activas], pu[activas], pv[activas]
+        np.minimum.at(padre, np.maximum(pu, pv), np.minimum(pu, pv))
+        while True:
+            abuelo = padre[padre]
+            if np.array_equal(abuelo, padre):
+                break
+            padre = abuelo
+    return padre
+
+
+class UnionFindFolios:
+    """
+    Union-find incremental de folios para el modo en flujo: los registros
+    llegan de a uno o en lotes chicos y los grupos se actualizan sin volver a
+    recorrer lo anterior (unión por tamaño y compresión de caminos; cada
+    operación cuesta prácticamente O(1)).
+
+    El grupo de un folio se identifica por el primer folio que se vio de ese
+    grupo; si dos grupos se fusionan queda el del más antiguo. La memoria
+    crece con el número de folios distintos vistos.
+    """
+
+    def __init__(self):
+        self._padre = {}
+        self._tamano = {}      # solo raíces
+        self._primero = {}     # raíz -> (orden de aparición, folio) del folio más antiguo del grupo
+
+    def __len__(self) -> int:
+        return len(self._padre)
+
+    def _agregar(self, folio: str) -> None:
+        if folio not in self._padre:
+            self._padre[folio] = folio
+            self._tamano[folio] = 1
+            self._primero[folio] = (len(self._padre), folio)
+
+    def raiz(self, folio: str) -> str:
+        padre = self._padre
+        while padre[folio] != folio:
+            # Compresión por mitades: cada nodo del camino salta a su abuelo
+            padre[folio] = padre[padre[folio]]
+            folio = padre[folio]
+        return folio
+
+    def unir(self, a: str, b: str) -> None:
+        self._agregar(a)
+        self._agregar(b)
+        ra, rb = self.raiz(a), self.raiz(b)
+        if ra == rb:
+            return
+        if self._tamano[ra] < self._tamano[rb]:
+            ra, rb = rb, ra
+        self._padre[rb] = ra
+        self._tamano[ra] += self._tamano.pop(rb)
+        self._primero[ra] = min(self._primero[ra], self._primero.pop(rb))
+
+    def agregar_registro(self, folio, relacionados) -> None:
+        """
+        Agrega un folio y sus aristas hacia los folios de `relacionados`
+        (iterable de listas, como las de COLUMNAS_RELACION). Se omiten folios
+        vacíos y autoenlaces, igual que en _aristas. Si algún valor no se puede
+        interpretar se lanza la excepción sin haber modificado nada.
+        """
+        origen = limpiar_foliostr(folio)
+        if not origen:
+            return
+        # Se resuelven todos los destinos antes de modificar la estructura
+        destinos = [
+            destino for lista in relacionados
+            for destino in map(limpiar_foliostr, parsear_lista_string(lista))
+            if destino and destino != origen
+        ]
+        self._agregar(origen)
+        for destino in destinos:
+            self.unir(origen, destino)
+
+    def grupo(self, folio) -> tuple[str | None, int]:
+        """(folio que identifica al grupo, tamaño del grupo); (None, 0) si el folio no se ha visto."""
+        folio = limpiar_foliostr(folio)
+        if not folio or folio not in self._padre:
+            return None, 0
+        raiz = self.raiz(folio)
+        return self._primero[raiz][1], self._tamano[raiz]
+
+
+def calcular_componentes(df):
+    """
+    Calcula los grupos de folios relacionados sin construir un grafo NetworkX.
+
+    Los folios se codifican como enteros int64 (en orden de primera aparición),
+    las aristas de 'Divididos', 'folios_ligados' y 'referencia_folio' se reúnen
+    en arreglos NumPy y las componentes se obtienen con union-find.
+
+    Retorna el mismo DataFrame que analizar_componentes(construir_grafo(df)):
+    columnas [Folio, Grupo_ID, Tamano_Grupo], con los grupos numerados en el
+    mismo orden y los folios ordenados por grupo. Para consultar los miembros
+    de un grupo sin recorrer el DataFrame, ver IndiceComponentes.
+    """
+    if 'Folio' in df.columns:
+        folios = _folios_como_texto(df['Folio']).dropna().to_numpy()
+        origenes, destinos = _aristas(df)
+    else:
+        folios = origenes = destinos = np.array([], dtype=object)
+
+    # Codificación de nodos: los folios del reporte primero, en orden de aparición,
+    # igual que la inserción de nodos en construir_grafo
+    nodos = np.concatenate([folios, origenes, destinos])
+    if len(nodos) == 0:
+        return pd.DataFrame(columns=['Folio', 'Grupo_ID', 'Tamano_Grupo'])
+    codigos, etiquetas = pd.factorize(nodos)
+    n_aristas = len(origenes)
+    inicio = len(folios)
+    u = codigos[inicio:inicio + n_aristas].astype(np.int64)
+    v = codigos[inicio + n_aristas:].astype(np.int64)
+
+    raiz = _union_find(len(etiquetas), u, v)
+
+    # Grupo_ID por orden del nodo mínimo de cada componente (como nx.connected_components)
+    _, grupo = np.unique(raiz, return_inverse=True)
+    tamanos = np.bincount(grupo)
+    orden = np.argsort(grupo, kind='stable')
+
+    return pd.DataFrame({
+        'Folio': np.asarray(etiquetas, dtype=object)[orden],
+        'Grupo_ID': grupo[orden] + 1,
+        'Tamano_Grupo': tamanos[grupo[orden]],
+    })
+
+
+class IndiceComponentes:
+    """
+    Índice de los grupos de folios de analizar_componentes / calcular_componentes
+    (o de AlmacenRelaciones.componentes), en formato CSR: los folios ordenados
+    por grupo en un solo arreglo y los offsets de cada grupo, donde los
+    miembros del grupo en la posición k son folios[offsets[k]:offsets[k + 1]].
+
+    - ids:          Grupo_ID de cada posición, en orden ascendente.
+    - tamano_grupo: Tamano_Grupo de cada grupo, tal como viene en df_grupos
+                    (con almacén es el tamaño acumulado, no solo el del reporte).
+
+    miembros(grupo_id) cuesta O(log grupos + tamaño del grupo), sin recorrer
+    el DataFrame de grupos.
+    """
+
+    def __init__(self, ids, offsets, folios, tamano_grupo):
+        self.ids = np.asarray(ids, dtype=np.int64)
+        self.offsets = np.asarray(offsets, dtype=np.int64)
+        self.folios = np.asarray(folios, dtype=object)
+        self.tamano_grupo = np.asarray(tamano_grupo, dtype=np.int64)
+        self._posicion_folio = None
+
+    @classmethod
+    def desde_grupos(cls, df_grupos) -> "IndiceComponentes":
+        """Construye el índice a partir de un DataFrame [Folio, Grupo_ID, Tamano_Grupo]."""
+        grupo = df_grupos['Grupo_ID'].to_numpy(dtype=np.int64)
+        ids, codigos = np.unique(grupo, return_inverse=True)
+        orden = np.argsort(codigos, kind='stable')
+        offsets = np.zeros(len(ids) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(codigos, minlength=len(ids)), out=offsets[1:])
+        folios = df_grupos['Folio']
+        # Los grupos ya traen los folios limpios como texto; solo se convierten si son enteros
+        if pd.api.types.is_integer_dtype(folios.dtype):
+            folios = _folios_como_texto(folios)
+        folios = folios.to_numpy(dtype=object)[orden]
+        tamano = df_grupos['Tamano_Grupo'].to_numpy(dtype=np.int64)[orden][offsets[:-1]]
+        return cls(ids, offsets, folios, tamano)
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def miembros(self, grupo_id: int) -> np.ndarray:
+        """Folios del grupo `grupo_id` (vista del arreglo ordenado)."""
+        k = np.searchsorted(self.ids, grupo_id)
+        if k == len(self.ids) or self.ids[k] != grupo_id:
+            raise KeyError(f"Grupo_ID inexistente: {grupo_id}")
+        return self.folios[self.offsets[k]:self.offsets[k + 1]]
+
+    def posiciones(self, folios) -> np.ndarray:
+        """
+        Posición en el índice (0..len-1) del grupo de cada folio de `folios`
+        (Serie), o -1 si el folio no está en ningún grupo.
+        """
+        if self._posicion_folio is None:
+            self._posicion_folio = pd.Index(self.folios)
+        posicion = self._posicion_folio.get_indexer(_folios_como_texto(folios))
+        grupo = np.searchsorted(self.offsets, posicion, side='right') - 1
+        return np.where(posicion >= 0, grupo, -1)
+
+
+def _con_cancelado(cancelados) -> np.ndarray:
+    # Máscara de las filas con al menos un folio cancelado
+    if isinstance(cancelados.array, ArregloFolios):
+        return cancelados.array.con_elementos()
+    con_cancelado = np.zeros(len(cancelados), dtype=bool)
+    con_cancelado[explotar_listas(cancelados).index.unique()] = True
+    return con_cancelado
+
+
+def _instantes_recibido(df) -> np.ndarray:
+    # Fecha + Hora de Recibido de cada fila como datetime64[ns]; NaT si falta alguna
+    if 'Fecha' not in df.columns or 'Hora de Recibido' not in df.columns:
+        return np.full(len(df), np.datetime64('NaT'), dtype='datetime64[ns]')
+    fecha = df['Fecha']
+    if not pd.api.types.is_datetime64_any_dtype(fecha.dtype):
+        # Columna que quedó como texto (valores fuera de formato) u object con
+        # fechas y texto mezclados: el texto se lee con FORMATO_FECHA y los
+        # valores que ya son fechas se conservan
+        es_texto = fecha.map(lambda v: isinstance(v, str)).to_numpy(dtype=bool)
+        es_fecha = fecha.map(lambda v: isinstance(v, (date, np.datetime64))).to_numpy(dtype=bool)
+        texto = pd.to_datetime(fecha.where(es_texto), format=FORMATO_FECHA, errors='coerce')
+        if es_fecha.any():
+            texto = texto.where(~es_fecha, pd.to_datetime(fecha.where(es_fecha), errors='coerce'))
+        fecha = texto
+    hora = df['Hora de Recibido']
+    if not pd.api.types.is_timedelta64_dtype(hora.dtype):
+        hora = pd.to_timedelta(hora.astype(str).where(hora.notna()), errors='coerce')
+    return (fecha + hora).to_numpy(dtype='datetime64[ns]')
+
+
+def resumir_grupos(df_original, indice: IndiceComponentes) -> pd.DataFrame:
+    """
+    Resumen por grupo de folios, calculado en una sola pasada vectorizada sobre
+    las filas de df_original (sin groupby):
+
+    - Grupo_ID, Tamano_Grupo: del índice.
+    - Filas:        filas de df_original cuyo folio está en el grupo.
+    - Cancelados:   de esas filas, cuántas tienen al menos un folio en 'cancelados'.
+    - Fecha_Inicio / Hora_Inicio, Fecha_Fin / Hora_Fin: primera y última
+                    'Fecha' + 'Hora de Recibido' del grupo (vacías si ninguna
+                    fila las tiene).
+    - Comisarias:   número de valores distintos de 'comisaria' (sin nulos).
+
+    Las filas van en el orden de indice.ids. Las columnas de df_original que
+    falten se tratan como vacías.
+    """
+    g = len(indice)
+    if 'Folio' in df_original.columns:
+        codigo = indice.posiciones(df_original['Folio'])
+    else:
+        codigo = np.full(len(df_original), -1)
+    validas = codigo >= 0
+    grupos = codigo[validas]
+
+    filas = np.bincount(grupos, minlength=g)
+    if 'cancelados' in df_original.columns:
+        cancelados = np.bincount(grupos, weights=_con_cancelado(df_original['cancelados'])[validas], minlength=g)
+    else:
+        cancelados = np.zeros(g)
+
+    # Primera y última recepción: mínimo y máximo por grupo sobre los instantes en ns
+    instantes = _instantes_recibido(df_original)[validas]
+    con_instante = ~np.isnat(instantes)
+    ns = instantes[con_instante].view(np.int64)
+    inicio = np.full(g, np.iinfo(np.int64).max)
+    fin = np.full(g, np.iinfo(np.int64).min)
+    np.minimum.at(inicio, grupos[con_instante], ns)
+    np.maximum.at(fin, grupos[con_instante], ns)
+    sin_instante = np.bincount(grupos[con_instante], minlength=g) == 0
+    inicio[sin_instante] = fin[sin_instante] = np.datetime64('NaT', 'ns').view(np.int64)
+    inicio = pd.Series(inicio.view('datetime64[ns]'))
+    fin = pd.Series(fin.view('datetime64[ns]'))
+
+    # Comisarías distintas: pares (grupo, comisaría) únicos contados por grupo
+    comisarias = np.zeros(g, dtype=np.int64)
+    if 'comisaria' in df_original.columns:
+        codigos_comisaria, categorias = pd.factorize(df_original['comisaria'].to_numpy()[validas])
+        con_comisaria = codigos_comisaria >= 0
+        pares = np.unique(grupos[con_comisaria] * max(len(categorias), 1) + codigos_comisaria[con_comisaria])
+        comisarias = np.bincount(pares // max(len(categorias), 1), minlength=g)
+
+    return pd.DataFrame({
+        'Grupo_ID': indice.ids,
+        'Tamano_Grupo': indice.tamano_grupo,
+        'Filas': filas,
+        'Cancelados': cancelados.astype(np.int64),
+        'Fecha_Inicio': inicio.dt.normalize(),
+        'Hora_Inicio': inicio - inicio.dt.normalize(),
+        'Fecha_Fin': fin.dt.normalize(),
+        'Hora_Fin': fin - fin.dt.normalize(),
+        'Comisarias': comisarias,
+    })
+
+
+def _asignar_grupos(df_original, df_grupos):
+    """
+    Busca el grupo de cada fila de df_original por su folio, sin hacer merge.
+    Retorna (folio_key, grupo_id, tamano_grupo) como arreglos alineados con las
+    filas; grupo_id y tamano_grupo son float con NaN si algún folio no tiene grupo.
+    """
+    folio_key = _folios_como_texto(df_original['Folio'])
+    claves_grupos = pd.Index(_folios_como_texto(df_grupos['Folio']))
+    posicion = claves_grupos.get_indexer(folio_key)
+    encontrado = posicion >= 0
+
+    grupo_id = df_grupos['Grupo_ID'].to_numpy()[posicion]
+    tamano = df_grupos['Tamano_Grupo'].to_numpy()[posicion]
+    if not encontrado.all():
+        grupo_id = np.where(encontrado, grupo_id, np.nan)
+        tamano = np.where(encontrado, tamano, np.nan)
+
+    return folio_key.to_numpy(), grupo_id, tamano
+
+
 def separar_folios_cancelados(
     df_original,
     df_grupos,
@@ -108,73 +600,51 @@ def separar_folios_cancelados(
     """
     Separa los folios cancelados que están aislados (Tamano_Grupo == 1).
     Genera los 3 archivos de salida.
+
+    Criterio de separación (ambos):
+    1. 'cancelados' tiene al menos un folio.
+    2. Tamano_Grupo == 1, o el folio no está en df_grupos (se asume aislado).
+
+    Retorna (df_cancelados, df_limpio): las filas de df_original de cada partición
+    con las columnas auxiliares Folio_Key, Grupo_ID y Tamano_Grupo. El índice es
+    la posición de la fila en df_original. Los archivos de cancelados y limpio
+    se guardan sin las columnas auxiliares.
     """
-    # Unir información de grupos al DF original
-    # Asegurar tipos
-    df = df_original.copy()
-    
-    # Normalizar columna Folio para el merge
-    df['Folio_Key'] = df['Folio'].apply(limpiar_foliostr)
-    df_grupos['Folio_Key'] = df_grupos['Folio'].apply(limpiar_foliostr)
-    
-    # Merge left para conservar todos los del reporte original
-    df_merged = pd.merge(df, df_grupos[['Folio_Key', 'Grupo_ID', 'Tamano_Grupo']], 
-                         left_on='Folio_Key', right_on='Folio_Key', how='left')
-    
+    folio_key, grupo_id, tamano = _asignar_grupos(df_original, df_grupos)
+
     # Guardar reporte de relaciones completo si se solicita
     if output_relaciones:
-        df_grupos.to_csv(output_relaciones, index=False, encoding='utf-8-sig')
+        df_grupos.assign(Folio_Key=_folios_como_texto(df_grupos['Folio'])).to_csv(
+            output_relaciones, index=False, encoding='utf-8-sig'
+        )
         print(f"Reporte de relaciones guardado en: {output_relaciones}")
 
-    # Criterio de separación:
-    # 1. Cancelado NO nulo/vacío
-    # 2. Tamano_Grupo == 1 (o nulo, si no estaba en el grafo, pero debería estar si venía en el df original)
-    #    Nota: Si Tamano_Grupo es NaN, significa que no se procesó en el grafo, asumimos aislado.
-    
-    def es_cancelado_valido(val):
-        parsed = parsear_lista_string(val)
-        return len(parsed) > 0
+    # Máscara vectorizada: filas con al menos un cancelado y grupo aislado
+    con_cancelado = _con_cancelado(df_original['cancelados'])
+    aislado = (tamano == 1) | pd.isna(tamano)
+    a_separar = con_cancelado & aislado
 
-    mask_cancelado = df_merged['cancelados'].apply(es_cancelado_valido)
-    mask_aislado = (df_merged['Tamano_Grupo'] == 1) | (df_merged['Tamano_Grupo'].isna())
-    
-    # Folios a separar (Cancelados Y Aislados)
-    folios_a_separar_mask = mask_cancelado & mask_aislado
-    
-    df_cancelados = df_merged[folios_a_separar_mask].copy()
-    df_limpio = df_merged[~folios_a_separar_mask].copy()
-    
-    # Limpieza de columnas auxiliares antes de guardar
-    cols_to_drop = ['Folio_Key', 'Grupo_ID', 'Tamano_Grupo']
-    df_cancelados_out = df_cancelados.drop(columns=cols_to_drop, errors='ignore')
-    # Para el limpio, tal vez quieran conservar el Grupo? El usuario pidió separar, no modificar el schema del limpio.
-    # Mantendremos el schema original para el limpio para evitar problemas downstream, 
-    # a menos que se pida explícitamente.
-    # El usuario dijo: "Genera una funciòn... sepraralos de los demas". 
-    # Generalmente se espera el mismo formato de entrada.
-    df_limpio_out = df_limpio.drop(columns=cols_to_drop, errors='ignore')
-    
-    # Guardar cancelados
-    # Solo columnas relevantes o todas? "sepraralos de los demas" sugiere mover la fila entera.
-    # El ejemplo anterior del usuario mostraba solo la columna Folio en el csv de salida de cancelados.
-    # Vamos a guardar TODO el registro en el archivo de cancelados por seguridad, 
-    # y también un archivo solo con folios si es necesario (el previo script hacia eso).
-    # Revisando el script anterior 'Folios_cancelados.py', guardaba solo la columna Folio.
-    # Haremos eso para cumplir con la expectativa previa de formato si es posible, 
-    # pero el usuario pidió "sepraralos", que puede implicar las filas enteras.
-    # Ante la duda, guardaré el DF completo en cancelados, ya que contiene la info de por qué se canceló.
-    # PERO, el script previo 'Folios_cancelados.py' producia 'folios_cancelados_sin_relacion.csv' con SOLO la columna Folio.
-    # Voy a mantener ese comportamiento para la columna Folio, pero añadiré las demás columnas por utilidad,
-    # o mejor, si el usuario quiere re-integrar, dejarlo completo.
-    # Voy a guardar completo.
-    
+    def particion(posiciones):
+        # take() copia solo las filas de la partición
+        parte = df_original.take(posiciones)
+        parte.index = pd.RangeIndex(len(df_original))[posiciones]
+        parte['Folio_Key'] = folio_key[posiciones]
+        parte['Grupo_ID'] = grupo_id[posiciones]
+        parte['Tamano_Grupo'] = tamano[posiciones]
+        return parte
+
+    df_cancelados = particion(np.flatnonzero(a_separar))
+    df_limpio = particion(np.flatnonzero(~a_separar))
+
+    # Se guarda el registro completo (sin columnas auxiliares) en ambos archivos
+    columnas_salida = list(df_original.columns)
     if output_cancelados:
-        df_cancelados_out.to_csv(output_cancelados, index=False, encoding='utf-8-sig')
+        fechas_a_texto(df_cancelados[columnas_salida]).to_csv(output_cancelados, index=False, encoding='utf-8-sig')
     if output_limpio:
-        df_limpio_out.to_csv(output_limpio, index=False, encoding='utf-8-sig')
-    
-    print(f"Total registros originales: {len(df)}")
+        fechas_a_texto(df_limpio[columnas_salida]).to_csv(output_limpio, index=False, encoding='utf-8-sig')
+
+    print(f"Total registros originales: {len(df_original)}")
     print(f"Cancelados aislados separados: {len(df_cancelados)}")
     print(f"Registros restantes limpios: {len(df_limpio)}")
-    
+
     return df_cancelados, df_limpio
@@ -1,9 +1,28 @@
+import numpy as np
 import pandas as pd
 import re
 import json
 import os
-
-# 1. Compilación de Regex Global (se hace una sola vez al importar el módulo)
+import atexit
+import threading
+import hashlib
+from concurrent.futures import ProcessPoolExecutor
+
+from itertools import repeat
+
+try:
+    from reemplazo_frases import ReemplazadorFrases
+    from notas_extraccion import _normalizar_str, PATRONES_NORMALIZACION
+    from cache_notas import CacheNotas
+    from relaciones_folios import ArregloFolios
+except ImportError:
+    from .reemplazo_frases import ReemplazadorFrases
+    from .notas_extraccion import _normalizar_str, PATRONES_NORMALIZACION
+    from .cache_notas import CacheNotas
+    from .relaciones_folios import ArregloFolios
+
+# 1. Compilación de Regex Global (se hace una sola vez al importar el módulo;
+#    las abreviaciones se cargan al primer uso, ver obtener_abreviaciones)
 
 PATRON_DIVIDIO = re.compile(
     r"(?:El incidente |Folio )?(\d+)\s+se dividio\s+(?:a|al folio)\s+(\d+)(?:.*?por ([\w\d() ]+))?",
@@ -27,6 +46,25 @@ PATRON_REFERENCIA = re.compile(
 
 PATRON_ESPACIOS = re.compile(r'\s+')
 
+# Palabra clave que cada patrón de relación necesita para poder coincidir.
+# Se usan para descartar en bloque las notas que no mencionan ninguna relación.
+CLAVE_DIVIDIO    = re.compile(r"dividio", re.IGNORECASE)
+CLAVE_LIGADO     = re.compile(r"ligado", re.IGNORECASE)
+CLAVE_CANCELADO  = re.compile(r"cancelado", re.IGNORECASE)
+CLAVE_REFERENCIA = re.compile(r"referencia", re.IGNORECASE)
+
+MARCA_DIVIDIO    = 1
+MARCA_LIGADO     = 2
+MARCA_CANCELADO  = 4
+MARCA_REFERENCIA = 8
+
+CLAVES_RELACION = (
+    (MARCA_DIVIDIO,    CLAVE_DIVIDIO),
+    (MARCA_LIGADO,     CLAVE_LIGADO),
+    (MARCA_CANCELADO,  CLAVE_CANCELADO),
+    (MARCA_REFERENCIA, CLAVE_REFERENCIA),
+)
+
 
 # --- HELPERS DE FORMATO ---
 
@@ -95,23 +133,21 @@ def _deduplicar_entre_columnas(
 RUTA_ABREVIACIONES = os.path.join(os.path.dirname(__file__), 'abreviaciones.json')
 
 
-def cargar_y_compilar_abreviaciones(ruta_json):
+def cargar_abreviaciones(ruta_json) -> dict[str, str]:
     """
-    Carga el JSON de abreviaciones, aplana la estructura y compila una regex optimizada.
-    Retorna:
-    - mapa_reemplazos: dict { "frase": "reemplazo", ... }
-    - patron_regex: objeto re.Pattern para hacer todas las sustituciones
+    Carga el JSON de abreviaciones y aplana la estructura.
+    Retorna el mapa { "frase": "reemplazo", ... } (vacío si no se puede leer).
     """
     if not os.path.exists(ruta_json):
         print(f"ADVERTENCIA: No se encontró {ruta_json}. Se omitirá el reemplazo de frases.")
-        return {}, None
+        return {}
 
     try:
         with open(ruta_json, 'r', encoding='utf-8') as f:
             data = json.load(f)
     except Exception as e:
         print(f"ERROR cargando {ruta_json}: {e}")
-        return {}, None
+        return {}
 
     mapa_reemplazos = {}
 
@@ -120,6 +156,17 @@ def cargar_y_compilar_abreviaciones(ruta_json):
         for frase in frases:
             mapa_reemplazos[frase.lower()] = reemplazo
 
+    return mapa_reemplazos
+
+
+def cargar_y_compilar_abreviaciones(ruta_json):
+    """
+    Carga el JSON de abreviaciones, aplana la estructura y compila una regex optimizada.
+    Retorna:
+    - mapa_reemplazos: dict { "frase": "reemplazo", ... }
+    - patron_regex: objeto re.Pattern para hacer todas las sustituciones
+    """
+    mapa_reemplazos = cargar_abreviaciones(ruta_json)
     if not mapa_reemplazos:
         return {}, None
 
@@ -130,36 +177,104 @@ def cargar_y_compilar_abreviaciones(ruta_json):
     return mapa_reemplazos, patron_regex
 
 
-MAPA_ABREVIACIONES, PATRON_ABREVIACIONES = cargar_y_compilar_abreviaciones(RUTA_ABREVIACIONES)
+# Reglas de abreviaciones ya construidas, por ruta: (fecha de modificación, mapa, reemplazador)
+_ABREVIACIONES = {}
+_ABREVIACIONES_LOCK = threading.Lock()
 
 
-def procesar_notas_masivo(series_notas):
+def obtener_abreviaciones(ruta_json: str = RUTA_ABREVIACIONES) -> tuple[dict, ReemplazadorFrases]:
     """
-    Procesa una Serie de pandas (o lista de strings) conteniendo 'Notas'
-    y extrae relaciones (dividio, ligado, cancelado, referencia) de forma masiva y optimizada.
+    Mapa de abreviaciones y su ReemplazadorFrases (mismo resultado que la regex
+    de cargar_y_compilar_abreviaciones, pero su costo no crece con el tamaño
+    del diccionario).
 
-    Regla de extracción:
-    - Un número capturado por la regex SOLO se extrae como folio si tiene exactamente
-      10 dígitos numéricos. De lo contrario, el match se conserva intacto en la nota limpia.
+    No se construyen al importar el módulo sino la primera vez que se piden, y
+    se reutilizan mientras no cambie la fecha de modificación del JSON; si el
+    archivo se edita, la siguiente llamada vuelve a cargarlo.
+    """
+    try:
+        modificacion = os.stat(ruta_json).st_mtime_ns
+    except OSError:
+        modificacion = None
 
-    Formato de salida garantizado para todas las columnas de listas:
-    - Tipo:   List[str]
-    - Vacíos: []  (nunca None, nunca strings)
+    with _ABREVIACIONES_LOCK:
+        guardadas = _ABREVIACIONES.get(ruta_json)
+        if guardadas is None or guardadas[0] != modificacion:
+            mapa = cargar_abreviaciones(ruta_json)
+            guardadas = _ABREVIACIONES[ruta_json] = (modificacion, mapa, ReemplazadorFrases(mapa))
+    return guardadas[1], guardadas[2]
 
-    Los folios extraídos son únicos entre columnas:
-    - Prioridad de permanencia: folios_ligados → referencia_folio → dividido_a → dividido_de
 
-    Retorna un DataFrame con las columnas extraídas y la nota limpia.
+def __getattr__(nombre):
+    # Compatibilidad con los nombres de módulo de antes, que se construían al importar
+    if nombre == 'MAPA_ABREVIACIONES':
+        return obtener_abreviaciones()[0]
+    if nombre == 'REEMPLAZADOR_ABREVIACIONES':
+        return obtener_abreviaciones()[1]
+    if nombre == 'PATRON_ABREVIACIONES':
+        return cargar_y_compilar_abreviaciones(RUTA_ABREVIACIONES)[1]
+    raise AttributeError(f"module {__name__!r} has no attribute {nombre!r}")
+
+
+# --- PROCESAMIENTO EN PARALELO ---
+# Por debajo de este tamaño por fragmento no compensa el costo de enviar datos al pool
+MIN_NOTAS_POR_FRAGMENTO = 2000
+
+_POOLS = {}
+_POOLS_LOCK = threading.Lock()
+
+
+def _obtener_pool(workers: int) -> ProcessPoolExecutor:
+    """
+    Devuelve un pool de procesos reutilizable para el número de workers indicado.
+    Cada worker importa este módulo una sola vez, por lo que las regex y el mapa
+    de abreviaciones se compilan una vez por proceso (el mapa, al primer uso). Es seguro llamarla desde
+    varios hilos (p. ej. en el modo por lotes): todos comparten el mismo pool.
     """
+    with _POOLS_LOCK:
+        pool = _POOLS.get(workers)
+        if pool is None:
+            pool = ProcessPoolExecutor(max_workers=workers)
+            _POOLS[workers] = pool
+    return pool
 
-    valores = series_notas.astype(str).tolist()
 
-    res_dividido_de    = []
-    res_dividido_a     = []
-    res_cancelado      = []
-    res_referencia     = []
-    res_folios_ligados = []
-    res_nota_limpia    = []
+@atexit.register
+def _cerrar_pools():
+    for pool in _POOLS.values():
+        pool.shutdown(wait=False, cancel_futures=True)
+    _POOLS.clear()
+
+
+def _marcar_candidatas(valores: list) -> np.ndarray:
+    """
+    Prefiltro vectorizado: para cada nota devuelve una máscara de bits con las
+    palabras clave de relación que contiene (MARCA_DIVIDIO | MARCA_LIGADO | ...).
+    Una nota con marca 0 no puede coincidir con ninguno de los cuatro patrones.
+    """
+    serie = pd.Series(valores, dtype=object)
+    marcas = np.zeros(len(serie), dtype=np.int8)
+    for marca, clave in CLAVES_RELACION:
+        marcas[serie.str.contains(clave, na=False).to_numpy(dtype=bool)] |= marca
+    return marcas
+
+
+def _procesar_lista_notas(valores: list, normalizar: bool = False) -> tuple:
+    """
+    Núcleo secuencial de procesar_notas_masivo sobre una lista de strings.
+
+    Las notas sin ninguna palabra clave de relación (la mayoría) solo pasan por
+    abreviaciones y espacios. En las candidatas se aplican únicamente los patrones
+    cuya palabra clave aparece, en el orden dividio → ligado → cancelado → referencia.
+
+    Retorna una tupla (dividido_de, dividido_a, cancelado, referencia_folio,
+    folios_ligados, nota_limpia): las cinco columnas de folios como
+    ArregloFolios y nota_limpia como lista de str.
+    """
+    # Por columna de folios: todos los folios (int) en orden y cuántos tiene cada
+    # nota; las notas sin relaciones (la mayoría) solo agregan un 0
+    columnas_folios = tuple(([], []) for _ in range(5))
+    res_nota_limpia = []
 
     # Referencias locales para velocidad
     p_div              = PATRON_DIVIDIO
@@ -167,86 +282,110 @@ def procesar_notas_masivo(series_notas):
     p_can              = PATRON_CANCELADO
     p_ref              = PATRON_REFERENCIA
     p_esp              = PATRON_ESPACIOS
-    p_abreviaciones    = PATRON_ABREVIACIONES
-    mapa_abreviaciones = MAPA_ABREVIACIONES
+    reemplazador       = obtener_abreviaciones()[1]
+    abreviar           = reemplazador.reemplazar if reemplazador else None
+    normalizar_nota    = _normalizar_str if normalizar else None
+
+    # Acumuladores de la nota actual; los repl_* se definen una sola vez y
+    # escriben en estas listas, que se reinician en cada nota.
+    curr_div_de     = []
+    curr_div_a      = []
+    curr_ligados    = []
+    curr_cancelado  = []
+    curr_referencia = []
+
+    # --- Dividido ---
+    # Solo elimina el match si ambos folios (de y a) tienen 10 dígitos
+    def repl_div(match):
+        folio_de = match.group(1)
+        folio_a  = match.group(2)
+        if _es_folio_valido(folio_de) and _es_folio_valido(folio_a):
+            curr_div_de.append(folio_de)
+            curr_div_a.append(folio_a)
+            return ""
+        return match.group(0)  # conserva en nota si no es válido
+
+    # --- Ligado ---
+    # Solo elimina el match si ambos folios tienen 10 dígitos
+    def repl_lig(match):
+        folio_1 = match.group(1)
+        folio_2 = match.group(2)
+        if _es_folio_valido(folio_1) and _es_folio_valido(folio_2):
+            curr_ligados.append(folio_1)
+            curr_ligados.append(folio_2)
+            return ""
+        return match.group(0)  # conserva en nota si no es válido
+
+    # --- Cancelado ---
+    # Solo elimina el match si el folio tiene 10 dígitos
+    def repl_can(match):
+        folio = match.group(1)
+        if _es_folio_valido(folio):
+            curr_cancelado.append(folio)
+            return ""
+        return match.group(0)  # conserva en nota si no es válido
+
+    # --- Referencia ---
+    # Solo elimina el match si el folio tiene 10 dígitos
+    def repl_ref(match):
+        folio = match.group(1)
+        if _es_folio_valido(folio):
+            curr_referencia.append(folio)
+            return ""
+        return match.group(0)  # conserva en nota si no es válido
+
+    pasos = (
+        (MARCA_DIVIDIO,    CLAVE_DIVIDIO,    p_div, repl_div),
+        (MARCA_LIGADO,     CLAVE_LIGADO,     p_lig, repl_lig),
+        (MARCA_CANCELADO,  CLAVE_CANCELADO,  p_can, repl_can),
+        (MARCA_REFERENCIA, CLAVE_REFERENCIA, p_ref, repl_ref),
+    )
 
-    def repl_abreviaciones(match):
-        return mapa_abreviaciones.get(match.group(0).lower(), match.group(0))
+    marcas = _marcar_candidatas(valores)
 
-    for nota in valores:
+    for nota, marca in zip(valores, marcas.tolist()):
 
-        # Vacíos → listas vacías en todas las columnas
+        # Vacíos → sin folios en todas las columnas
         if not nota or nota == 'nan':
-            res_dividido_de.append([])
-            res_dividido_a.append([])
-            res_cancelado.append([])
-            res_referencia.append([])
-            res_folios_ligados.append([])
+            for _, longitudes in columnas_folios:
+                longitudes.append(0)
             res_nota_limpia.append("")
             continue
 
-        curr_div_de     = []
-        curr_div_a      = []
-        curr_ligados    = []
-        curr_cancelado  = []
-        curr_referencia = []
-
         texto_limpio = nota
 
-        # --- Dividido ---
-        # Solo elimina el match si ambos folios (de y a) tienen 10 dígitos
-        def repl_div(match):
-            folio_de = match.group(1)
-            folio_a  = match.group(2)
-            if _es_folio_valido(folio_de) and _es_folio_valido(folio_a):
-                curr_div_de.append(folio_de)
-                curr_div_a.append(folio_a)
-                return ""
-            return match.group(0)  # conserva en nota si no es válido
-
-        texto_limpio = p_div.sub(repl_div, texto_limpio)
-
-        # --- Ligado ---
-        # Solo elimina el match si ambos folios tienen 10 dígitos
-        def repl_lig(match):
-            folio_1 = match.group(1)
-            folio_2 = match.group(2)
-            if _es_folio_valido(folio_1) and _es_folio_valido(folio_2):
-                curr_ligados.append(folio_1)
-                curr_ligados.append(folio_2)
-                return ""
-            return match.group(0)  # conserva en nota si no es válido
-
-        texto_limpio = p_lig.sub(repl_lig, texto_limpio)
-
-        # --- Cancelado ---
-        # Solo elimina el match si el folio tiene 10 dígitos
-        def repl_can(match):
-            folio = match.group(1)
-            if _es_folio_valido(folio):
-                curr_cancelado.append(folio)
-                return ""
-            return match.group(0)  # conserva en nota si no es válido
-
-        texto_limpio = p_can.sub(repl_can, texto_limpio)
-
-        # --- Referencia ---
-        # Solo elimina el match si el folio tiene 10 dígitos
-        def repl_ref(match):
-            folio = match.group(1)
-            if _es_folio_valido(folio):
-                curr_referencia.append(folio)
-                return ""
-            return match.group(0)  # conserva en nota si no es válido
-
-        texto_limpio = p_ref.sub(repl_ref, texto_limpio)
+        # --- Camino rápido: sin palabras clave de relación ---
+        if not marca:
+            if abreviar:
+                texto_limpio = abreviar(texto_limpio)
+            for _, longitudes in columnas_folios:
+                longitudes.append(0)
+            texto_limpio = p_esp.sub(" ", texto_limpio).strip()
+            if normalizar_nota:
+                texto_limpio = normalizar_nota(texto_limpio, " ", False)
+            res_nota_limpia.append(texto_limpio)
+            continue
+
+        curr_div_de.clear()
+        curr_div_a.clear()
+        curr_ligados.clear()
+        curr_cancelado.clear()
+        curr_referencia.clear()
+
+        for bit, clave, patron, repl in pasos:
+            # Si un paso anterior eliminó texto, la unión de los fragmentos podría
+            # formar una palabra clave nueva: en ese caso se vuelve a comprobar.
+            if marca & bit or (len(texto_limpio) != len(nota) and clave.search(texto_limpio)):
+                texto_limpio = patron.sub(repl, texto_limpio)
 
         # --- Abreviaciones ---
-        if p_abreviaciones:
-            texto_limpio = p_abreviaciones.sub(repl_abreviaciones, texto_limpio)
+        if abreviar:
+            texto_limpio = abreviar(texto_limpio)
 
         # --- Limpieza Final ---
         texto_limpio = p_esp.sub(" ", texto_limpio).strip()
+        if normalizar_nota:
+            texto_limpio = normalizar_nota(texto_limpio, " ", False)
 
         # --- Formato estandarizado antes de deduplicar ---
         ligados_limpios    = _lista_str_unica(curr_ligados)
@@ -266,13 +405,156 @@ def procesar_notas_masivo(series_notas):
         )
 
         # --- Guardar ---
-        res_dividido_de.append(dividido_de_limpio)
-        res_dividido_a.append(dividido_a_limpio)
-        res_cancelado.append(_lista_str(curr_cancelado))
-        res_referencia.append(referencia_limpia)
-        res_folios_ligados.append(ligados_limpios)
+        por_columna = (
+            dividido_de_limpio,
+            dividido_a_limpio,
+            _lista_str(curr_cancelado),
+            referencia_limpia,
+            ligados_limpios,
+        )
+        for (folios, longitudes), lista in zip(columnas_folios, por_columna):
+            folios.extend(map(int, lista))
+            longitudes.append(len(lista))
         res_nota_limpia.append(texto_limpio)
 
+    return (
+        *(ArregloFolios.desde_longitudes(folios, longitudes) for folios, longitudes in columnas_folios),
+        res_nota_limpia,
+    )
+
+
+def _procesar_valores(valores: list, workers: int, normalizar: bool) -> tuple:
+    """
+    Ejecuta _procesar_lista_notas en serie o repartido en el pool de procesos.
+    """
+    if workers > 1 and len(valores) >= workers * MIN_NOTAS_POR_FRAGMENTO:
+        n_fragmentos = workers * 4
+        tam = -(-len(valores) // n_fragmentos)
+        fragmentos = [valores[i:i + tam] for i in range(0, len(valores), tam)]
+        parciales = list(_obtener_pool(workers).map(_procesar_lista_notas, fragmentos, repeat(normalizar)))
+        folios = [
+            ArregloFolios._concat_same_type([parcial[c] for parcial in parciales]) for c in range(5)
+        ]
+        notas = [nota for parcial in parciales for nota in parcial[5]]
+        return (*folios, notas)
+    return _procesar_lista_notas(valores, normalizar)
+
+
+# --- CACHÉ PERSISTENTE ---
+# Subir este número cuando cambie la lógica de extracción en el código
+# (las regex y abreviaciones.json ya forman parte de la huella).
+VERSION_REGLAS = 1
+
+
+def huella_reglas(normalizar: bool = False) -> bytes:
+    """
+    Huella del conjunto de reglas que determina el resultado de una nota:
+    regex de relaciones, abreviaciones.json y, si aplica, la normalización.
+    Si cambia cualquiera de ellas cambian todas las claves de la caché.
+    """
+    partes = [
+        VERSION_REGLAS,
+        [(p.pattern, p.flags) for p in (
+            PATRON_DIVIDIO, PATRON_LIGADO, PATRON_CANCELADO, PATRON_REFERENCIA, PATRON_ESPACIOS
+        )],
+        sorted(obtener_abreviaciones()[0].items()),
+        normalizar,
+    ]
+    if normalizar:
+        partes.append([(p.pattern, p.flags) for p in PATRONES_NORMALIZACION])
+    return hashlib.sha256(json.dumps(partes, ensure_ascii=False).encode('utf-8')).digest()
+
+
+def _procesar_con_cache(valores: list, workers: int, normalizar: bool, cache: CacheNotas) -> tuple:
+    base = hashlib.blake2b(huella_reglas(normalizar), digest_size=16)
+    claves = []
+    for nota in valores:
+        h = base.copy()
+        h.update(nota.encode('utf-8', 'surrogatepass'))
+        claves.append(h.digest())
+
+    guardados = cache.obtener_muchos(claves)
+    pendientes = [i for i, clave in enumerate(claves) if clave not in guardados]
+    nuevos = _procesar_valores([valores[i] for i in pendientes], workers, normalizar)
+
+    # En la caché cada nota se guarda con sus folios como listas de str
+    columnas = tuple([None] * len(valores) for _ in range(6))
+    for i, clave in enumerate(claves):
+        valor = guardados.get(clave)
+        if valor is not None:
+            for col, dato in zip(columnas, json.loads(valor)):
+                col[i] = dato
+
+    por_guardar = {}
+    nuevos = [col.a_listas() for col in nuevos[:5]] + [nuevos[5]]
+    for j, i in enumerate(pendientes):
+        fila = [col_nueva[j] for col_nueva in nuevos]
+        for col, dato in zip(columnas, fila):
+            col[i] = dato
+        por_guardar[claves[i]] = json.dumps(fila, ensure_ascii=False)
+    cache.guardar_muchos(por_guardar)
+
+    return (*(ArregloFolios.desde_listas(col) for col in columnas[:5]), columnas[5])
+
+
+def procesar_notas_masivo(
+    series_notas,
+    workers: int = 1,
+    normalizar: bool = False,
+    cache: CacheNotas | None = None,
+):
+    """
+    Procesa una Serie de pandas (o lista de strings) conteniendo 'Notas'
+    y extrae relaciones (dividio, ligado, cancelado, referencia) de forma masiva y optimizada.
+
+    Regla de extracción:
+    - Un número capturado por la regex SOLO se extrae como folio si tiene exactamente
+      10 dígitos numéricos. De lo contrario, el match se conserva intacto en la nota limpia.
+
+    Formato de salida garantizado para todas las columnas de listas:
+    - Tipo:   List[str] al leer una celda
+    - Vacíos: []  (nunca None, nunca strings)
+    Las columnas de folios son ArregloFolios (dtype 'folios'): todos los folios
+    en un arreglo int64 con offsets por fila, sin una lista de Python por fila.
+
+    Los folios extraídos son únicos entre columnas:
+    - Prioridad de permanencia: folios_ligados → referencia_folio → dividido_a → dividido_de
+
+    Con workers > 1 la Serie se divide en fragmentos que se procesan en un pool de
+    procesos; los resultados se unen en el orden original, por lo que la salida es
+    idéntica a la del modo secuencial.
+
+    Con normalizar=True la nota limpia sale ya normalizada (equivalente a aplicar
+    normalizar_texto_es sin stopwords) desde la misma iteración, sin una segunda
+    pasada sobre las notas.
+
+    Las notas idénticas se procesan una sola vez y el resultado se replica en
+    todas sus filas. Si se pasa una CacheNotas, las notas ya vistas en corridas
+    anteriores (con el mismo conjunto de reglas, ver huella_reglas) se toman de
+    la caché y solo las nuevas se procesan.
+
+    Retorna un DataFrame con las columnas extraídas y la nota limpia.
+    """
+
+    valores = series_notas.astype(str).tolist()
+
+    # --- Deduplicación: cada nota distinta se procesa una sola vez ---
+    codigos, unicas = pd.factorize(pd.Series(valores, dtype=object), use_na_sentinel=False)
+    unicas = list(unicas)
+
+    if cache is not None:
+        columnas = _procesar_con_cache(unicas, workers, normalizar, cache)
+    else:
+        columnas = _procesar_valores(unicas, workers, normalizar)
+
+    if len(unicas) < len(valores):
+        columnas = [col.take(codigos) for col in columnas[:5]] + [
+            [columnas[5][k] for k in codigos.tolist()]
+        ]
+
+    (res_dividido_de, res_dividido_a, res_cancelado,
+     res_referencia, res_folios_ligados, res_nota_limpia) = columnas
+
     df_resultados = pd.DataFrame({
         "dividido_de":      res_dividido_de,    # List[str], [] si vacío — menor prioridad
         "dividido_a":       res_dividido_a,     # List[str], [] si vacío — sin folios ya en ligados/referencia
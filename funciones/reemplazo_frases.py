@@ -0,0 +1,128 @@
+import re
+from itertools import accumulate
+
+# Divide el texto en corridas máximas de caracteres de palabra y de no-palabra.
+# Al comparar tokens completos se obtienen los mismos límites que \b en una regex.
+PATRON_TOKENS = re.compile(r'\w+|\W+')
+PATRON_CARACTER_PALABRA = re.compile(r'\w')
+
+_FIN = object()  # marca de nodo terminal dentro del trie
+
+
+class ReemplazadorFrases:
+    """
+    Reemplazo de frases basado en un trie a nivel de token.
+
+    Equivale a sustituir con la regex r'\\b(frase_larga|...|frase_corta)\\b':
+    - En cada posición gana la frase más larga que coincide.
+    - La frase debe empezar y terminar en límite de palabra.
+    - El recorrido continúa después del texto reemplazado.
+
+    A diferencia de la alternancia de la regex, el costo por token no crece con
+    el número de frases: solo se sigue la rama del trie que coincide.
+
+    Args:
+        mapa:               dict { "frase": "reemplazo", ... }
+        ignorar_mayusculas: Si True (por defecto), las frases se comparan en minúsculas.
+    """
+
+    def __init__(self, mapa: dict[str, str], ignorar_mayusculas: bool = True):
+        self.mapa = dict(mapa)
+        self.ignorar_mayusculas = ignorar_mayusculas
+        self._raiz = {}
+
+        for frase, reemplazo in self.mapa.items():
+            clave = frase.lower() if ignorar_mayusculas else frase
+            tokens = PATRON_TOKENS.findall(clave)
+            if not tokens:
+                continue
+            nodo = self._raiz
+            for token in tokens:
+                nodo = nodo.setdefault(token, {})
+            # \b al inicio/fin de una frase que empieza/termina con un carácter
+            # que no es de palabra exige un token de palabra vecino
+            exige_previo = not _es_palabra(tokens[0])
+            exige_siguiente = not _es_palabra(tokens[-1])
+            nodo[_FIN] = (reemplazo, exige_previo, exige_siguiente)
+
+    def __bool__(self) -> bool:
+        return bool(self._raiz)
+
+    def __len__(self) -> int:
+        return len(self.mapa)
+
+    def reemplazar(self, texto: str) -> str:
+        """
+        Aplica todas las sustituciones sobre un texto en un solo recorrido.
+        """
+        if not self.ignorar_mayusculas:
+            tokens = claves = PATRON_TOKENS.findall(texto)
+        else:
+            minusculas = texto.lower()
+            if len(minusculas) == len(texto):
+                tokens = claves = PATRON_TOKENS.findall(minusculas)
+            else:
+                # lower() cambió la longitud (caso raro de Unicode): se tokeniza
+                # el original y se compara cada token en minúsculas
+                tokens = PATRON_TOKENS.findall(texto)
+                claves = [t.lower() for t in tokens]
+
+        raiz = self._raiz
+        # Descarte rápido: ningún token puede iniciar una frase
+        if raiz.keys().isdisjoint(claves):
+            return texto
+
+        n = len(claves)
+        salida = []
+        inicios = None  # posición en `texto` donde empieza cada token
+        ultimo = 0
+        siguiente = 0
+
+        for i in [k for k, clave in enumerate(claves) if clave in raiz]:
+            if i < siguiente:
+                continue
+
+            # Avanza por el trie recordando la coincidencia válida más larga
+            nodo = raiz[claves[i]]
+            mejor = -1
+            reemplazo = None
+            j = i
+            while True:
+                fin = nodo.get(_FIN)
+                if fin is not None:
+                    rep, exige_previo, exige_siguiente = fin
+                    if (not exige_previo or i > 0) and (not exige_siguiente or j + 1 < n):
+                        mejor = j
+                        reemplazo = rep
+                j += 1
+                if j >= n:
+                    break
+                nodo = nodo.get(claves[j])
+                if nodo is None:
+                    break
+
+            if mejor < 0:
+                continue
+
+            if inicios is None:
+                inicios = list(accumulate(map(len, tokens), initial=0))
+            salida.append(texto[inicios[ultimo]:inicios[i]])
+            salida.append(reemplazo)
+            siguiente = ultimo = mejor + 1
+
+        if not salida:
+            return texto
+        salida.append(texto[inicios[ultimo]:])
+        return ''.join(salida)
+
+    def reemplazar_lista(self, textos) -> list[str]:
+        """
+        Aplica reemplazar() a cada elemento de una lista o Serie de strings.
+        """
+        reemplazar = self.reemplazar
+        return [reemplazar(t) for t in textos]
+
+
+def _es_palabra(token: str) -> bool:
+    # Los tokens son corridas homogéneas: basta con revisar el primer carácter
+    return PATRON_CARACTER_PALABRA.match(token) is not None
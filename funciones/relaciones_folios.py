@@ -0,0 +1,226 @@
+import numpy as np
+import pandas as pd
+from pandas.api.extensions import ExtensionArray, ExtensionDtype, register_extension_dtype
+from pandas.api.indexers import check_array_indexer
+
+# Los folios extraídos de las notas tienen siempre 10 dígitos; se guardan como
+# int64 y se vuelven a escribir con ceros a la izquierda
+DIGITOS_FOLIO = 10
+
+
+def _a_texto(valores: np.ndarray) -> list[str]:
+    return [f"{v:0{DIGITOS_FOLIO}d}" for v in valores.tolist()]
+
+
+def _a_entero(folio) -> int:
+    texto = str(folio).strip()
+    if len(texto) != DIGITOS_FOLIO or not texto.isdigit():
+        raise ValueError(f"Folio inválido para ArregloFolios: {folio!r} (se esperan {DIGITOS_FOLIO} dígitos)")
+    return int(texto)
+
+
+@register_extension_dtype
+class TipoFolios(ExtensionDtype):
+    """Dtype de pandas de las columnas ArregloFolios."""
+
+    name = 'folios'
+    type = list
+    kind = 'O'
+
+    @classmethod
+    def construct_array_type(cls):
+        return ArregloFolios
+
+
+class ArregloFolios(ExtensionArray):
+    """
+    Columna de listas de folios en formato compacto (CSR): un solo arreglo
+    int64 con los folios de todas las filas, en orden, y un arreglo de
+    offsets donde los folios de la fila i son valores[offsets[i]:offsets[i + 1]].
+
+    Una fila vacía cuesta solo un offset (8 bytes) en lugar de una lista de
+    Python, y cada folio 8 bytes en lugar de un str. Se usa como columna de un
+    DataFrame (dtype 'folios'):
+
+    - Leer una celda retorna una List[str] nueva, igual que las columnas de
+      listas de antes; las listas completas se arman solo con a_listas().
+    - Cortar por filas con un slice (df.iloc[a:b]) no copia los folios.
+    - take/concat (filtros, pd.concat) trabajan sobre los arreglos.
+    - En CSV se escribe como el str() de la lista ("['1234567890']") y en
+      Parquet/Feather como lista nativa de strings.
+    - procesamiento_grafos lo recorre directo con explotar() y con_elementos(),
+      sin pasar por listas.
+    """
+
+    def __init__(self, valores, offsets):
+        self._valores = np.asarray(valores, dtype=np.int64)
+        self._offsets = np.asarray(offsets, dtype=np.int64)
+
+    # --- Construcción ---
+
+    @classmethod
+    def desde_longitudes(cls, valores, longitudes) -> "ArregloFolios":
+        """Arma el arreglo a partir de los folios (enteros) y el número de folios por fila."""
+        offsets = np.zeros(len(longitudes) + 1, dtype=np.int64)
+        np.cumsum(longitudes, out=offsets[1:])
+        return cls(valores, offsets)
+
+    @classmethod
+    def desde_listas(cls, listas) -> "ArregloFolios":
+        """
+        Arma el arreglo a partir de listas de folios (str de 10 dígitos o
+        enteros). Los nulos cuentan como filas vacías.
+        """
+        listas = [[] if not isinstance(lista, (list, tuple, np.ndarray)) and pd.isna(lista) else lista
+                  for lista in listas]
+        longitudes = [len(lista) for lista in listas]
+        valores = np.fromiter(
+            (_a_entero(folio) for lista in listas for folio in lista), dtype=np.int64, count=sum(longitudes)
+        )
+        return cls.desde_longitudes(valores, longitudes)
+
+    @classmethod
+    def _from_sequence(cls, scalars, *, dtype=None, copy=False):
+        if isinstance(scalars, ArregloFolios):
+            return scalars.copy() if copy else scalars
+        return cls.desde_listas(scalars)
+
+    @classmethod
+    def _from_factorized(cls, values, original):
+        return cls.desde_listas([valor.split(',') if valor else [] for valor in values])
+
+    @classmethod
+    def _concat_same_type(cls, to_concat):
+        to_concat = list(to_concat)
+        if not to_concat:
+            return cls([], [0])
+        valores = np.concatenate([arreglo.valores for arreglo in to_concat])
+        longitudes = np.concatenate([arreglo.longitudes() for arreglo in to_concat])
+        return cls.desde_longitudes(valores, longitudes)
+
+    # --- Acceso compacto ---
+
+    @property
+    def valores(self) -> np.ndarray:
+        """Folios de todas las filas como int64 (vista, sin copiar)."""
+        return self._valores[self._offsets[0]:self._offsets[-1]]
+
+    def longitudes(self) -> np.ndarray:
+        """Número de folios de cada fila."""
+        return np.diff(self._offsets)
+
+    def con_elementos(self) -> np.ndarray:
+        """Máscara de las filas con al menos un folio."""
+        return self._offsets[1:] > self._offsets[:-1]
+
+    def explotar(self) -> pd.Series:
+        """
+        Un elemento por folio, como str, con la posición de su fila como índice;
+        igual que procesamiento_grafos.explotar_listas sobre las listas.
+        """
+        posiciones = np.repeat(np.arange(len(self)), self.longitudes())
+        return pd.Series(_a_texto(self.valores), index=posiciones, dtype=object)
+
+    def a_listas(self) -> list[list[str]]:
+        """Las filas como listas de str."""
+        textos = _a_texto(self.valores)
+        inicio = self._offsets[0]
+        return [textos[a - inicio:b - inicio] for a, b in zip(self._offsets[:-1].tolist(), self._offsets[1:].tolist())]
+
+    # --- Interfaz de ExtensionArray ---
+
+    @property
+    def dtype(self) -> TipoFolios:
+        return TipoFolios()
+
+    @property
+    def nbytes(self) -> int:
+        return self._valores.nbytes + self._offsets.nbytes
+
+    def __len__(self) -> int:
+        return len(self._offsets) - 1
+
+    def __iter__(self):
+        return iter(self.a_listas())
+
+    def __getitem__(self, item):
+        if isinstance(item, (int, np.integer)):
+            i = int(item)
+            if i < 0:
+                i += len(self)
+            if not 0 <= i < len(self):
+                raise IndexError(f"Índice fuera de rango: {item}")
+            return _a_texto(self._valores[self._offsets[i]:self._offsets[i + 1]])
+        if isinstance(item, slice):
+            inicio, fin, paso = item.indices(len(self))
+            if paso == 1:
+                # Vista: comparte los folios, solo se recortan los offsets
+                return ArregloFolios(self._valores, self._offsets[inicio:max(inicio, fin) + 1])
+            return self.take(np.arange(inicio, fin, paso))
+        item = check_array_indexer(self, item)
+        if item.dtype == bool:
+            item = np.flatnonzero(item)
+        return self.take(item)
+
+    def take(self, indices, allow_fill=False, fill_value=None):
+        """
+        Filas en las posiciones `indices`. Con allow_fill=True, -1 es una fila
+        vacía (los folios no tienen valor nulo).
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        n = len(self)
+        if allow_fill:
+            if (indices < -1).any():
+                raise ValueError("Con allow_fill=True solo se admite -1 como índice negativo")
+            faltantes = indices == -1
+        else:
+            indices = np.where(indices < 0, indices + n, indices)
+            faltantes = None
+        if len(indices) and ((indices >= n).any() or (indices < -1).any()):
+            raise IndexError("Índice fuera de rango en take")
+
+        seguros = indices if faltantes is None else np.where(faltantes, 0, indices)
+        inicios = self._offsets[:-1][seguros] if n else np.zeros(len(indices), dtype=np.int64)
+        longitudes = np.diff(self._offsets)[seguros] if n else np.zeros(len(indices), dtype=np.int64)
+        if faltantes is not None:
+            longitudes = np.where(faltantes, 0, longitudes)
+
+        resultado = ArregloFolios.desde_longitudes(np.empty(0, dtype=np.int64), longitudes)
+        total = int(resultado._offsets[-1])
+        # Posición de origen de cada folio: inicio de su fila + desplazamiento dentro de ella
+        origen = np.repeat(inicios - resultado._offsets[:-1], longitudes) + np.arange(total)
+        resultado._valores = self._valores[origen]
+        return resultado
+
+    def copy(self):
+        return ArregloFolios(self.valores.copy(), self._offsets - self._offsets[0])
+
+    def isna(self) -> np.ndarray:
+        return np.zeros(len(self), dtype=bool)
+
+    def __eq__(self, other):
+        otras = list(other) if isinstance(other, (ExtensionArray, np.ndarray, list)) else [other] * len(self)
+        return np.array([a == b for a, b in zip(self.a_listas(), otras)], dtype=bool)
+
+    def _values_for_factorize(self):
+        valores = np.empty(len(self), dtype=object)
+        valores[:] = [','.join(lista) for lista in self.a_listas()]
+        return valores, None
+
+    def __array__(self, dtype=None, copy=None):
+        # Arreglo de objetos con una lista por fila (no un arreglo 2D)
+        resultado = np.empty(len(self), dtype=object)
+        for i, lista in enumerate(self.a_listas()):
+            resultado[i] = lista
+        if dtype is not None and np.dtype(dtype) != object:
+            return resultado.astype(dtype)
+        return resultado
+
+    def __arrow_array__(self, type=None):
+        import pyarrow as pa
+
+        offsets = pa.array(self._offsets - self._offsets[0], type=pa.int32())
+        return pa.ListArray.from_arrays(offsets, pa.array(_a_texto(self.valores), type=pa.string()))
+
+    def _formatter(self, boxed=False):
+        return str
@@ -1,3 +1,7 @@
+import hashlib
+import json
+from collections import Counter
+import numpy as np
 import pandas as pd
 import sys
 import os
@@ -8,14 +12,24 @@ if _BASE_DIR not in sys.path:
     sys.path.insert(0, _BASE_DIR)
 
 try:
-    from procesamiento_notas import procesar_notas_masivo
-    from notas_extraccion import normalizar_texto_es
-    from asignar_comisaria import asignar_comisaria
+    from procesamiento_notas import procesar_notas_masivo, huella_reglas
+    from asignar_comisaria import asignar_comisaria, reportar_sin_comisaria, RUTA_COMISARIAS
+    from cache_notas import CacheNotas
+    from formatos_tabla import concatenar_tablas, detectar_formato, fechas_a_texto, guardar_tabla, leer_tabla
+    from lectura_reporte import detectar_codificacion, leer_reporte
+    from metricas import Metricas, SIN_METRICAS
+    from ejecucion_solapada import EjecucionSecuencial, EjecucionSolapada
+    from manifiesto import COLUMNA_HUELLA, guardar_manifiesto, huellas_filas, leer_manifiesto
 except ImportError:
     sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), 'funciones'))
-    from procesamiento_notas import procesar_notas_masivo
-    from notas_extraccion import normalizar_texto_es
-    from asignar_comisaria import asignar_comisaria
+    from procesamiento_notas import procesar_notas_masivo, huella_reglas
+    from asignar_comisaria import asignar_comisaria, reportar_sin_comisaria, RUTA_COMISARIAS
+    from cache_notas import CacheNotas
+    from formatos_tabla import concatenar_tablas, detectar_formato, fechas_a_texto, guardar_tabla, leer_tabla
+    from lectura_reporte import detectar_codificacion, leer_reporte
+    from metricas import Metricas, SIN_METRICAS
+    from ejecucion_solapada import EjecucionSecuencial, EjecucionSolapada
+    from manifiesto import COLUMNA_HUELLA, guardar_manifiesto, huellas_filas, leer_manifiesto
 
 
 COLS_MAP = {
@@ -38,58 +52,66 @@ COLS_MAP = {
 
 TIPO_INCIDENTE_EXCLUIDOS = {'70104'}
 
+# Columnas del reporte de entrada que se leen: las exportadas más las que se
+# usan durante el procesamiento. Las demás no se cargan.
+COLUMNAS_ENTRADA = list(dict.fromkeys([*COLS_MAP, 'Notas', 'Municipio', 'Tipo de Incidente']))
 
-def procesar_reporte(input_file: str, output_file: str | None = None) -> pd.DataFrame:
-    """
-    Lee un CSV de reporte, procesa las notas, asigna comisaría y guarda el resultado.
+# Columnas mínimas que necesita la etapa de grafo (nombres ya renombrados)
+COLUMNAS_RELACION = ['Folio', 'Divididos', 'folios_ligados', 'referencia_folio', 'cancelados']
 
-    Args:
-        input_file:  Ruta al CSV de entrada.
-        output_file: Ruta donde se guardará el CSV procesado.
-                     Si es None, no se escribe archivo intermedio.
 
-    Returns:
-        DataFrame final procesado.
+def _procesar_bloque(
+    df: pd.DataFrame,
+    verbose: bool = True,
+    workers: int = 1,
+    cache: CacheNotas | None = None,
+    metricas: Metricas = SIN_METRICAS,
+    sin_comisaria: Counter | None = None,
+) -> pd.DataFrame:
     """
-    # ── 1. Lectura ──────────────────────────────────────────────────────────
-    print(f"Leyendo archivo: {input_file}")
-    try:
-        df = pd.read_csv(input_file, encoding='utf-8')
-    except UnicodeDecodeError:
-        print("UTF-8 falló, intentando latin1...")
-        df = pd.read_csv(input_file, encoding='latin1')
+    Aplica filtrado, extracción de notas, normalización, asignación de comisaría
+    y selección de columnas a un DataFrame (reporte completo o un bloque del mismo).
 
-    print(f"Filas leídas: {len(df)}")
+    Con `sin_comisaria` las filas de municipios sin comisaría se suman a ese
+    Counter en lugar de informarse aquí, para avisar una vez por corrida.
 
+    Returns:
+        DataFrame con las columnas de COLS_MAP ya renombradas.
+    """
     # ── 2. Filtrado temprano ────────────────────────────────────────────────
     # Se descarta antes de cualquier procesamiento pesado para reducir carga
     antes = len(df)
-    df = df[~df['Tipo de Incidente'].astype(str).isin(TIPO_INCIDENTE_EXCLUIDOS)].copy()
-    print(f"Filas tras filtrar tipos excluidos: {len(df)} (descartadas: {antes - len(df)})")
+    with metricas.etapa('filtro') as registro:
+        df = df[~df['Tipo de Incidente'].astype(str).isin(TIPO_INCIDENTE_EXCLUIDOS)].copy()
+        registro['filas'] = antes
+    if verbose:
+        print(f"Filas tras filtrar tipos excluidos: {len(df)} (descartadas: {antes - len(df)})")
 
     # ── 3. Validación de columna clave ──────────────────────────────────────
     if 'Notas' not in df.columns:
         raise ValueError("Columna 'Notas' no encontrada en el archivo de entrada.")
 
     # ── 4. Procesamiento de notas ───────────────────────────────────────────
-    print("Procesando columna 'Notas'...")
-    notas_series = df['Notas'].fillna('')
-    df_procesado = procesar_notas_masivo(notas_series)
-
-    print("Normalizando notas procesadas...")
-    df_procesado['nota_limpia'] = (
-        df_procesado['nota_limpia']
-        .astype(str)
-        .apply(lambda x: normalizar_texto_es(x, eliminar_stopwords=False))
-    )
+    # La normalización de la nota se hace en la misma pasada que la extracción
+    if verbose:
+        print("Procesando y normalizando columna 'Notas'...")
+    with metricas.etapa('notas') as registro:
+        notas_series = df['Notas'].fillna('')
+        df_procesado = procesar_notas_masivo(notas_series, workers=workers, normalizar=True, cache=cache)
+        registro['filas'] = len(df)
 
     # ── 5. Consolidación ────────────────────────────────────────────────────
     df_procesado.index = df.index
     df_final = pd.concat([df, df_procesado], axis=1)
 
     # ── 6. Asignación de comisaría ──────────────────────────────────────────
-    print("Asignando comisarias...")
-    df_final = asignar_comisaria(df_final)
+    if verbose:
+        print("Asignando comisarias...")
+    with metricas.etapa('comisaria') as registro:
+        df_final = asignar_comisaria(
+            df_final, verbose=verbose and sin_comisaria is None, sin_comisaria=sin_comisaria
+        )
+        registro['filas'] = len(df_final)
 
     # ── 7. Selección y renombrado de columnas ───────────────────────────────
     cols_to_export, rename_dict = [], {}
@@ -97,15 +119,145 @@ def procesar_reporte(input_file: str, output_file: str | None = None) -> pd.Data
         if original in df_final.columns:
             cols_to_export.append(original)
             rename_dict[original] = nuevo
-        else:
+        elif verbose:
             print(f"Advertencia: Columna '{original}' no encontrada en el DataFrame final.")
 
-    df_out = df_final[cols_to_export].rename(columns=rename_dict)
+    return df_final[cols_to_export].rename(columns=rename_dict)
+
+
+def huella_reglas_reporte() -> str:
+    """
+    Huella de todo lo que determina el resultado de una fila además de sus
+    valores: reglas de notas (huella_reglas), comisarias.json, tipos excluidos
+    y columnas exportadas. Si cambia, el manifiesto incremental no se reutiliza.
+    """
+    h = hashlib.sha256(huella_reglas(normalizar=True))
+    try:
+        with open(RUTA_COMISARIAS, 'rb') as f:
+            h.update(f.read())
+    except FileNotFoundError:
+        pass
+    h.update(json.dumps([sorted(TIPO_INCIDENTE_EXCLUIDOS), COLS_MAP]).encode('utf-8'))
+    return h.hexdigest()
+
+
+def _procesar_incremental(
+    df: pd.DataFrame,
+    previo: pd.DataFrame | None,
+    huellas: np.ndarray,
+    workers: int,
+    cache: CacheNotas | None,
+    metricas: Metricas,
+    sin_comisaria: Counter | None = None,
+) -> pd.DataFrame:
+    """
+    _procesar_bloque solo para las filas nuevas o modificadas: las filas cuya
+    huella está en el manifiesto `previo` toman de ahí su resultado. Retorna lo
+    mismo que _procesar_bloque(df) sobre el reporte completo.
+    """
+    posicion = np.full(len(df), -1)
+    if previo is not None and len(previo):
+        previo = previo.drop_duplicates(COLUMNA_HUELLA)
+        posicion = pd.Index(previo[COLUMNA_HUELLA].to_numpy()).get_indexer(huellas)
+    reutilizable = posicion >= 0
+
+    excluidas = df['Tipo de Incidente'].astype(str).isin(TIPO_INCIDENTE_EXCLUIDOS).to_numpy()
+    print(
+        f"Modo incremental: {int(reutilizable.sum())} filas sin cambios se reutilizan, "
+        f"{int((~reutilizable & ~excluidas).sum())} nuevas o modificadas se procesan"
+    )
+    if not reutilizable.any():
+        return _procesar_bloque(
+            df, workers=workers, cache=cache, metricas=metricas, sin_comisaria=sin_comisaria
+        )
+
+    reutilizadas = previo.iloc[posicion[reutilizable]].drop(columns=COLUMNA_HUELLA)
+    reutilizadas.index = df.index[reutilizable]
+    partes = [reutilizadas]
+    if not reutilizable.all():
+        partes.append(
+            _procesar_bloque(
+                df[~reutilizable], verbose=False, workers=workers, cache=cache, metricas=metricas,
+                sin_comisaria=sin_comisaria,
+            )
+        )
+
+    # Mismo orden de filas y mismas categorías que en una corrida completa
+    df_out = concatenar_tablas(partes).sort_index(kind='stable')
+    categoricas = {
+        col: df[col].dtype for col in df_out.columns
+        if col in df.columns and isinstance(df[col].dtype, pd.CategoricalDtype)
+    }
+    return df_out.astype(categoricas) if categoricas else df_out
+
+
+def procesar_reporte(
+    input_file: str,
+    output_file: str | None = None,
+    workers: int = 1,
+    cache: CacheNotas | None = None,
+    formato: str | None = None,
+    motor: str | None = None,
+    metricas: Metricas = SIN_METRICAS,
+    manifiesto: str | None = None,
+) -> pd.DataFrame:
+    """
+    Lee un CSV de reporte, procesa las notas, asigna comisaría y guarda el resultado.
+
+    Args:
+        input_file:  Ruta al reporte de entrada (CSV, Parquet o Feather).
+        output_file: Ruta donde se guardará el reporte procesado.
+                     Si es None, no se escribe archivo intermedio.
+        workers:     Procesos para el procesamiento de notas (1 = secuencial).
+        cache:       CacheNotas persistente opcional para reutilizar notas ya procesadas.
+        formato:     'csv', 'parquet' o 'feather'. Si es None se deduce de la
+                     extensión de output_file. En Parquet/Feather las columnas de
+                     folios quedan como listas nativas.
+        motor:       Motor del parser CSV ('c', 'pyarrow' o 'auto'); ver leer_reporte.
+        metricas:    Metricas donde se registran las etapas (por defecto no se mide).
+        manifiesto:  Modo incremental: archivo Parquet con la huella y el
+                     resultado de cada fila de la corrida anterior (ver
+                     ruta_manifiesto). Solo las filas nuevas o modificadas pasan
+                     por extracción, normalización y comisaría; el resultado es
+                     el mismo que sin manifiesto, que se actualiza al terminar.
+
+    Returns:
+        DataFrame final procesado.
+    """
+    # ── 1. Lectura ──────────────────────────────────────────────────────────
+    print(f"Leyendo archivo: {input_file}")
+    with metricas.etapa('lectura') as registro:
+        if detectar_formato(input_file) == 'csv':
+            df = leer_reporte(input_file, columnas=COLUMNAS_ENTRADA, motor=motor)
+        else:
+            df = leer_tabla(input_file, columnas=COLUMNAS_ENTRADA)
+        registro['filas'] = len(df)
+
+    print(f"Filas leídas: {len(df)}")
+
+    # Municipios sin comisaría de las filas procesadas en esta corrida
+    sin_comisaria = Counter()
+    if manifiesto:
+        reglas = huella_reglas_reporte()
+        with metricas.etapa('huellas') as registro:
+            huellas = huellas_filas(df, COLUMNAS_ENTRADA)
+            previo = leer_manifiesto(manifiesto, reglas)
+            registro['filas'] = len(df)
+        df_out = _procesar_incremental(df, previo, huellas, workers, cache, metricas, sin_comisaria)
+        with metricas.etapa('manifiesto') as registro:
+            huellas_salida = pd.Series(huellas, index=df.index).loc[df_out.index].to_numpy()
+            guardar_manifiesto(df_out, huellas_salida, manifiesto, reglas)
+            registro['filas'] = len(df_out)
+    else:
+        df_out = _procesar_bloque(df, workers=workers, cache=cache, metricas=metricas, sin_comisaria=sin_comisaria)
+    reportar_sin_comisaria(sin_comisaria)
 
     # ── 8. Exportación ──────────────────────────────────────────────────────
     if output_file:
         print(f"Guardando {len(df_out)} filas en: {output_file}")
-        df_out.to_csv(output_file, index=False, encoding='utf-8')
+        with metricas.etapa('escritura') as registro:
+            guardar_tabla(df_out, output_file, formato=formato)
+            registro['filas'] = len(df_out)
         print("Proceso terminado exitosamente.")
     else:
         print("Proceso terminado exitosamente (sin exportar archivo intermedio).")
@@ -113,6 +265,124 @@ def procesar_reporte(input_file: str, output_file: str | None = None) -> pd.Data
     return df_out
 
 
+def procesar_reporte_por_bloques(
+    input_file: str,
+    output_file: str,
+    chunksize: int,
+    columnas_relacion: list[str] | None = None,
+    workers: int = 1,
+    cache: CacheNotas | None = None,
+    metricas: Metricas = SIN_METRICAS,
+    solapado: bool = False,
+    max_cola: int = 2,
+) -> pd.DataFrame:
+    """
+    Variante en streaming de procesar_reporte: lee el CSV en bloques de `chunksize`
+    filas, procesa cada bloque y lo agrega al CSV de salida.
+
+    Solo se conservan en memoria las columnas de folio/relaciones de cada bloque,
+    de modo que el consumo de memoria no depende del tamaño total del reporte.
+
+    Con solapado=True la lectura y la escritura corren en hilos propios
+    (EjecucionSolapada) mientras el hilo principal procesa notas y comisarías,
+    de modo que el disco trabaja durante el procesamiento. El archivo de salida
+    es idéntico al del modo secuencial.
+
+    Args:
+        input_file:        Ruta al CSV de entrada.
+        output_file:       Ruta del CSV procesado (obligatoria en este modo).
+        chunksize:         Número de filas por bloque.
+        columnas_relacion: Columnas (ya renombradas) a conservar para la etapa de grafo.
+                           Por defecto COLUMNAS_RELACION.
+        workers:           Procesos para el procesamiento de notas (1 = secuencial).
+        cache:             CacheNotas persistente opcional.
+        metricas:          Metricas donde se registran las etapas; se acumulan por bloque.
+        solapado:          Lectura y escritura en hilos, solapadas con el procesamiento.
+        max_cola:          Bloques que pueden esperar entre etapas en modo solapado.
+
+    Returns:
+        DataFrame con las columnas de relación de todas las filas exportadas,
+        en el mismo orden que el CSV de salida.
+    """
+    if columnas_relacion is None:
+        columnas_relacion = COLUMNAS_RELACION
+
+    print(f"Leyendo archivo por bloques de {chunksize} filas: {input_file}")
+    # Solo se reintenta en latin1 si la muestra parecía UTF-8 y el resto no lo es
+    for encoding in dict.fromkeys([detectar_codificacion(input_file), 'latin1']):
+        try:
+            return _procesar_bloques(
+                input_file, output_file, chunksize, columnas_relacion, encoding, workers, cache,
+                metricas, solapado, max_cola,
+            )
+        except UnicodeDecodeError:
+            if encoding == 'latin1':
+                raise
+            print("UTF-8 falló, intentando latin1...")
+
+
+def _leer_bloques(lector, metricas):
+    while True:
+        with metricas.etapa('lectura') as registro:
+            bloque = next(lector, None)
+            registro['filas'] = 0 if bloque is None else len(bloque)
+        if bloque is None:
+            return
+        yield bloque
+
+
+def _procesar_bloques(
+    input_file, output_file, chunksize, columnas_relacion, encoding, workers, cache, metricas,
+    solapado=False, max_cola=2,
+):
+    relaciones = []
+    filas_leidas = 0
+    filas_escritas = 0
+    sin_comisaria = Counter()
+
+    def escribir(pendiente):
+        # El primer bloque crea el archivo (con encabezado); los siguientes se agregan
+        i, df_out = pendiente
+        with metricas.etapa('escritura') as registro:
+            fechas_a_texto(df_out).to_csv(
+                output_file,
+                mode='w' if i == 0 else 'a',
+                header=(i == 0),
+                index=False,
+                encoding='utf-8',
+            )
+            registro['filas'] = len(df_out)
+
+    lector = leer_reporte(input_file, columnas=COLUMNAS_ENTRADA, encoding=encoding, chunksize=chunksize)
+    bloques = _leer_bloques(lector, metricas)
+    if solapado:
+        ejecucion = EjecucionSolapada(bloques, escribir, max_cola=max_cola)
+    else:
+        ejecucion = EjecucionSecuencial(bloques, escribir)
+
+    with ejecucion:
+        for i, bloque in enumerate(ejecucion.entradas()):
+            filas_leidas += len(bloque)
+            df_out = _procesar_bloque(
+                bloque, verbose=(i == 0), workers=workers, cache=cache, metricas=metricas,
+                sin_comisaria=sin_comisaria,
+            )
+            ejecucion.enviar((i, df_out))
+            filas_escritas += len(df_out)
+
+            # Las columnas del grafo se van reuniendo a medida que pasan los bloques
+            cols = [c for c in columnas_relacion if c in df_out.columns]
+            relaciones.append(df_out[cols])
+            print(f"Bloque {i + 1}: {filas_leidas} filas leídas, {filas_escritas} exportadas")
+
+    if not relaciones:
+        raise ValueError(f"El archivo de entrada no contiene filas: {input_file}")
+
+    reportar_sin_comisaria(sin_comisaria)
+    print(f"Proceso terminado exitosamente ({filas_escritas} filas en: {output_file}).")
+    return concatenar_tablas(relaciones, ignore_index=True)
+
+
 # ── Punto de entrada ─────────────────────────────────────────────────────────
 if __name__ == "__main__":
     base_dir = os.path.dirname(os.path.abspath(__file__))
@@ -0,0 +1,75 @@
+"""
+Busca las frases (n-gramas) más frecuentes en las notas de uno o varios
+reportes y las exporta en el formato de funciones/abreviaciones.json.
+
+Las notas se leen por bloques y se cuentan con MinadorNgramas, así que la
+memoria no crece con el tamaño de los reportes. Por defecto cada nota se
+normaliza con normalizar_texto_es antes de contar.
+
+Uso:
+    python minar_ngramas.py --input Limpieza_notas/Reporte_enero.csv --top-k 200 --output candidatos.json
+"""
+import argparse
+import os
+import sys
+
+_BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, os.path.join(_BASE_DIR, 'funciones'))
+
+from lectura_reporte import leer_reporte
+from minado_ngramas import MinadorNgramas, exportar_abreviaciones, RUTA_ABREVIACIONES
+
+
+def _bloques_de_notas(rutas, columna, chunksize):
+    for ruta in rutas:
+        for bloque in leer_reporte(ruta, columnas=[columna], chunksize=chunksize):
+            if columna in bloque.columns:
+                yield bloque[columna]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--input', nargs='+', required=True, help="Uno o varios reportes CSV.")
+    parser.add_argument('--columna', default='Notas', help="Columna con el texto de las notas.")
+    parser.add_argument('--output', default=None,
+                        help="JSON de salida con el formato de abreviaciones.json (si se omite solo se imprimen).")
+    parser.add_argument('--base', default=RUTA_ABREVIACIONES,
+                        help="abreviaciones.json de partida; sus frases no se repiten en la salida.")
+    parser.add_argument('--categoria', default='candidatos', help="Categoría donde se agregan las frases nuevas.")
+    parser.add_argument('--ngram-min', type=int, default=2)
+    parser.add_argument('--ngram-max', type=int, default=4)
+    parser.add_argument('--min-df', type=int, default=10, help="Número mínimo de notas en que aparece la frase.")
+    parser.add_argument('--top-k', type=int, default=30)
+    parser.add_argument('--sin-stopwords', action='store_true', help="No ignora las stopwords al armar las frases.")
+    parser.add_argument('--sin-normalizar', action='store_true', help="Cuenta sobre el texto original.")
+    parser.add_argument('--chunksize', type=int, default=50000, help="Notas por bloque.")
+    parser.add_argument('--particiones', type=int, default=16,
+                        help="Archivos temporales iniciales entre los que se reparten los conteos.")
+    parser.add_argument('--max-entradas', type=int, default=1_000_000,
+                        help="Líneas máximas por archivo temporal antes de compactarlo (acota la memoria).")
+    parser.add_argument('--workers', type=int, default=1, help="Procesos para contar bloques en paralelo.")
+    args = parser.parse_args()
+
+    with MinadorNgramas(
+        ngram_range=(args.ngram_min, args.ngram_max),
+        min_df=args.min_df,
+        usar_stopwords=not args.sin_stopwords,
+        particiones=args.particiones,
+        max_entradas=args.max_entradas,
+        workers=args.workers,
+        normalizar=not args.sin_normalizar,
+    ) as minador:
+        minador.agregar_bloques(_bloques_de_notas(args.input, args.columna, args.chunksize))
+        pares = minador.top(args.top_k)
+        print(f"{minador.documentos} notas, {len(pares)} frases:")
+
+    for frase, frecuencia in pares:
+        print(f"  {frecuencia:>8}  {frase}")
+
+    if args.output:
+        agregadas = exportar_abreviaciones(pares, args.output, args.categoria, args.base)
+        print(f"{agregadas} frases nuevas en la categoría '{args.categoria}' guardadas en: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
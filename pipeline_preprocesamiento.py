@@ -1,39 +1,312 @@
 import argparse
+import glob
 import os
 import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
 
 
 _BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 if _BASE_DIR not in sys.path:
     sys.path.insert(0, _BASE_DIR)
 
-from generar_csv_incidentes_procesado import procesar_reporte
+from generar_csv_incidentes_procesado import COLUMNAS_RELACION, procesar_reporte, procesar_reporte_por_bloques
 
 sys.path.append(os.path.join(_BASE_DIR, "funciones"))
-from procesamiento_grafos import construir_grafo, analizar_componentes, separar_folios_cancelados
+from procesamiento_grafos import (
+    COLUMNAS_RESUMEN,
+    IndiceComponentes,
+    calcular_componentes,
+    resumir_grupos,
+    separar_folios_cancelados,
+)
+from cache_notas import CacheNotas
+from almacen_relaciones import AlmacenRelaciones
+from formatos_tabla import EXTENSIONES, FORMATOS, concatenar_tablas, detectar_formato, guardar_tabla
+from metricas import Metricas, SIN_METRICAS
+from manifiesto import ruta_manifiesto
+
+
+def _calcular_grupos(df: pd.DataFrame, almacen: AlmacenRelaciones | None) -> pd.DataFrame:
+    # Con almacén, los grupos salen del estado acumulado de todos los reportes
+    if almacen is None:
+        return calcular_componentes(df)
+    nuevos = almacen.agregar(df)
+    print(f"Folios nuevos en el almacén de relaciones: {nuevos} (total {len(almacen)})")
+    return almacen.componentes(df['Folio'])
+
+
+def _guardar_resumen_grupos(
+    df: pd.DataFrame, df_componentes: pd.DataFrame, ruta: str, metricas: Metricas
+) -> None:
+    # Índice de grupos y agregados por grupo (ver resumir_grupos), en el formato de la extensión
+    with metricas.etapa("resumen_grupos") as registro:
+        resumen = resumir_grupos(df, IndiceComponentes.desde_grupos(df_componentes))
+        guardar_tabla(resumen, ruta, encoding="utf-8-sig")
+        registro["filas"] = len(df)
+    print(f"Resumen de {len(resumen)} grupos guardado en: {ruta}")
 
 
-def ejecutar_pipeline(input_file: str, output_file: str) -> None:
+def ejecutar_pipeline(
+    input_file: str,
+    output_file: str,
+    workers: int = 1,
+    cache: CacheNotas | None = None,
+    almacen: AlmacenRelaciones | None = None,
+    formato: str | None = None,
+    motor: str | None = None,
+    metricas: Metricas = SIN_METRICAS,
+    incremental: bool = False,
+    resumen_grupos: str | None = None,
+) -> None:
+    """
+    Procesa un reporte completo en memoria y escribe el archivo final.
+
+    Con incremental=True se guarda junto a output_file un manifiesto
+    (<salida>.manifiesto.parquet) con la huella y el resultado de cada fila;
+    en la siguiente corrida solo se procesan las filas nuevas o modificadas.
+    El archivo final es el mismo que sin incremental.
+
+    Con resumen_grupos se escribe además una tabla con una fila por grupo de
+    folios (ver resumir_grupos).
+    """
     print(f"Entrada: {input_file}")
     print("Paso 1/2: procesamiento de notas y estructura base...")
-    df_procesado = procesar_reporte(input_file=input_file, output_file=None)
+    df_procesado = procesar_reporte(
+        input_file=input_file,
+        output_file=None,
+        workers=workers,
+        cache=cache,
+        motor=motor,
+        metricas=metricas,
+        manifiesto=ruta_manifiesto(output_file) if incremental else None,
+    )
 
     print("Paso 2/2: grafo de relaciones y filtrado de cancelados aislados...")
-    grafo = construir_grafo(df_procesado)
-    df_componentes = analizar_componentes(grafo)
-    _, df_final = separar_folios_cancelados(
-        df_original=df_procesado,
-        df_grupos=df_componentes,
-        output_cancelados=None,
-        output_limpio=None,
-        output_relaciones=None,
-    )
+    with metricas.etapa("componentes") as registro:
+        df_componentes = _calcular_grupos(df_procesado, almacen)
+        registro["filas"] = len(df_procesado)
+    if resumen_grupos:
+        _guardar_resumen_grupos(df_procesado, df_componentes, resumen_grupos, metricas)
+    with metricas.etapa("separacion") as registro:
+        _, df_final = separar_folios_cancelados(
+            df_original=df_procesado,
+            df_grupos=df_componentes,
+            output_cancelados=None,
+            output_limpio=None,
+            output_relaciones=None,
+        )
+        registro["filas"] = len(df_procesado)
 
-    df_final.to_csv(output_file, index=False, encoding="utf-8-sig")
+    with metricas.etapa("escritura") as registro:
+        guardar_tabla(df_final, output_file, formato=formato, encoding="utf-8-sig")
+        registro["filas"] = len(df_final)
     print(f"Archivo final generado: {output_file}")
     print(f"Registros finales: {len(df_final)}")
 
 
+def ejecutar_pipeline_por_bloques(
+    input_file: str,
+    output_file: str,
+    chunksize: int,
+    workers: int = 1,
+    cache: CacheNotas | None = None,
+    almacen: AlmacenRelaciones | None = None,
+    metricas: Metricas = SIN_METRICAS,
+    solapado: bool = False,
+    resumen_grupos: str | None = None,
+) -> None:
+    """
+    Variante en streaming de ejecutar_pipeline con memoria acotada.
+
+    Paso 1 procesa el reporte bloque a bloque y lo escribe en un CSV intermedio,
+    conservando solo las columnas de folio/relaciones. Paso 2 construye el grafo
+    con esas columnas y vuelve a recorrer el intermedio por bloques para escribir
+    las filas que no son cancelados aislados. El archivo final es idéntico al
+    del modo completo.
+
+    Con `almacen`, los grupos de folios se calculan sobre el estado acumulado
+    de los reportes anteriores más el actual (ver AlmacenRelaciones).
+
+    Con solapado=True el paso 1 lee, procesa y escribe los bloques en paralelo
+    (ver procesar_reporte_por_bloques); la salida no cambia.
+
+    Con resumen_grupos también se conservan en memoria las columnas que usa
+    resumir_grupos y se escribe la tabla de resumen por grupo.
+    """
+    print(f"Entrada: {input_file}")
+    directorio = os.path.dirname(os.path.abspath(output_file))
+    fd, ruta_intermedia = tempfile.mkstemp(prefix=".etapa1_", suffix=".csv", dir=directorio)
+    os.close(fd)
+
+    try:
+        print("Paso 1/2: procesamiento de notas por bloques...")
+        df_relaciones = procesar_reporte_por_bloques(
+            input_file=input_file,
+            output_file=ruta_intermedia,
+            chunksize=chunksize,
+            workers=workers,
+            cache=cache,
+            metricas=metricas,
+            solapado=solapado,
+            columnas_relacion=COLUMNAS_RELACION + COLUMNAS_RESUMEN if resumen_grupos else None,
+        )
+
+        print("Paso 2/2: grafo de relaciones y filtrado de cancelados aislados...")
+        with metricas.etapa("componentes") as registro:
+            df_componentes = _calcular_grupos(df_relaciones, almacen)
+            registro["filas"] = len(df_relaciones)
+        if resumen_grupos:
+            _guardar_resumen_grupos(df_relaciones, df_componentes, resumen_grupos, metricas)
+        with metricas.etapa("separacion") as registro:
+            _, df_limpio = separar_folios_cancelados(
+                df_original=df_relaciones,
+                df_grupos=df_componentes,
+            )
+            registro["filas"] = len(df_relaciones)
+        # El índice de df_limpio es la posición de la fila en el intermedio
+        df_aux = df_limpio[['Folio_Key', 'Grupo_ID', 'Tamano_Grupo']]
+        del df_relaciones, df_componentes, df_limpio
+
+        # Se relee como texto para reescribir los valores exactamente como se exportaron
+        lector = pd.read_csv(
+            ruta_intermedia,
+            encoding="utf-8",
+            dtype=str,
+            keep_default_na=False,
+            chunksize=chunksize,
+        )
+        registros = 0
+        with metricas.etapa("escritura_final") as registro:
+            for i, bloque in enumerate(lector):
+                posiciones = bloque.index.intersection(df_aux.index)
+                df_salida = bloque.loc[posiciones].join(df_aux.loc[posiciones])
+                df_salida.to_csv(
+                    output_file,
+                    mode="w" if i == 0 else "a",
+                    header=(i == 0),
+                    index=False,
+                    encoding="utf-8-sig" if i == 0 else "utf-8",
+                )
+                registros += len(df_salida)
+            registro["filas"] = registros
+    finally:
+        if os.path.exists(ruta_intermedia):
+            os.remove(ruta_intermedia)
+
+    print(f"Archivo final generado: {output_file}")
+    print(f"Registros finales: {registros}")
+
+
+def listar_reportes(patron: str) -> list[str]:
+    """
+    Archivos de un lote: si `patron` es un directorio, todos los reportes que
+    contiene (CSV, Parquet o Feather); si no, los que coinciden con el glob.
+    Se devuelven ordenados por nombre.
+    """
+    if os.path.isdir(patron):
+        rutas = [
+            os.path.join(patron, nombre) for nombre in os.listdir(patron)
+            if os.path.splitext(nombre)[1].lower() in EXTENSIONES
+        ]
+    else:
+        rutas = glob.glob(patron)
+    return sorted(r for r in rutas if os.path.isfile(r))
+
+
+def ejecutar_lote(
+    input_files: list[str],
+    output_dir: str | None = None,
+    output_file: str | None = None,
+    workers: int = 1,
+    cache: CacheNotas | None = None,
+    almacen: AlmacenRelaciones | None = None,
+    formato: str | None = None,
+    motor: str | None = None,
+    metricas: Metricas = SIN_METRICAS,
+    archivos_en_paralelo: int = 2,
+    resumen_grupos: str | None = None,
+) -> None:
+    """
+    Procesa varios reportes (p. ej. los doce meses de un año) en una sola
+    invocación.
+
+    - Las reglas compiladas, el pool de procesos de `workers` y la caché se
+      comparten entre archivos; hasta `archivos_en_paralelo` archivos pasan por
+      el paso 1 a la vez.
+    - El grafo de folios se construye una sola vez con las filas de todos los
+      archivos, así que las relaciones entre meses quedan resueltas.
+    - Con `output_dir` se escribe un archivo final por reporte
+      (<nombre>_limpieza_final.<ext>), con las mismas columnas que el modo de
+      un solo archivo; con `output_file`, un archivo combinado con la columna
+      adicional 'Archivo_Origen'.
+    - Con `resumen_grupos`, una tabla con una fila por grupo de folios del lote.
+    """
+    if not input_files:
+        raise ValueError("El lote no contiene reportes.")
+    print(f"Lote de {len(input_files)} reportes")
+
+    print("Paso 1/2: procesamiento de notas y estructura base...")
+
+    def procesar(ruta):
+        return procesar_reporte(
+            input_file=ruta,
+            output_file=None,
+            workers=workers,
+            cache=cache,
+            motor=motor,
+            metricas=metricas,
+        )
+
+    with ThreadPoolExecutor(max_workers=max(1, archivos_en_paralelo)) as ejecutor:
+        procesados = list(ejecutor.map(procesar, input_files))
+
+    # Archivo de origen de cada fila del lote, por posición
+    origen = np.repeat(np.arange(len(input_files)), [len(df) for df in procesados])
+    df_lote = concatenar_tablas(procesados, ignore_index=True)
+    del procesados
+
+    print("Paso 2/2: grafo de relaciones del lote y filtrado de cancelados aislados...")
+    with metricas.etapa("componentes") as registro:
+        df_componentes = _calcular_grupos(df_lote, almacen)
+        registro["filas"] = len(df_lote)
+    if resumen_grupos:
+        _guardar_resumen_grupos(df_lote, df_componentes, resumen_grupos, metricas)
+    with metricas.etapa("separacion") as registro:
+        _, df_final = separar_folios_cancelados(df_original=df_lote, df_grupos=df_componentes)
+        registro["filas"] = len(df_lote)
+    # El índice de df_final es la posición de la fila en df_lote
+    origen_final = origen[df_final.index.to_numpy()]
+
+    with metricas.etapa("escritura") as registro:
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+            extension = next(
+                (ext for ext, fmt in EXTENSIONES.items() if fmt == formato), ".csv"
+            )
+            for i, ruta in enumerate(input_files):
+                nombre = os.path.splitext(os.path.basename(ruta))[0]
+                salida = os.path.join(output_dir, f"{nombre}_limpieza_final{extension}")
+                df_archivo = df_final[origen_final == i]
+                guardar_tabla(df_archivo, salida, formato=formato, encoding="utf-8-sig")
+                print(f"  {salida}: {len(df_archivo)} registros")
+        if output_file:
+            nombres = np.array([os.path.basename(r) for r in input_files], dtype=object)
+            guardar_tabla(
+                df_final.assign(Archivo_Origen=nombres[origen_final]),
+                output_file,
+                formato=formato,
+                encoding="utf-8-sig",
+            )
+            print(f"Archivo combinado generado: {output_file}")
+        registro["filas"] = len(df_final)
+
+    print(f"Registros finales del lote: {len(df_final)}")
+
+
 def main() -> None:
     parser = argparse.ArgumentParser(
         description="Pipeline único: un archivo de entrada -> un archivo final sin intermedios."
@@ -45,12 +318,170 @@ def main() -> None:
     )
     parser.add_argument(
         "--output",
-        default=os.path.join(_BASE_DIR, "Report_enero_limpieza_final.csv"),
-        help="Ruta del CSV final de salida.",
+        default=None,
+        help="Ruta del CSV final de salida (en modo lote, archivo combinado opcional). "
+        "Por defecto Report_enero_limpieza_final.csv.",
+    )
+    parser.add_argument(
+        "--lote",
+        default=None,
+        help="Directorio o glob de reportes (p. ej. 'Limpieza_notas/Reporte_*.csv') "
+        "para procesarlos juntos con un solo grafo de folios.",
+    )
+    parser.add_argument(
+        "--output-dir",
+        default=None,
+        help="En modo lote, directorio donde se escribe un archivo final por reporte.",
+    )
+    parser.add_argument(
+        "--archivos-paralelo",
+        type=int,
+        default=2,
+        help="En modo lote, número de reportes que se procesan a la vez.",
+    )
+    parser.add_argument(
+        "--chunksize",
+        type=int,
+        default=None,
+        help="Procesa el reporte en bloques de N filas para acotar la memoria.",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Procesos para el procesamiento de notas (1 = secuencial).",
+    )
+    parser.add_argument(
+        "--cache-notas",
+        default=None,
+        help="Archivo SQLite de caché persistente de notas procesadas (opcional).",
+    )
+    parser.add_argument(
+        "--cache-max",
+        type=int,
+        default=1_000_000,
+        help="Máximo de notas en la caché; se desalojan las menos usadas.",
+    )
+    parser.add_argument(
+        "--relaciones-acumuladas",
+        default=None,
+        help="Archivo SQLite donde se acumulan los grupos de folios entre reportes (opcional).",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATOS,
+        default=None,
+        help="Formato del archivo final. Por defecto se deduce de la extensión de --output.",
+    )
+    parser.add_argument(
+        "--motor-csv",
+        choices=["c", "pyarrow", "auto"],
+        default="c",
+        help="Parser del CSV de entrada; 'auto' usa pyarrow si está instalado (sin --chunksize).",
+    )
+    parser.add_argument(
+        "--solapar",
+        action="store_true",
+        help="Con --chunksize, lee y escribe bloques en hilos mientras se procesan otros.",
+    )
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Reprocesa solo las filas nuevas o modificadas desde la corrida anterior "
+        "(manifiesto <salida>.manifiesto.parquet junto al archivo final; requiere pyarrow).",
+    )
+    parser.add_argument(
+        "--resumen-grupos",
+        default=None,
+        help="Archivo (CSV, Parquet o Feather según la extensión) con una fila por grupo de folios: "
+        "tamaño, filas, cancelados, primera/última recepción y comisarías distintas.",
+    )
+    parser.add_argument(
+        "--metrics",
+        default=None,
+        help="Archivo donde se agrega una línea JSON con tiempos, filas/s y memoria por etapa.",
+    )
+    parser.add_argument(
+        "--metrics-tracemalloc",
+        action="store_true",
+        help="Con --metrics, mide el pico de memoria de cada etapa con tracemalloc (más lento).",
     )
     args = parser.parse_args()
+    if args.lote:
+        if args.chunksize:
+            parser.error("--lote no admite --chunksize")
+        if not args.output and not args.output_dir:
+            parser.error("--lote requiere --output-dir y/o --output")
+        if args.format is None and args.output:
+            args.format = detectar_formato(args.output)
+    elif args.output is None:
+        args.output = os.path.join(_BASE_DIR, "Report_enero_limpieza_final.csv")
+    if args.chunksize and detectar_formato(args.output, args.format) != "csv":
+        parser.error("--chunksize solo admite salida CSV")
+    if args.solapar and not args.chunksize:
+        parser.error("--solapar requiere --chunksize")
+    if args.incremental and (args.chunksize or args.lote):
+        parser.error("--incremental no admite --chunksize ni --lote")
 
-    ejecutar_pipeline(args.input, args.output)
+    cache = CacheNotas(args.cache_notas, max_entradas=args.cache_max) if args.cache_notas else None
+    almacen = AlmacenRelaciones(args.relaciones_acumuladas) if args.relaciones_acumuladas else None
+    metricas = (
+        Metricas(trazar_memoria=args.metrics_tracemalloc) if args.metrics else SIN_METRICAS
+    )
+    try:
+        if args.lote:
+            ejecutar_lote(
+                listar_reportes(args.lote),
+                output_dir=args.output_dir,
+                output_file=args.output,
+                workers=args.workers,
+                cache=cache,
+                almacen=almacen,
+                formato=args.format,
+                motor=args.motor_csv,
+                metricas=metricas,
+                archivos_en_paralelo=args.archivos_paralelo,
+                resumen_grupos=args.resumen_grupos,
+            )
+        elif args.chunksize:
+            ejecutar_pipeline_por_bloques(
+                args.input,
+                args.output,
+                args.chunksize,
+                workers=args.workers,
+                cache=cache,
+                almacen=almacen,
+                metricas=metricas,
+                solapado=args.solapar,
+                resumen_grupos=args.resumen_grupos,
+            )
+        else:
+            ejecutar_pipeline(
+                args.input,
+                args.output,
+                workers=args.workers,
+                cache=cache,
+                almacen=almacen,
+                formato=args.format,
+                motor=args.motor_csv,
+                metricas=metricas,
+                incremental=args.incremental,
+                resumen_grupos=args.resumen_grupos,
+            )
+        if args.metrics:
+            metricas.guardar(
+                args.metrics,
+                entrada=args.lote or args.input,
+                salida=args.output,
+                chunksize=args.chunksize,
+                workers=args.workers,
+            )
+            print(f"Métricas guardadas en: {args.metrics}")
+    finally:
+        if cache is not None:
+            cache.cerrar()
+        if almacen is not None:
+            almacen.cerrar()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,7 @@
+import os
+import sys
+
+_BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+for ruta in (_BASE_DIR, os.path.join(_BASE_DIR, 'funciones')):
+    if ruta not in sys.path:
+        sys.path.insert(0, ruta)
@@ -0,0 +1,54 @@
+"""
+AlmacenRelaciones: agregar un reporte por partes (mes a mes) da los mismos
+grupos que agregarlo de una vez y que calcular_componentes.
+"""
+import pandas as pd
+
+from almacen_relaciones import AlmacenRelaciones
+from procesamiento_grafos import calcular_componentes
+from test_componentes import reporte_aleatorio
+
+
+def _grupos(df: pd.DataFrame) -> set[frozenset]:
+    # Partición de los folios, sin depender de cómo se numeran los grupos
+    folios = df['Folio'].astype(str)
+    return set(folios.groupby(df['Grupo_ID'].to_numpy()).agg(frozenset))
+
+
+def _tamanos(df: pd.DataFrame) -> dict:
+    return dict(zip(df['Folio'].astype(str), df['Tamano_Grupo'].astype(int)))
+
+
+def test_por_partes_igual_a_una_vez(tmp_path):
+    df = reporte_aleatorio(semilla=5)
+
+    with AlmacenRelaciones(str(tmp_path / 'una_vez.sqlite')) as una_vez:
+        una_vez.agregar(df)
+        esperado = una_vez.componentes()
+
+    with AlmacenRelaciones(str(tmp_path / 'por_partes.sqlite')) as por_partes:
+        for inicio in range(0, len(df), 90):
+            por_partes.agregar(df.iloc[inicio:inicio + 90])
+        # Volver a agregar un reporte no cambia nada
+        assert por_partes.agregar(df.iloc[:90]) == 0
+        obtenido = por_partes.componentes()
+
+    referencia = calcular_componentes(df)
+    assert _grupos(obtenido) == _grupos(esperado) == _grupos(referencia)
+    assert _tamanos(obtenido) == _tamanos(esperado) == _tamanos(referencia)
+
+
+def test_persiste_entre_aperturas(tmp_path):
+    df = reporte_aleatorio(semilla=6)
+    ruta = str(tmp_path / 'almacen.sqlite')
+    mitad = len(df) // 2
+
+    with AlmacenRelaciones(ruta) as almacen:
+        almacen.agregar(df.iloc[:mitad])
+    with AlmacenRelaciones(ruta) as almacen:
+        almacen.agregar(df.iloc[mitad:])
+        consultados = almacen.componentes(df['Folio'])
+
+    referencia = calcular_componentes(df)
+    referencia = referencia[referencia['Folio'].astype(str).isin(df['Folio'].astype(str))]
+    assert _tamanos(consultados) == _tamanos(referencia)
@@ -0,0 +1,43 @@
+"""
+CacheNotas: al pasar de max_entradas se eliminan las entradas usadas hace
+más tiempo (leer una entrada cuenta como uso).
+"""
+import itertools
+
+import pytest
+
+import cache_notas
+from cache_notas import CacheNotas
+
+
+@pytest.fixture
+def reloj(monkeypatch):
+    # Cada operación de la caché ve un instante distinto y creciente
+    instantes = itertools.count(1)
+    monkeypatch.setattr(cache_notas.time, 'time', lambda: float(next(instantes)))
+
+
+def _claves(cache: CacheNotas) -> set[bytes]:
+    # Sin obtener_muchos, que marcaría las entradas como usadas
+    return {clave for (clave,) in cache._conn.execute("SELECT clave FROM notas")}
+
+
+def test_desaloja_la_menos_usada(tmp_path, reloj):
+    ruta = str(tmp_path / 'cache.sqlite')
+    with CacheNotas(ruta, max_entradas=3) as cache:
+        for clave in (b'a', b'b', b'c'):
+            cache.guardar_muchos({clave: clave.decode()})
+        assert cache.obtener_muchos([b'a', b'x']) == {b'a': 'a'}
+
+        cache.guardar_muchos({b'd': 'd'})
+        assert _claves(cache) == {b'a', b'c', b'd'}
+
+        # Reemplazar una entrada también la marca como usada
+        cache.guardar_muchos({b'c': 'c2'})
+        cache.guardar_muchos({b'e': 'e'})
+        assert _claves(cache) == {b'c', b'd', b'e'}
+
+    # Abrir con un límite menor desaloja en el mismo orden
+    with CacheNotas(ruta, max_entradas=2) as cache:
+        assert _claves(cache) == {b'c', b'e'}
+        assert cache.obtener_muchos([b'c', b'e']) == {b'c': 'c2', b'e': 'e'}
@@ -0,0 +1,67 @@
+"""
+Grupos de folios relacionados: el union-find vectorizado (calcular_componentes)
+y el incremental (UnionFindFolios) dan las mismas componentes que NetworkX.
+"""
+import random
+
+import pandas as pd
+import pytest
+
+from procesamiento_grafos import (
+    COLUMNAS_RELACION,
+    UnionFindFolios,
+    analizar_componentes,
+    calcular_componentes,
+    construir_grafo,
+)
+
+
+def reporte_aleatorio(filas: int = 400, semilla: int = 3) -> pd.DataFrame:
+    # Folios de 10 dígitos con relaciones a folios del reporte y a folios externos
+    azar = random.Random(semilla)
+    folios = [1_000_000_000 + 7 * i for i in range(filas)]
+
+    def relacionados():
+        cantidad = azar.choices([0, 1, 2], weights=[20, 2, 1])[0]
+        return [f"{azar.choice(folios) + azar.choice([0, 0, 0, 1]):010d}" for _ in range(cantidad)]
+
+    return pd.DataFrame({
+        'Folio': folios,
+        'Divididos': [', '.join(relacionados()) or None for _ in folios],
+        'folios_ligados': [relacionados() for _ in folios],
+        'referencia_folio': [relacionados() for _ in folios],
+        'cancelados': [relacionados() for _ in folios],
+    })
+
+
+def _ordenar(df: pd.DataFrame) -> pd.DataFrame:
+    df = df.astype({'Folio': str, 'Grupo_ID': 'int64', 'Tamano_Grupo': 'int64'})
+    return df.sort_values(['Grupo_ID', 'Folio']).reset_index(drop=True)
+
+
+@pytest.mark.parametrize('semilla', [1, 2, 3])
+def test_calcular_componentes_igual_a_networkx(semilla):
+    pytest.importorskip('networkx')
+    df = reporte_aleatorio(semilla=semilla)
+    esperado = analizar_componentes(construir_grafo(df))
+    pd.testing.assert_frame_equal(_ordenar(calcular_componentes(df)), _ordenar(esperado))
+
+
+def test_union_find_folios_igual_a_calcular_componentes():
+    df = reporte_aleatorio()
+    referencia = calcular_componentes(df).astype({'Folio': str}).set_index('Folio')
+
+    union_find = UnionFindFolios()
+    for fila in df.itertuples(index=False):
+        fila = fila._asdict()
+        union_find.agregar_registro(fila['Folio'], [fila[col] for col in COLUMNAS_RELACION])
+
+    assert len(union_find) == len(referencia)
+    grupos = {}
+    for folio, (grupo_id, tamano) in referencia.iterrows():
+        grupo, tamano_flujo = union_find.grupo(folio)
+        assert tamano_flujo == tamano
+        # El mismo grupo de la referencia corresponde siempre al mismo grupo del flujo
+        assert grupos.setdefault(grupo_id, grupo) == grupo
+        assert referencia.loc[grupo, 'Grupo_ID'] == grupo_id
+    assert len(set(grupos.values())) == len(grupos)
@@ -0,0 +1,80 @@
+"""
+Bloques de un mismo reporte pueden quedar con 'Fecha' como datetime64 o como
+texto (lectura_reporte deja como texto un bloque con fechas sin ceros a la
+izquierda). Unirlos no debe perder las fechas de ninguno.
+"""
+import pandas as pd
+
+from formatos_tabla import concatenar_tablas
+from generar_csv_incidentes_procesado import (
+    COLUMNAS_RELACION,
+    procesar_reporte,
+    procesar_reporte_por_bloques,
+)
+from procesamiento_grafos import (
+    COLUMNAS_RESUMEN,
+    IndiceComponentes,
+    _instantes_recibido,
+    calcular_componentes,
+    resumir_grupos,
+)
+
+ENCABEZADO = 'Folio,Fecha,Tipo de Incidente,Notas,Municipio,Hora de Recibido,HORA_CIERRE,Latitud,Longitud,Coordenadas_,Divididos'
+FILAS = [
+    '1000000001,24/01/2024,20202,,TLAXCALA,19:13:00,,,,,',
+    '1000000002,25/01/2024,20202,,TLAXCALA,08:00:00,,,,,1000000003',
+    '1000000003,5/1/2024,20202,,APIZACO,12:27:00,,,,,',
+    '1000000004,6/1/2024,20202,,APIZACO,6:05:00,,,,,1000000001',
+]
+
+
+def _bloques():
+    con_fechas = pd.DataFrame({
+        'Fecha': pd.to_datetime(['24/01/2024', '25/01/2024'], format='%d/%m/%Y'),
+        'Hora de Recibido': pd.to_timedelta(['19:13:00', '08:00:00']),
+    })
+    como_texto = pd.DataFrame({
+        'Fecha': pd.Series(['5/1/2024', None], dtype=object),
+        'Hora de Recibido': pd.Series(['6:05:00', '12:27:00'], dtype=object),
+    })
+    return con_fechas, como_texto
+
+
+def test_instantes_con_fechas_y_texto_mezclados():
+    mezclado = pd.concat(_bloques(), ignore_index=True)
+    assert mezclado['Fecha'].dtype == object
+
+    instantes = pd.Series(_instantes_recibido(mezclado))
+    esperado = pd.Series(pd.to_datetime(
+        ['2024-01-24 19:13', '2024-01-25 08:00', '2024-01-05 06:05', None]
+    )).astype('datetime64[ns]')
+    pd.testing.assert_series_equal(instantes, esperado)
+
+
+def test_concatenar_tablas_une_como_texto():
+    unido = concatenar_tablas(list(_bloques()), ignore_index=True)
+    assert unido['Fecha'].tolist()[:3] == ['24/01/2024', '25/01/2024', '5/1/2024']
+    assert pd.isna(unido['Fecha'].iloc[3])
+    assert unido['Hora de Recibido'].tolist() == ['19:13:00', '08:00:00', '6:05:00', '12:27:00']
+
+    con_fechas, _ = _bloques()
+    mismas = concatenar_tablas([con_fechas, con_fechas], ignore_index=True)
+    assert pd.api.types.is_datetime64_any_dtype(mismas['Fecha'].dtype)
+
+
+def test_resumen_por_bloques_igual_al_completo(tmp_path):
+    entrada = tmp_path / 'reporte.csv'
+    entrada.write_text('\n'.join([ENCABEZADO] + FILAS) + '\n', encoding='utf-8')
+
+    completo = procesar_reporte(str(entrada))
+    por_bloques = procesar_reporte_por_bloques(
+        str(entrada), str(tmp_path / 'salida.csv'), chunksize=2,
+        columnas_relacion=COLUMNAS_RELACION + COLUMNAS_RESUMEN,
+    )
+
+    resumenes = []
+    for df in (completo, por_bloques):
+        indice = IndiceComponentes.desde_grupos(calcular_componentes(df))
+        resumenes.append(resumir_grupos(df.reset_index(drop=True), indice))
+    pd.testing.assert_frame_equal(resumenes[0], resumenes[1])
+    assert resumenes[0]['Fecha_Inicio'].notna().all()
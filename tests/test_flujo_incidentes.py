@@ -0,0 +1,35 @@
+"""
+Registros inválidos en el modo en flujo: salen como error en su lugar, sin
+tocar el union-find ni cortar el lote.
+"""
+import io
+import json
+
+from flujo_incidentes import ejecutar_flujo
+
+LINEAS = [
+    '{"Folio": 1, "Divididos": [2, "3"], "Notas": "reporte"}',
+    '{"Folio": 1.5e400, "Notas": "fuera de rango"}',
+    '{"Folio": NaN}',
+    '{"Folio": 4, "Divididos": {"a": 1}}',
+    '{"Folio": 5, "Divididos": [[6]]}',
+    '{"Folio": [7]}',
+    'no es json',
+    '{"Folio": 8, "Divididos": 1}',
+]
+
+
+def test_errores_en_su_lugar():
+    salida = io.StringIO()
+    procesador = ejecutar_flujo(io.StringIO('\n'.join(LINEAS) + '\n'), salida, latencia_max=0)
+    resultados = [json.loads(linea) for linea in salida.getvalue().splitlines()]
+
+    assert len(resultados) == len(LINEAS)
+    assert [r.get('Folio') for r in resultados] == [1, None, None, None, None, None, None, 8]
+    assert ['linea' in r for r in resultados] == [False, True, True, False, False, False, True, False]
+    assert ['registro' in r for r in resultados] == [False, False, False, True, True, True, False, False]
+
+    # Solo los registros válidos entran al union-find
+    assert procesador.union_find.grupo(8) == ('1', 4)
+    assert procesador.union_find.grupo(4) == (None, 0)
+    assert procesador.union_find.grupo(6) == (None, 0)
@@ -0,0 +1,32 @@
+"""
+Importar el CLI no debe cargar scikit-learn, scipy ni networkx (ver
+benchmarks/benchmark_importacion.py). El presupuesto de tiempo depende de
+la máquina, así que esa prueba solo corre con MEDIR_IMPORTACION=1.
+"""
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'benchmarks'))
+
+from benchmark_importacion import PRESUPUESTO_SEGUNDOS, medir_importacion, modulos_prohibidos
+
+REPETICIONES = 3
+
+
+def test_importacion_sin_modulos_pesados():
+    _, modulos = medir_importacion('pipeline_preprocesamiento')
+    assert 'sklearn' not in modulos
+    assert 'scipy' not in modulos
+    assert 'networkx' not in modulos
+    assert modulos_prohibidos(modulos) == []
+
+
+@pytest.mark.skipif(not os.environ.get('MEDIR_IMPORTACION'), reason="solo con MEDIR_IMPORTACION=1")
+def test_importacion_dentro_del_presupuesto():
+    # Menor tiempo de varias mediciones, cada una en un intérprete nuevo
+    segundos = min(medir_importacion('pipeline_preprocesamiento')[0] for _ in range(REPETICIONES))
+    assert segundos < PRESUPUESTO_SEGUNDOS, (
+        f"import pipeline_preprocesamiento tarda {segundos:.3f} s (presupuesto {PRESUPUESTO_SEGUNDOS} s)"
+    )
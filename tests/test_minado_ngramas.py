@@ -0,0 +1,37 @@
+"""
+MinadorNgramas por bloques, con particiones que se compactan y se duplican,
+da lo mismo que top_ngramas sobre todas las notas.
+"""
+import random
+
+import pytest
+
+from minado_ngramas import MinadorNgramas
+from notas_extraccion import top_ngramas
+
+PALABRAS = [
+    'reporta', 'persona', 'lesionada', 'vehiculo', 'calle', 'domicilio', 'unidad',
+    'policia', 'ambulancia', 'choque', 'moto', 'robo', 'tienda', 'vecino', 'ruido',
+    'fuga', 'agua', 'incendio', 'casa', 'carretera', 'km', 'centro', 'mercado',
+]
+
+
+def _notas(cantidad: int, semilla: int = 7) -> list[str]:
+    azar = random.Random(semilla)
+    return [' '.join(azar.choices(PALABRAS, k=azar.randint(0, 12))) for _ in range(cantidad)]
+
+
+@pytest.mark.parametrize('particiones, max_entradas', [(16, 1_000_000), (1, 500), (2, 2000)])
+def test_igual_a_top_ngramas(particiones, max_entradas):
+    pytest.importorskip('sklearn')
+    notas = _notas(3000)
+    esperado = [(frase, int(n)) for frase, n in top_ngramas(notas, min_df=5, top_k=40)]
+
+    with MinadorNgramas(min_df=5, particiones=particiones, max_entradas=max_entradas) as minador:
+        for inicio in range(0, len(notas), 250):
+            minador.agregar(notas[inicio:inicio + 250])
+            assert max(minador._lineas) <= max_entradas
+        assert minador.top(40) == esperado
+        assert minador.documentos == len(notas)
+        if max_entradas < 1_000_000:
+            assert minador.particiones > particiones
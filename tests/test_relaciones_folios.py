@@ -0,0 +1,57 @@
+"""
+ArregloFolios (columna CSR de listas de folios): cortes, take y concat dan las
+mismas listas que las columnas de listas, con los ceros a la izquierda.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from relaciones_folios import ArregloFolios
+
+LISTAS = [
+    ['0000000123', '1000000001'],
+    [],
+    ['0000000007'],
+    [],
+    ['2024000001', '0000000123', '0099999999'],
+]
+
+
+def test_ida_y_vuelta():
+    arreglo = ArregloFolios.desde_listas(LISTAS)
+    assert arreglo.a_listas() == LISTAS
+    assert list(arreglo) == LISTAS
+    assert arreglo[0] == ['0000000123', '1000000001']
+    assert arreglo[-1] == LISTAS[-1]
+    assert arreglo.con_elementos().tolist() == [True, False, True, False, True]
+    assert ArregloFolios.desde_listas([None, np.nan, ['0000000001']]).a_listas() == [[], [], ['0000000001']]
+
+
+def test_cortes_y_take():
+    arreglo = ArregloFolios.desde_listas(LISTAS)
+    assert arreglo[1:4].a_listas() == LISTAS[1:4]
+    assert arreglo[::2].a_listas() == LISTAS[::2]
+    assert arreglo[2:].take([2, 0]).a_listas() == [LISTAS[4], LISTAS[2]]
+    assert arreglo.take([4, -1, 0], allow_fill=True).a_listas() == [LISTAS[4], [], LISTAS[0]]
+    assert arreglo.take([-1, 0]).a_listas() == [LISTAS[-1], LISTAS[0]]
+    assert arreglo[np.array([False, True, True, False, True])].a_listas() == [LISTAS[1], LISTAS[2], LISTAS[4]]
+    with pytest.raises(IndexError):
+        arreglo.take([5])
+
+
+def test_concat_y_filtros_en_dataframe():
+    df = pd.DataFrame({'Folio': range(len(LISTAS)), 'folios_ligados': ArregloFolios.desde_listas(LISTAS)})
+    unido = pd.concat([df.iloc[3:], df.iloc[:3]], ignore_index=True)
+    assert unido['folios_ligados'].dtype == df['folios_ligados'].dtype
+    assert unido['folios_ligados'].array.a_listas() == LISTAS[3:] + LISTAS[:3]
+
+    filtrado = df[df['Folio'] % 2 == 0]
+    assert filtrado['folios_ligados'].tolist() == LISTAS[::2]
+    assert filtrado['folios_ligados'].array.explotar().tolist() == [
+        folio for lista in LISTAS[::2] for folio in lista
+    ]
+
+
+def test_rechaza_folios_sin_diez_digitos():
+    with pytest.raises(ValueError):
+        ArregloFolios.desde_listas([['123']])
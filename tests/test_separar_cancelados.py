@@ -0,0 +1,48 @@
+"""
+separar_folios_cancelados vectorizado frente a la versión fila por fila
+(merge con los grupos y apply), con cancelados como listas, como texto y
+como ArregloFolios.
+"""
+import numpy as np
+import pandas as pd
+import pytest
+
+from procesamiento_grafos import (
+    calcular_componentes,
+    limpiar_foliostr,
+    parsear_lista_string,
+    separar_folios_cancelados,
+)
+from relaciones_folios import ArregloFolios
+from test_componentes import reporte_aleatorio
+
+
+def _separar_por_filas(df_original, df_grupos) -> np.ndarray:
+    # Criterio de separación evaluado fila por fila
+    tamanos = dict(zip(df_grupos['Folio'].map(limpiar_foliostr), df_grupos['Tamano_Grupo']))
+    return np.array([
+        bool(parsear_lista_string(cancelados)) and tamanos.get(limpiar_foliostr(folio), 1) == 1
+        for folio, cancelados in zip(df_original['Folio'], df_original['cancelados'])
+    ])
+
+
+@pytest.mark.parametrize('formato', ['listas', 'texto', 'arreglo'])
+def test_igual_a_fila_por_fila(formato):
+    df = reporte_aleatorio(semilla=8)
+    if formato == 'texto':
+        df['cancelados'] = df['cancelados'].map(str)
+    elif formato == 'arreglo':
+        df['cancelados'] = ArregloFolios.desde_listas(df['cancelados'])
+    # Folios sin grupo (se consideran aislados) y un folio nulo
+    df_grupos = calcular_componentes(df).iloc[20:]
+    df.loc[3, 'Folio'] = None
+
+    df_cancelados, df_limpio = separar_folios_cancelados(df, df_grupos)
+    esperado = _separar_por_filas(df, df_grupos)
+
+    assert esperado.any() and not esperado.all()
+    assert df_cancelados.index.tolist() == np.flatnonzero(esperado).tolist()
+    assert df_limpio.index.tolist() == np.flatnonzero(~esperado).tolist()
+    columnas = list(df.columns)
+    pd.testing.assert_frame_equal(df_cancelados[columnas], df.iloc[np.flatnonzero(esperado)])
+    pd.testing.assert_frame_equal(df_limpio[columnas], df.iloc[np.flatnonzero(~esperado)])